@@ -3,8 +3,10 @@ admin_interface.py - Interface d'administration (VERSION LIVE, sans mot de passe
 
 Fonctionnalites :
   * Configuration des ports physiques source / destination (assistant de
-    detection : debrancher puis brancher un disque de test sur le port vise)
-  * Generation PDF : rapport de session / logs complets
+    detection : debrancher puis brancher un disque de test sur le port vise,
+    ou apprentissage en masse de tous les ports d'un hub)
+  * Generation PDF : rapport de session / logs complets / historique
+  * Historique des clonages : synthese du mois en cours
   * Purge des logs
   * Reglages de clonage (taille de bloc, verification post-clonage)
   * Redemarrer / Eteindre
@@ -14,23 +16,33 @@ F11 pour basculer, Echap pour fermer le panneau.
 """
 from __future__ import annotations
 
+import sqlite3
 import subprocess
 import threading
 import tkinter as tk
 from tkinter import messagebox, ttk
-from typing import Callable, Optional
+from typing import Callable, Dict, List, Optional
 
 import config_manager
+import history
+from clone import CACHE_MODES
+from job_manager import JobManager, load_stations
 from log_handler import (
-    generate_log_file_pdf,
-    generate_session_pdf,
-    log_error,
+    PdfExport,
+    current_pdf_export,
     log_info,
     log_application_exit,
     purge_logs,
+    start_pdf_export,
 )
-from port_detector import DetectionCancelled, DetectionTimeout, run_detection_wizard
-from utils import DiskInfo
+from port_detector import (
+    DetectionCancelled,
+    DetectionTimeout,
+    learn_port_sequence,
+    run_detection_wizard,
+)
+from production import ProductionError, ProductionRun
+from utils import DiskInfo, discover_usb_ports
 
 # ── Palette (alignee sur le theme sombre de gui_interface.py) ───────────────
 _BG          = "#0b1220"
@@ -184,7 +196,8 @@ class PortDetectionDialog(tk.Toplevel):
         except DetectionCancelled:
             self.after(0, self.destroy)
         except Exception as e:
-            self.after(0, lambda: self._on_failure(f"Erreur pendant la detection : {e}"))
+            message = f"Erreur pendant la detection : {e}"
+            self.after(0, lambda: self._on_failure(message))
 
     def _on_success(self, disk: DiskInfo) -> None:
         self._progress.stop()
@@ -207,14 +220,251 @@ class PortDetectionDialog(tk.Toplevel):
         self.destroy()
 
 
+class BulkPortDialog(tk.Toplevel):
+    """
+    Apprentissage en masse des ports d'un hub (7, 16 ports...) : soit par
+    branchement sequentiel d'une cle sur chaque port, dans l'ordre, soit par
+    lecture de la topologie des hubs dans sysfs (aucune cle necessaire).
+    Chaque port recoit ensuite un role « Source N » / « Destination N » : une
+    paire de ports de meme numero forme le poste N (plusieurs postes peuvent
+    cloner en parallele). Le tout est enregistre en une seule fois.
+    """
+
+    _MAX_STATIONS = 8
+    _ROLES = ("-",) + tuple(
+        f"{kind} {n}" for n in range(1, _MAX_STATIONS + 1) for kind in ("Source", "Destination")
+    )
+
+    def __init__(self, parent: tk.Widget) -> None:
+        super().__init__(parent)
+        self.title("Apprentissage des ports du hub")
+        self.resizable(False, False)
+        self.grab_set()
+        self.configure(bg=_BG)
+        _apply_admin_styles(self)
+
+        self.saved = False
+        self._cancelled = False
+        self._finish = False
+        self._learning = False
+        self._thread: Optional[threading.Thread] = None
+        self._ports: List[Dict[str, str]] = []
+        self._role_vars: List[tk.StringVar] = []
+
+        header = ttk.Frame(self, style="AdminHeader.TFrame", padding=(20, 12))
+        header.pack(fill=tk.X)
+        ttk.Label(header, text="Apprentissage des ports du hub",
+                  style="AdminHeader.TLabel").pack()
+
+        body = ttk.Frame(self, padding=(24, 16))
+        body.pack(fill=tk.BOTH, expand=True)
+
+        ttk.Label(
+            body,
+            text=(
+                "Sequentiel : debranchez toutes les cles, lancez l'apprentissage puis "
+                "branchez une cle sur chaque port, DANS L'ORDRE, sans retirer les "
+                "precedentes. Cliquez sur « Terminer » apres le dernier port.\n"
+                "Decouvrir : lit la topologie des hubs USB (aucune cle necessaire ; "
+                "l'identifiant du port est alors predit)."
+            ),
+            wraplength=520, justify="left",
+        ).pack(anchor="w", pady=(0, 12))
+
+        mode_row = ttk.Frame(body)
+        mode_row.pack(fill=tk.X, pady=(0, 10))
+        self._learn_btn = ttk.Button(mode_row, text="Apprentissage sequentiel",
+                                     style="AdminAction.TButton", command=self._start_learning)
+        self._learn_btn.pack(side=tk.LEFT, padx=(0, 8))
+        self._discover_btn = ttk.Button(mode_row, text="Decouvrir les ports (sans cle)",
+                                        style="AdminAction.TButton", command=self._discover)
+        self._discover_btn.pack(side=tk.LEFT, padx=(0, 8))
+        self._finish_btn = ttk.Button(mode_row, text="Terminer", state="disabled",
+                                      command=self._request_finish)
+        self._finish_btn.pack(side=tk.LEFT)
+
+        self._status_var = tk.StringVar(value="")
+        ttk.Label(body, textvariable=self._status_var, font=("Helvetica", 10, "bold")).pack(anchor="w")
+
+        self._list_frame = ttk.Frame(body)
+        self._list_frame.pack(fill=tk.X, pady=(10, 16))
+
+        btn_row = ttk.Frame(body)
+        btn_row.pack(fill=tk.X)
+        ttk.Button(btn_row, text="Annuler", command=self._cancel).pack(side=tk.RIGHT)
+        ttk.Button(btn_row, text="Enregistrer", style="AdminAction.TButton",
+                   command=self._save).pack(side=tk.RIGHT, padx=(0, 8))
+
+        # Etat actuel : ports deja appris et postes deja formes
+        roles: Dict[str, str] = {}
+        for number, station in enumerate(config_manager.get_stations(), start=1):
+            roles[station.get("source_id_path")] = f"Source {number}"
+            roles[station.get("dest_id_path")] = f"Destination {number}"
+        for port in config_manager.get_known_ports():
+            self._add_port(port["id_path"], port.get("label", ""), roles.get(port["id_path"], "-"))
+        self._status_var.set(f"{len(self._ports)} port(s) connu(s).")
+
+        self.protocol("WM_DELETE_WINDOW", self._cancel)
+        self.update_idletasks()
+        x = parent.winfo_rootx() + (parent.winfo_width() - self.winfo_width()) // 2
+        y = parent.winfo_rooty() + (parent.winfo_height() - self.winfo_height()) // 3
+        self.geometry(f"+{max(x, 0)}+{max(y, 0)}")
+        self.wait_window(self)
+
+    # -- Liste des ports ------------------------------------------------------
+    def _clear_ports(self) -> None:
+        for child in self._list_frame.winfo_children():
+            child.destroy()
+        self._ports = []
+        self._role_vars = []
+
+    def _add_port(self, id_path: str, label: str, role: str = "-") -> None:
+        index = len(self._ports) + 1
+        self._ports.append({"id_path": id_path, "label": label})
+        role_var = tk.StringVar(value=role)
+        self._role_vars.append(role_var)
+
+        row = ttk.Frame(self._list_frame)
+        row.pack(fill=tk.X, pady=1)
+        ttk.Label(row, text=f"{index:>2}.", width=4).pack(side=tk.LEFT)
+        ttk.Label(row, text=label or id_path, width=46).pack(side=tk.LEFT)
+        ttk.Combobox(row, textvariable=role_var, width=14, values=list(self._ROLES),
+                     state="readonly").pack(side=tk.RIGHT)
+        self.update_idletasks()
+
+    # -- Apprentissage ---------------------------------------------------------
+    def _set_busy(self, busy: bool) -> None:
+        self._learning = busy
+        self._learn_btn.configure(state="disabled" if busy else "normal")
+        self._discover_btn.configure(state="disabled" if busy else "normal")
+        self._finish_btn.configure(state="normal" if busy else "disabled")
+
+    def _post(self, callback: Callable[[], None]) -> None:
+        """Depuis le thread d'apprentissage : `callback` sur le thread Tk, sauf dialogue ferme."""
+        def run() -> None:
+            if not self._cancelled and self.winfo_exists():
+                callback()
+
+        if not self._cancelled:
+            self.after(0, run)
+
+    def _set_status(self, text: str) -> None:
+        self._post(lambda: self._status_var.set(text))
+
+    def _start_learning(self) -> None:
+        self._clear_ports()
+        self._finish = False
+        self._set_busy(True)
+        self._thread = threading.Thread(target=self._run_learning, daemon=True)
+        self._thread.start()
+
+    def _request_finish(self) -> None:
+        self._finish = True
+
+    def _run_learning(self) -> None:
+        def on_port(index: int, disk: DiskInfo) -> None:
+            label = f"Port {index} - {disk.model} ({disk.size_human})"
+            self._post(lambda: self._add_port(disk.id_path, label))
+
+        try:
+            learned = learn_port_sequence(
+                timeout=120,
+                finish_check=lambda: self._finish,
+                cancel_check=lambda: self._cancelled,
+                status_cb=self._set_status,
+                port_cb=on_port,
+            )
+        except DetectionCancelled:
+            return
+        except Exception as e:
+            message = f"Erreur pendant l'apprentissage : {e}"
+            self._post(lambda: self._on_learning_done(message))
+            return
+        self._post(lambda: self._on_learning_done(f"{len(learned)} port(s) appris."))
+
+    def _on_learning_done(self, message: str) -> None:
+        self._set_busy(False)
+        self._status_var.set(message)
+
+    def _discover(self) -> None:
+        ports = discover_usb_ports()
+        if not ports:
+            messagebox.showwarning("Aucun port", "Aucun port USB trouve dans la topologie systeme.",
+                                   parent=self)
+            return
+        self._clear_ports()
+        for index, port in enumerate(ports, start=1):
+            label = f"Port {index} - hub {port.hub}, chaine {port.chain}"
+            self._add_port(port.id_path, label + (" (occupe)" if port.occupied else ""))
+        self._status_var.set(f"{len(ports)} port(s) decouvert(s).")
+
+    # -- Validation ---------------------------------------------------------------
+    def _save(self) -> None:
+        if self._learning:
+            messagebox.showwarning("Apprentissage en cours",
+                                   "Cliquez sur « Terminer » avant d'enregistrer.", parent=self)
+            return
+        pairs: Dict[int, Dict[str, str]] = {}
+        for port, role_var in zip(self._ports, self._role_vars):
+            role = role_var.get()
+            if role not in self._ROLES or role == "-":
+                continue
+            kind, _, number = role.partition(" ")
+            key = "source_id_path" if kind == "Source" else "dest_id_path"
+            station = pairs.setdefault(int(number), {})
+            if key in station:
+                messagebox.showerror("Roles incoherents",
+                                     f"Un seul port peut etre affecte a « {role} ».", parent=self)
+                return
+            station[key] = port["id_path"]
+        incomplete = [n for n, station in sorted(pairs.items()) if len(station) < 2]
+        if incomplete:
+            messagebox.showerror("Poste incomplet",
+                                 f"Poste {incomplete[0]} : il faut un port source ET un port destination.",
+                                 parent=self)
+            return
+        if not pairs and config_manager.ports_configured():
+            if not messagebox.askyesno("Aucun poste",
+                                       "Aucun poste n'est defini : les ports source / destination "
+                                       "actuels seront oublies. Continuer ?", parent=self):
+                return
+
+        stations = [{"name": f"Poste {n}", **pairs[n]} for n in sorted(pairs)]
+        config_manager.set_port_map(self._ports, stations)
+        log_info(f"Ports du hub enregistres : {len(self._ports)} port(s), {len(stations)} poste(s)")
+        self.saved = True
+        self.destroy()
+
+    def _cancel(self) -> None:
+        self._cancelled = True
+        if self._thread is not None:
+            # learn_port_sequence consulte cancel_check a chaque tour : retour rapide
+            self._thread.join(2.0)
+        self.destroy()
+
+
 class AdminPanel(tk.Toplevel):
-    def __init__(self, parent: tk.Widget, on_ports_changed: Optional[Callable[[], None]] = None) -> None:
+    _BUS_LOADS = (0.0, 0.5, 0.75, 1.0)
+    _IONICE_LABELS = {None: "Par defaut", 0: "0 (elevee)", 4: "4", 7: "7 (basse)"}
+
+    def __init__(
+        self,
+        parent: tk.Widget,
+        on_ports_changed: Optional[Callable[[], None]] = None,
+        job_manager: Optional[JobManager] = None,
+        production: Optional[ProductionRun] = None,
+    ) -> None:
         super().__init__(parent)
         self.title("Administration - Cloneur de disque (mode Live)")
         self.configure(bg=_BG)
         self.resizable(True, True)
         self._parent = parent
         self._on_ports_changed = on_ports_changed
+        self._job_manager = job_manager
+        self._production = production
+        self._stats_after_id: Optional[str] = None
+        self._export: Optional[PdfExport] = None
+        self._export_after_id: Optional[str] = None
         _apply_admin_styles(self)
 
         # ── Plein ecran (comme la fenetre principale) ────────────────────
@@ -241,6 +491,7 @@ class AdminPanel(tk.Toplevel):
 
         self._source_status_var = tk.StringVar()
         self._dest_status_var = tk.StringVar()
+        self._stations_status_var = tk.StringVar()
         self._refresh_port_labels()
 
         src_row = ttk.Frame(ports_frame)
@@ -261,6 +512,12 @@ class AdminPanel(tk.Toplevel):
                    style="AdminAction.TButton",
                    command=lambda: self._detect_port("dest")).pack(anchor="w")
 
+        ttk.Separator(ports_frame).pack(fill=tk.X, pady=8)
+        ttk.Label(ports_frame, textvariable=self._stations_status_var, wraplength=600).pack(anchor="w", pady=(0, 6))
+        ttk.Button(ports_frame, text="Apprendre tous les ports du hub / definir les postes",
+                   style="AdminAction.TButton",
+                   command=self._learn_ports).pack(anchor="w")
+
         # -- Parametres de clonage -----------------------------------------
         settings_frame = ttk.LabelFrame(body, text="Parametres de clonage", padding=(14, 10))
         settings_frame.pack(fill=tk.X, pady=(0, 14))
@@ -281,6 +538,118 @@ class AdminPanel(tk.Toplevel):
             command=lambda: config_manager.set_verify_after_clone(self._verify_var.get()),
         ).pack(anchor="w")
 
+        self._preflight_var = tk.BooleanVar(value=config_manager.get_preflight_enabled())
+        ttk.Checkbutton(
+            settings_frame, text="Tester la destination avant clonage (fausse capacite, cle lente)",
+            variable=self._preflight_var,
+            command=lambda: config_manager.set_preflight_enabled(self._preflight_var.get()),
+        ).pack(anchor="w", pady=(6, 0))
+
+        speed_row = ttk.Frame(settings_frame)
+        speed_row.pack(fill=tk.X, pady=(8, 0))
+        ttk.Label(speed_row, text="Debit d'ecriture minimal (Mo/s) :").pack(side=tk.LEFT)
+        self._min_speed_var = tk.StringVar(value=f"{config_manager.get_preflight_min_write_mb_s():g}")
+        speed_combo = ttk.Combobox(speed_row, textvariable=self._min_speed_var, width=8,
+                                   values=["0", "2", "5", "10", "20", "50"], state="readonly")
+        speed_combo.pack(side=tk.LEFT, padx=(8, 0))
+        speed_combo.bind("<<ComboboxSelected>>",
+                         lambda e: config_manager.set_preflight_min_write_mb_s(float(self._min_speed_var.get())))
+
+        cache_row = ttk.Frame(settings_frame)
+        cache_row.pack(fill=tk.X, pady=(8, 0))
+        ttk.Label(cache_row, text="Acces au cache systeme pendant la copie :").pack(side=tk.LEFT)
+        self._cache_mode_var = tk.StringVar(value=config_manager.get_cache_mode())
+        cache_combo = ttk.Combobox(cache_row, textvariable=self._cache_mode_var, width=10,
+                                   values=list(CACHE_MODES), state="readonly")
+        cache_combo.pack(side=tk.LEFT, padx=(8, 0))
+        cache_combo.bind("<<ComboboxSelected>>", lambda e: config_manager.set_cache_mode(self._cache_mode_var.get()))
+
+        ratio_row = ttk.Frame(settings_frame)
+        ratio_row.pack(fill=tk.X, pady=(8, 0))
+        ttk.Label(ratio_row, text="Plafond du cache d'ecriture destination (max_ratio) :").pack(side=tk.LEFT)
+        ratio = config_manager.get_dest_bdi_max_ratio()
+        self._bdi_ratio_var = tk.StringVar(value=f"{ratio} %" if ratio else "Desactive")
+        ratio_combo = ttk.Combobox(ratio_row, textvariable=self._bdi_ratio_var, width=10,
+                                   values=["Desactive", "1 %", "5 %", "10 %", "20 %"], state="readonly")
+        ratio_combo.pack(side=tk.LEFT, padx=(8, 0))
+        ratio_combo.bind("<<ComboboxSelected>>", lambda e: config_manager.set_dest_bdi_max_ratio(
+            int(self._bdi_ratio_var.get().rstrip(" %")) if self._bdi_ratio_var.get() != "Desactive" else None))
+
+        # -- Ordonnancement des E/S ----------------------------------------
+        sched_frame = ttk.LabelFrame(body, text="Ordonnancement des E/S (plusieurs postes)", padding=(14, 10))
+        sched_frame.pack(fill=tk.X, pady=(0, 14))
+
+        load_row = ttk.Frame(sched_frame)
+        load_row.pack(fill=tk.X, pady=(0, 8))
+        ttk.Label(load_row, text="Charge maximale d'un bus USB :").pack(side=tk.LEFT)
+        self._bus_load_var = tk.StringVar(value=self._bus_load_label(config_manager.get_scheduler_max_bus_load()))
+        load_combo = ttk.Combobox(load_row, textvariable=self._bus_load_var, width=20,
+                                  values=[self._bus_load_label(v) for v in self._BUS_LOADS], state="readonly")
+        load_combo.pack(side=tk.LEFT, padx=(8, 0))
+        load_combo.bind("<<ComboboxSelected>>", lambda e: self._set_bus_load())
+
+        prio_row = ttk.Frame(sched_frame)
+        prio_row.pack(fill=tk.X, pady=(0, 8))
+        ttk.Label(prio_row, text="Priorite E/S des clonages (ionice) :").pack(side=tk.LEFT)
+        level = config_manager.get_clone_ionice_level()
+        self._ionice_var = tk.StringVar(value=self._IONICE_LABELS.get(level, str(level)))
+        prio_combo = ttk.Combobox(prio_row, textvariable=self._ionice_var, width=14,
+                                  values=list(self._IONICE_LABELS.values()), state="readonly")
+        prio_combo.pack(side=tk.LEFT, padx=(8, 0))
+        prio_combo.bind("<<ComboboxSelected>>", lambda e: self._set_ionice_level())
+
+        rate_row = ttk.Frame(sched_frame)
+        rate_row.pack(fill=tk.X, pady=(0, 8))
+        ttk.Label(rate_row, text="Plafond de debit par clonage :").pack(side=tk.LEFT)
+        rate = config_manager.get_job_max_rate_mb_s()
+        self._rate_var = tk.StringVar(value=f"{rate:g} Mo/s" if rate else "Aucun")
+        rate_combo = ttk.Combobox(rate_row, textvariable=self._rate_var, width=10,
+                                  values=["Aucun", "10 Mo/s", "20 Mo/s", "40 Mo/s", "100 Mo/s"],
+                                  state="readonly")
+        rate_combo.pack(side=tk.LEFT, padx=(8, 0))
+        rate_combo.bind("<<ComboboxSelected>>", lambda e: self._set_rate_limit())
+
+        self._stats_var = tk.StringVar()
+        ttk.Label(sched_frame, textvariable=self._stats_var, wraplength=600,
+                  foreground=_TEXT_DIM).pack(anchor="w")
+
+        # -- Production en serie -------------------------------------------
+        prod_frame = ttk.LabelFrame(body, text="Production en serie (clonage automatique)", padding=(14, 10))
+        prod_frame.pack(fill=tk.X, pady=(0, 14))
+        ttk.Label(prod_frame, wraplength=600, foreground=_TEXT_DIM, text=(
+            "Une fois armee, chaque cle inseree sur un port destination est EFFACEE, "
+            "clonee depuis la cle maitre du poste, verifiee puis ejectee, sans confirmation."
+        )).pack(anchor="w", pady=(0, 8))
+        target_row = ttk.Frame(prod_frame)
+        target_row.pack(fill=tk.X, pady=(0, 8))
+        ttk.Label(target_row, text="Objectif (cles) :").pack(side=tk.LEFT)
+        target = config_manager.get_production_target_count()
+        self._target_var = tk.StringVar(value=str(target) if target else "Illimite")
+        target_combo = ttk.Combobox(target_row, textvariable=self._target_var, width=10,
+                                    values=["Illimite", "10", "25", "50", "100", "200", "500"],
+                                    state="readonly")
+        target_combo.pack(side=tk.LEFT, padx=(8, 0))
+        target_combo.bind("<<ComboboxSelected>>", lambda e: config_manager.set_production_target_count(
+            int(self._target_var.get()) if self._target_var.get().isdigit() else 0))
+        self._production_btn = ttk.Button(target_row, style="AdminAction.TButton",
+                                          command=self._toggle_production)
+        self._production_btn.pack(side=tk.LEFT, padx=(12, 0))
+        self._production_var = tk.StringVar()
+        ttk.Label(prod_frame, textvariable=self._production_var, wraplength=600).pack(anchor="w")
+
+        self.bind("<Destroy>", self._on_destroy, add="+")
+        self._refresh_live_stats()
+
+        # -- Historique des clonages --------------------------------------
+        history_frame = ttk.LabelFrame(body, text="Historique des clonages", padding=(14, 10))
+        history_frame.pack(fill=tk.X, pady=(0, 14))
+        self._history_var = tk.StringVar()
+        ttk.Label(history_frame, textvariable=self._history_var, wraplength=600,
+                  justify=tk.LEFT).pack(anchor="w", pady=(0, 8))
+        ttk.Button(history_frame, text="PDF historique", style="AdminAction.TButton",
+                   command=self._export_history_pdf).pack(anchor="w")
+        self._refresh_history()
+
         # -- Journaux -------------------------------------------------------
         logs_frame = ttk.LabelFrame(body, text="Journaux", padding=(14, 10))
         logs_frame.pack(fill=tk.X, pady=(0, 14))
@@ -292,6 +661,18 @@ class AdminPanel(tk.Toplevel):
                    command=self._export_full_pdf).pack(side=tk.LEFT, padx=(0, 8))
         ttk.Button(logs_btns, text="Purger les logs", style="AdminDanger.TButton",
                    command=self._purge_logs).pack(side=tk.LEFT)
+        export_row = ttk.Frame(logs_frame)
+        export_row.pack(fill=tk.X, pady=(8, 0))
+        self._export_bar = ttk.Progressbar(export_row, mode="indeterminate", length=200)
+        self._export_bar.pack(side=tk.LEFT)
+        self._export_var = tk.StringVar()
+        ttk.Label(export_row, textvariable=self._export_var).pack(side=tk.LEFT, padx=(10, 0))
+        self._export_cancel_btn = ttk.Button(export_row, text="Annuler l'export",
+                                             command=self._cancel_export, state=tk.DISABLED)
+        self._export_cancel_btn.pack(side=tk.RIGHT)
+        export = current_pdf_export()
+        if export is not None and export.running:
+            self._watch_export(export)   # export lance avant l'ouverture du panneau
 
         # -- Systeme ---------------------------------------------------------
         sys_frame = ttk.LabelFrame(body, text="Systeme", padding=(14, 10))
@@ -336,6 +717,11 @@ class AdminPanel(tk.Toplevel):
         self._dest_status_var.set(
             f"Configure ({cfg.get('dest_label') or 'port'} : {dst})" if dst else "Non configure"
         )
+        stations = [st for st in config_manager.get_stations()
+                    if st.get("source_id_path") and st.get("dest_id_path")]
+        self._stations_status_var.set(
+            f"{len(stations)} poste(s) configure(s) ; les ports ci-dessus sont ceux du poste 1."
+        )
 
     def _detect_port(self, which: str) -> None:
         label = "SOURCE" if which == "source" else "DESTINATION"
@@ -356,28 +742,172 @@ class AdminPanel(tk.Toplevel):
         if self._on_ports_changed:
             self._on_ports_changed()
 
+    def _learn_ports(self) -> None:
+        dialog = BulkPortDialog(self)
+        if not dialog.saved:
+            return
+        self._refresh_port_labels()
+        if self._on_ports_changed:
+            self._on_ports_changed()
+
+    # -- Ordonnancement ------------------------------------------------------
+    @staticmethod
+    def _bus_load_label(value: float) -> str:
+        return f"{value * 100:.0f} %" if value > 0 else "Sans ordonnancement"
+
+    def _set_bus_load(self) -> None:
+        label = self._bus_load_var.get()
+        value = next((v for v in self._BUS_LOADS if self._bus_load_label(v) == label), 1.0)
+        config_manager.set_scheduler_max_bus_load(value)
+        if self._job_manager is not None:
+            self._job_manager.set_max_bus_load(value)
+
+    def _set_ionice_level(self) -> None:
+        label = self._ionice_var.get()
+        level = next((k for k, v in self._IONICE_LABELS.items() if v == label), None)
+        # Pris en compte au prochain clonage (priorite fixee au lancement de dd)
+        config_manager.set_clone_ionice_level(level)
+
+    def _set_rate_limit(self) -> None:
+        label = self._rate_var.get()
+        value = float(label.split()[0]) if label != "Aucun" else 0.0
+        config_manager.set_job_max_rate_mb_s(value)
+        if self._job_manager is not None:
+            self._job_manager.set_rate_limit(value)
+
+    def _refresh_live_stats(self) -> None:
+        self._refresh_production_status()
+        if self._job_manager is None:
+            self._stats_var.set("Statistiques des clonages visibles depuis la fenetre principale.")
+            return
+        self._stats_var.set(self._job_manager.stats().summary())
+        self._stats_after_id = self.after(1000, self._refresh_live_stats)
+
+    # -- Production en serie ------------------------------------------------
+    def _refresh_production_status(self) -> None:
+        production = self._production
+        if production is None:
+            self._production_btn.configure(text="Armer la production", state=tk.DISABLED)
+            self._production_var.set("Disponible depuis la fenetre principale uniquement.")
+            return
+        if production.armed:
+            self._production_btn.configure(text="Desarmer la production", state=tk.NORMAL)
+            self._production_var.set(f"Production armee : {production.stats.summary()}")
+        else:
+            self._production_btn.configure(text="Armer la production", state=tk.NORMAL)
+            stats = production.stats
+            self._production_var.set(
+                f"Derniere production : {stats.summary()}" if stats.produced or stats.failed else "Non armee."
+            )
+
+    def _toggle_production(self) -> None:
+        production = self._production
+        if production is None:
+            return
+        if production.armed:
+            production.disarm("par l'administrateur")
+        else:
+            if not messagebox.askyesno(
+                "Armer la production",
+                "Toute cle inseree sur un port destination sera EFFACEE et clonee "
+                "sans confirmation.\n\nLes cles maitres doivent etre branchees sur "
+                "les ports source. Armer la production ?",
+                icon="warning", parent=self,
+            ):
+                return
+            try:
+                production.arm(load_stations(), config_manager.get_production_target_count())
+            except ProductionError as e:
+                messagebox.showerror("Production", str(e), parent=self)
+                return
+            log_info("Production armee depuis l'administration")
+        self._refresh_production_status()
+
+    def _on_destroy(self, event) -> None:
+        if event.widget is self and self._stats_after_id is not None:
+            self.after_cancel(self._stats_after_id)
+            self._stats_after_id = None
+        if event.widget is self and self._export_after_id is not None:
+            # L'export continue sans le panneau ; il sera repris a la reouverture
+            self.after_cancel(self._export_after_id)
+            self._export_after_id = None
+
     # -- Journaux -------------------------------------------------------------
     def _export_session_pdf(self) -> None:
-        try:
-            path = generate_session_pdf()
-            messagebox.showinfo("PDF genere", f"Rapport genere :\n{path}", parent=self)
-        except ValueError as e:
-            messagebox.showwarning("Aucune donnee", str(e), parent=self)
-        except OSError as e:
-            log_error(f"Erreur generation PDF session : {e}")
-            messagebox.showerror("Erreur", f"Impossible de generer le PDF : {e}", parent=self)
+        self._start_export("session")
 
     def _export_full_pdf(self) -> None:
+        self._start_export("full")
+
+    def _export_history_pdf(self) -> None:
+        self._start_export("history")
+
+    def _refresh_history(self) -> None:
+        """Synthese du mois en cours (requetes indexees, en lecture seule)."""
+        since = history.month_start()
         try:
-            path = generate_log_file_pdf()
-            messagebox.showinfo("PDF genere", f"Rapport genere :\n{path}", parent=self)
-        except ValueError as e:
-            messagebox.showwarning("Aucune donnee", str(e), parent=self)
-        except OSError as e:
-            log_error(f"Erreur generation PDF logs : {e}")
-            messagebox.showerror("Erreur", f"Impossible de generer le PDF : {e}", parent=self)
+            month = history.summarize(since=since)
+            models = history.stats_by_dest_model(since=since, limit=3)
+        except sqlite3.Error as e:
+            self._history_var.set(f"Historique illisible : {e}")
+            return
+        if not month.total:
+            self._history_var.set("Aucun clonage enregistre ce mois-ci.")
+            return
+        lines = [f"Ce mois-ci : {month.summary()}"]
+        for group in models:
+            speed = f", {group.avg_copy_mb_s:.1f} Mo/s" if group.avg_copy_mb_s else ""
+            lines.append(f"  {group.label or '?'} : {group.count} clonage(s){speed}")
+        self._history_var.set("\n".join(lines))
+
+    def _start_export(self, kind: str) -> None:
+        export, started = start_pdf_export(kind)
+        if not started:
+            messagebox.showinfo("Export en cours",
+                                f"Un export PDF ({export.label}) est deja en cours.", parent=self)
+        self._watch_export(export)
+
+    def _watch_export(self, export: PdfExport) -> None:
+        if self._export is export:
+            return
+        self._export = export
+        self._export_bar.start(15)
+        self._export_cancel_btn.configure(state=tk.NORMAL)
+        self._poll_export()
+
+    def _poll_export(self) -> None:
+        export = self._export
+        if export.running:
+            self._export_var.set(f"Export {export.label} : {export.lines} lignes, {export.pages} pages")
+            self._export_after_id = self.after(250, self._poll_export)
+            return
+        self._export_after_id = None
+        self._export = None
+        self._export_bar.stop()
+        self._export_cancel_btn.configure(state=tk.DISABLED)
+        if export.cancelled:
+            self._export_var.set("Export annule.")
+        elif isinstance(export.error, ValueError):
+            self._export_var.set("")
+            messagebox.showwarning("Aucune donnee", str(export.error), parent=self)
+        elif export.error is not None:
+            self._export_var.set("Echec de l'export.")
+            messagebox.showerror("Erreur", f"Impossible de generer le PDF : {export.error}", parent=self)
+        else:
+            self._export_var.set(f"Rapport genere : {export.lines} lignes, {export.pages} pages")
+            messagebox.showinfo("PDF genere", f"Rapport genere :\n{export.path}", parent=self)
+
+    def _cancel_export(self) -> None:
+        if self._export is not None:
+            self._export.cancel()
+            self._export_var.set("Annulation en cours...")
 
     def _purge_logs(self) -> None:
+        export = current_pdf_export()
+        if export is not None and export.running:
+            messagebox.showwarning("Export en cours",
+                                   "Attendre la fin de l'export PDF (ou l'annuler) avant de purger.", parent=self)
+            return
         if messagebox.askyesno("Purger les logs", "Supprimer definitivement tous les journaux ?", parent=self):
             purge_logs()
             messagebox.showinfo("Logs purges", "Les journaux ont ete supprimes.", parent=self)
@@ -394,9 +924,15 @@ class AdminPanel(tk.Toplevel):
             subprocess.run(["systemctl", "poweroff"], check=False)
 
 
-def open_admin_panel(parent: tk.Widget, on_ports_changed: Optional[Callable[[], None]] = None) -> None:
+def open_admin_panel(
+    parent: tk.Widget,
+    on_ports_changed: Optional[Callable[[], None]] = None,
+    job_manager: Optional[JobManager] = None,
+    production: Optional[ProductionRun] = None,
+) -> None:
     """
     Point d'entree : VERSION LIVE — ouvre directement le panneau
     d'administration, sans authentification.
     """
-    AdminPanel(parent, on_ports_changed=on_ports_changed)
\ No newline at end of file
+    AdminPanel(parent, on_ports_changed=on_ports_changed, job_manager=job_manager,
+               production=production)
\ No newline at end of file
@@ -15,7 +15,7 @@ import hashlib
 import json
 import os
 import secrets
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 CONFIG_DIR = "/etc/disk_cloner"
 CONFIG_FILE = os.path.join(CONFIG_DIR, "config.json")
@@ -25,10 +25,23 @@ _DEFAULT_CONFIG: Dict[str, Any] = {
     "source_label": None,       # dernier modele/serie vus sur ce port (informatif)
     "dest_id_path": None,
     "dest_label": None,
+    "known_ports": [],          # ports du hub appris en une passe : [{"id_path", "label"}], dans l'ordre
+    "stations": [],             # postes : [{"name", "source_id_path", "source_label", "dest_id_path", "dest_label"}]
     "admin_password_hash": None,
     "admin_password_salt": None,
     "block_size": "4M",
     "verify_after_clone": False,
+    "dest_bdi_max_ratio": None, # plafond du cache d'ecriture (%) du disque destination
+    "preflight_enabled": False,
+    "preflight_min_write_mb_s": 0,
+    "cache_mode": "buffered",   # "buffered", "nocache" ou "direct" (voir clone.CACHE_MODES)
+    "scheduler_max_bus_load": 1.0,  # charge max. d'un bus USB (1.0 = sa capacite), 0 = sans ordonnancement
+    "clone_ionice_level": None,     # priorite E/S best-effort (0 a 7) des clonages, None = defaut
+    "job_max_rate_mb_s": 0,         # plafond de debit par job (Mo/s), 0 = aucun
+    "production_target_count": 0,   # mode production : nombre de cles a produire (0 = illimite)
+    "control_socket_path": "/run/disk_cloner/control.sock",  # API de controle (socket Unix), "" = desactivee
+    "metrics_textfile_path": "/var/lib/prometheus/node-exporter/disk_cloner.prom",  # textfile Prometheus (node_exporter), "" = pas d'export
+    "history_db_path": "/var/lib/disk_cloner/history.db",  # historique des clonages (sqlite), "" = desactive
 }
 
 
@@ -75,7 +88,7 @@ def get_source_id_path() -> Optional[str]:
 
 
 def set_source_id_path(id_path: str, label: str = "") -> None:
-    _update(source_id_path=id_path, source_label=label)
+    _set_first_station_port("source", id_path, label)
 
 
 def get_dest_id_path() -> Optional[str]:
@@ -83,12 +96,90 @@ def get_dest_id_path() -> Optional[str]:
 
 
 def set_dest_id_path(id_path: str, label: str = "") -> None:
-    _update(dest_id_path=id_path, dest_label=label)
+    _set_first_station_port("dest", id_path, label)
 
 
-def ports_configured() -> bool:
+def get_known_ports() -> List[Dict[str, str]]:
+    return list(load_config().get("known_ports") or [])
+
+
+# -- Postes de clonage (paires de ports) -------------------------------------
+def _station_name(index: int) -> str:
+    return f"Poste {index + 1}"
+
+
+def _stations_fields(stations: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Champs de configuration d'une liste de postes. Le premier poste est
+    aussi recopie dans source_id_path / dest_id_path, que lisent les
+    versions precedentes et l'assistant de detection port par port.
+    """
+    stations = [dict(s) for s in stations]
+    for index, station in enumerate(stations):
+        station.setdefault("name", _station_name(index))
+    first = stations[0] if stations else {}
+    return {
+        "stations": stations,
+        "source_id_path": first.get("source_id_path"),
+        "source_label": first.get("source_label"),
+        "dest_id_path": first.get("dest_id_path"),
+        "dest_label": first.get("dest_label"),
+    }
+
+
+def _set_first_station_port(role: str, id_path: str, label: str) -> None:
+    cfg = load_config()
+    fields: Dict[str, Any] = {f"{role}_id_path": id_path, f"{role}_label": label}
+    stations = [dict(s) for s in cfg.get("stations") or []]
+    if stations:
+        stations[0].update(fields)
+        fields["stations"] = stations
+    _update(**fields)
+
+
+def get_stations() -> List[Dict[str, Any]]:
+    """
+    Postes de clonage configures, dans l'ordre. Une configuration anterieure
+    ne connaissant que source_id_path / dest_id_path est presentee comme
+    un poste unique.
+    """
     cfg = load_config()
-    return bool(cfg.get("source_id_path")) and bool(cfg.get("dest_id_path"))
+    stations = [dict(s) for s in cfg.get("stations") or []]
+    if stations:
+        for index, station in enumerate(stations):
+            station.setdefault("name", _station_name(index))
+        return stations
+    if cfg.get("source_id_path") or cfg.get("dest_id_path"):
+        return [{
+            "name": _station_name(0),
+            "source_id_path": cfg.get("source_id_path"),
+            "source_label": cfg.get("source_label"),
+            "dest_id_path": cfg.get("dest_id_path"),
+            "dest_label": cfg.get("dest_label"),
+        }]
+    return []
+
+
+def set_stations(stations: List[Dict[str, Any]]) -> None:
+    _update(**_stations_fields(stations))
+
+
+def set_port_map(ports: List[Dict[str, str]], stations: List[Dict[str, Any]]) -> None:
+    """
+    Enregistre en une seule ecriture la liste ordonnee des ports appris
+    (assistant de detection en masse) et les postes source / destination
+    formes a partir de ces ports.
+    """
+    labels = {p["id_path"]: p.get("label", "") for p in ports}
+    stations = [dict(s) for s in stations]
+    for station in stations:
+        for role in ("source", "dest"):
+            station.setdefault(f"{role}_label", labels.get(station.get(f"{role}_id_path"), ""))
+    _update(known_ports=[dict(p) for p in ports], **_stations_fields(stations))
+
+
+def ports_configured() -> bool:
+    return any(s.get("source_id_path") and s.get("dest_id_path") for s in get_stations())
 
 
 # -- Parametres de clonage ----------------------------------------------------
@@ -108,6 +199,114 @@ def set_verify_after_clone(value: bool) -> None:
     _update(verify_after_clone=bool(value))
 
 
+def get_preflight_enabled() -> bool:
+    return bool(load_config().get("preflight_enabled", False))
+
+
+def set_preflight_enabled(value: bool) -> None:
+    _update(preflight_enabled=bool(value))
+
+
+def get_preflight_min_write_mb_s() -> float:
+    try:
+        return float(load_config().get("preflight_min_write_mb_s") or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def set_preflight_min_write_mb_s(value: float) -> None:
+    _update(preflight_min_write_mb_s=float(value))
+
+
+def get_cache_mode() -> str:
+    return load_config().get("cache_mode", "buffered")
+
+
+def set_cache_mode(value: str) -> None:
+    _update(cache_mode=value)
+
+
+def get_dest_bdi_max_ratio() -> Optional[int]:
+    value = load_config().get("dest_bdi_max_ratio")
+    try:
+        return int(value) if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+def set_dest_bdi_max_ratio(value: Optional[int]) -> None:
+    _update(dest_bdi_max_ratio=int(value) if value else None)
+
+
+def get_scheduler_max_bus_load() -> float:
+    try:
+        return max(float(load_config().get("scheduler_max_bus_load", 1.0)), 0.0)
+    except (TypeError, ValueError):
+        return 1.0
+
+
+def set_scheduler_max_bus_load(value: float) -> None:
+    _update(scheduler_max_bus_load=max(float(value), 0.0))
+
+
+def get_clone_ionice_level() -> Optional[int]:
+    value = load_config().get("clone_ionice_level")
+    try:
+        return min(max(int(value), 0), 7) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def set_clone_ionice_level(value: Optional[int]) -> None:
+    _update(clone_ionice_level=min(max(int(value), 0), 7) if value is not None else None)
+
+
+def get_job_max_rate_mb_s() -> float:
+    try:
+        return float(load_config().get("job_max_rate_mb_s") or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def set_job_max_rate_mb_s(value: float) -> None:
+    _update(job_max_rate_mb_s=max(float(value), 0.0))
+
+
+def get_production_target_count() -> int:
+    try:
+        return max(int(load_config().get("production_target_count") or 0), 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def set_production_target_count(value: int) -> None:
+    _update(production_target_count=max(int(value), 0))
+
+
+def get_control_socket_path() -> str:
+    return str(load_config().get("control_socket_path") or "")
+
+
+def set_control_socket_path(value: str) -> None:
+    _update(control_socket_path=value or "")
+
+
+def get_metrics_textfile_path() -> str:
+    return str(load_config().get("metrics_textfile_path") or "")
+
+
+def set_metrics_textfile_path(value: str) -> None:
+    _update(metrics_textfile_path=value or "")
+
+
+def get_history_db_path() -> str:
+    return str(load_config().get("history_db_path") or "")
+
+
+def set_history_db_path(value: str) -> None:
+    _update(history_db_path=value or "")
+
+
 # -- Mot de passe administrateur --------------------------------------------
 def _hash_password(password: str, salt: str) -> str:
     return hashlib.sha256((salt + password).encode("utf-8")).hexdigest()
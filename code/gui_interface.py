@@ -1,35 +1,55 @@
 """
 gui_interface.py – Interface graphique principale du cloneur de disque.
 
-Affiche les disques branchés sur les ports "source" et "destination"
-(configurés depuis l'interface d'administration), permet de lancer le
-clonage bit-à-bit avec suivi en temps réel (pourcentage, vitesse, ETA),
-et donne accès au panneau d'administration.
+Affiche, pour chaque poste (paire de ports "source" / "destination"
+configurée depuis l'interface d'administration), les disques branchés et
+permet de lancer le clonage bit-à-bit avec suivi en temps réel
+(pourcentage, vitesse, ETA). Plusieurs postes peuvent cloner en même
+temps : chacun a sa carte dans une grille compacte, avec sa progression,
+son annulation, et ses lignes préfixées dans le journal commun.
+
+En mode production (armé depuis l'administration), les clonages démarrent
+seuls à l'insertion d'une clé en destination, sans aucune confirmation ;
+un bandeau affiche alors l'avancement de la série.
 """
 from __future__ import annotations
 
 import os
 import sys
-import threading
 import time
 import tkinter as tk
 from tkinter import messagebox, simpledialog, ttk
-from typing import Optional
-
-import config_manager
-from clone import CloneError, CloneJob, CloneProgress, SizeMismatchError, verify_clone
+from typing import Dict, List, Optional, Tuple
+
+from clone import CloneProgress
+from control_server import start_control_server
+from device_monitor import get_device_monitor
+from iostats import BOTTLENECK_LABELS, diagnose_bottleneck
+from job_manager import (
+    STATE_CANCELLED,
+    STATE_ERROR,
+    STATE_QUEUED,
+    STATE_RUNNING,
+    STATE_SUCCESS,
+    JobManager,
+    JobManagerError,
+    Station,
+    StationJob,
+    load_stations,
+)
 from log_handler import (
     log_error,
-    log_info,
-    log_clone_operation,
-    log_clone_completed,
-    log_clone_failed,
-    log_clone_process_stopped,
-    log_verification_result,
     log_application_exit,
     session_start,
 )
-from utils import DiskInfo, find_disk_by_id_path, human_size
+from metrics import start_textfile_exporter
+from production import ProductionRun
+from utils import (
+    DiskInfo,
+    estimate_clone_seconds,
+    find_disk_by_id_path,
+    usb_link_warnings,
+)
 
 try:
     from admin_interface import open_admin_panel
@@ -74,15 +94,24 @@ class DiskCloneGUI:
             root.destroy()
             sys.exit(1)
 
-        self.source_disk: Optional[DiskInfo] = None
-        self.dest_disk: Optional[DiskInfo] = None
-        self._clone_job: Optional[CloneJob] = None
-        self._cloning = False
-        self._start_time = 0.0
+        self._stations: List[Station] = []
+        self._station_disks: Dict[str, Tuple[Optional[DiskInfo], Optional[DiskInfo]]] = {}
+        self._station_widgets: Dict[str, dict] = {}
+        self._jobs = JobManager(on_update=self._on_job_update, on_log=self._on_job_log)
+        self._production = ProductionRun(self._jobs, on_change=self._on_production_changed,
+                                         on_log=self._log)
+        self._control = start_control_server(self._jobs, self._production)
+        self._metrics_exporter = start_textfile_exporter()
 
         session_start()
         self.root.protocol("WM_DELETE_WINDOW", self._on_quit)
 
+        # Détection des branchements par uevents udev ; à défaut (netlink
+        # indisponible), on garde le sondage périodique de _auto_refresh.
+        self._monitor = get_device_monitor()
+        if self._monitor:
+            self._monitor.add_listener(self._on_device_event)
+
         self._setup_theme()
         self._build_ui()
         self._refresh_disks()
@@ -118,9 +147,12 @@ class DiskCloneGUI:
                         background=self._ACCENT2, bordercolor=self._SURFACE2,
                         lightcolor=self._ACCENT2, darkcolor=self._ACCENT2)
 
-    def _card(self, parent, **pack_kw) -> tk.Frame:
+    def _card(self, parent, grid: Optional[dict] = None, **pack_kw) -> tk.Frame:
         outer = tk.Frame(parent, bg=self._BORDER_SOFT, bd=0, highlightthickness=0)
-        outer.pack(**pack_kw)
+        if grid is not None:
+            outer.grid(sticky='nsew', **grid)
+        else:
+            outer.pack(**pack_kw)
         inner = tk.Frame(outer, bg=self._SURFACE, padx=1, pady=1)
         inner.pack(fill=tk.BOTH, expand=True)
         content = tk.Frame(inner, bg=self._SURFACE, padx=22, pady=18)
@@ -166,60 +198,20 @@ class DiskCloneGUI:
         self._action_button(right_head, 'Administration', self._open_admin,
                             bg='#1e3a5f', hover_bg='#2a5080', accent=True).pack(side=tk.RIGHT)
 
-        # Corps : deux cartes source/destination côte à côte, qui occupent
-        # désormais une bonne partie de l'espace vertical disponible plutôt
-        # que de se limiter à leur contenu minimal.
-        disks_row = tk.Frame(shell, bg=self._BG)
-        disks_row.pack(fill=tk.BOTH, expand=True, pady=(0, 14))
-
-        self.source_card = self._card(disks_row, side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(0, 7))
-        self.dest_card = self._card(disks_row, side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(7, 0))
+        # Corps : une carte par poste, en grille ; avec un seul poste, la
+        # carte occupe toute la largeur et une bonne partie de la hauteur.
+        self._stations_frame = tk.Frame(shell, bg=self._BG)
+        self._stations_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 10))
 
-        self._source_widgets = self._build_disk_panel(self.source_card, 'SOURCE')
-        self._dest_widgets = self._build_disk_panel(self.dest_card, 'DESTINATION')
-
-        # Avertissement destructif
+        # Avertissement destructif / configuration
         self.warning_var = tk.StringVar(value='⚠ Le clonage écrase intégralement le disque de destination.')
         tk.Label(shell, textvariable=self.warning_var, bg=self._BG, fg=self._DANGER,
                  font=('Segoe UI', 9, 'bold')).pack(anchor='w', pady=(0, 10))
 
-        # Zone de progression
-        progress_card = self._card(shell, fill=tk.X, pady=(0, 14))
-        top_row = tk.Frame(progress_card, bg=self._SURFACE)
-        top_row.pack(fill=tk.X)
-        self._phase_var = tk.StringVar(value='En attente')
-        self._percent_var = tk.StringVar(value='0 %')
-        tk.Label(top_row, textvariable=self._phase_var, bg=self._SURFACE, fg=self._TEXT,
-                 font=('Segoe UI', 10, 'bold')).pack(side=tk.LEFT)
-        tk.Label(top_row, textvariable=self._percent_var, bg=self._SURFACE, fg=self._ACCENT2,
-                 font=('Segoe UI', 12, 'bold')).pack(side=tk.RIGHT)
-
-        self._progress = ttk.Progressbar(progress_card, orient='horizontal',
-                                         mode='determinate', maximum=100)
-        self._progress.pack(fill=tk.X, pady=(8, 6))
-
-        detail_row = tk.Frame(progress_card, bg=self._SURFACE)
-        detail_row.pack(fill=tk.X)
-        self._speed_var = tk.StringVar(value='')
-        self._eta_var = tk.StringVar(value='')
-        tk.Label(detail_row, textvariable=self._speed_var, bg=self._SURFACE,
-                 fg=self._TEXT_DIM, font=('Segoe UI', 9)).pack(side=tk.LEFT)
-        tk.Label(detail_row, textvariable=self._eta_var, bg=self._SURFACE,
-                 fg=self._TEXT_DIM, font=('Segoe UI', 9)).pack(side=tk.RIGHT)
-
-        # Boutons d'action
-        btn_row = tk.Frame(shell, bg=self._BG)
-        btn_row.pack(fill=tk.X, pady=(0, 14))
-        self.start_btn = self._action_button(
-            btn_row, 'Démarrer le clonage', self._on_start_clicked,
-            bg=self._ACCENT, hover_bg=self._ACCENT2, accent=True,
-        )
-        self.start_btn.pack(side=tk.LEFT)
-        self.cancel_btn = self._action_button(
-            btn_row, 'Annuler', self._on_cancel_clicked,
-            bg=self._DANGER, hover_bg='#ff6b66', accent=True, state=tk.DISABLED,
-        )
-        self.cancel_btn.pack(side=tk.LEFT, padx=(10, 0))
+        # Bandeau du mode production (vide hors production)
+        self._production_var = tk.StringVar()
+        tk.Label(shell, textvariable=self._production_var, bg=self._BG, fg=self._ACCENT2,
+                 font=('Segoe UI', 11, 'bold')).pack(anchor='w', pady=(0, 10))
 
         # Journal : partage désormais l'espace vertical restant avec les
         # cartes disques ci-dessus, au lieu d'être cantonné à quelques
@@ -240,96 +232,211 @@ class DiskCloneGUI:
         self.log_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         log_sb.pack(side=tk.RIGHT, fill=tk.Y)
 
-    def _build_disk_panel(self, parent, title: str) -> dict:
-        # Le contenu est regroupé dans un bloc centré verticalement dans la
-        # carte (qui, elle, occupe toute la hauteur disponible) : la carte
-        # a de la place, mais le texte reste groupé et lisible plutôt que
-        # collé en haut avec un grand vide en dessous.
+    @staticmethod
+    def _grid_columns(count: int) -> int:
+        if count <= 1:
+            return 1
+        if count <= 4:
+            return 2
+        if count <= 9:
+            return 3
+        return 4
+
+    def _build_station_grid(self) -> None:
+        for child in self._stations_frame.winfo_children():
+            child.destroy()
+        self._station_widgets = {}
+        columns = self._grid_columns(len(self._stations))
+        compact = len(self._stations) > 1
+        for index, station in enumerate(self._stations):
+            row, column = divmod(index, columns)
+            card = self._card(self._stations_frame, grid={
+                'row': row, 'column': column, 'padx': 5, 'pady': 5,
+            })
+            self._station_widgets[station.name] = self._build_station_panel(card, station, compact)
+        for column in range(columns):
+            self._stations_frame.grid_columnconfigure(column, weight=1, uniform='station')
+        for row in range((len(self._stations) + columns - 1) // columns):
+            self._stations_frame.grid_rowconfigure(row, weight=1)
+
+    def _build_station_panel(self, parent, station: Station, compact: bool) -> dict:
+        title_font = ('Segoe UI', 11 if compact else 13, 'bold')
+        disk_font = ('Segoe UI', 9 if compact else 12)
+        wrap = 360 if compact else 1000
+
         content = tk.Frame(parent, bg=self._SURFACE)
         content.pack(expand=True, fill=tk.X, anchor='center')
 
-        tk.Label(content, text=title, bg=self._SURFACE, fg=self._ACCENT2,
-                 font=('Segoe UI', 13, 'bold')).pack(anchor='w')
-        status_dot = tk.Label(content, text='●', bg=self._SURFACE, fg=self._DANGER,
-                              font=('Segoe UI', 20))
-        model_var = tk.StringVar(value='Aucun disque détecté')
-        info_var = tk.StringVar(value='')
-        port_var = tk.StringVar(value='')
-
-        row = tk.Frame(content, bg=self._SURFACE)
-        row.pack(fill=tk.X, pady=(14, 0))
-        status_dot.pack(in_=row, side=tk.LEFT)
-        tk.Label(row, textvariable=model_var, bg=self._SURFACE, fg=self._TEXT,
-                 font=('Segoe UI', 16, 'bold')).pack(side=tk.LEFT, padx=(10, 0))
-
-        tk.Label(content, textvariable=info_var, bg=self._SURFACE, fg=self._TEXT_DIM,
-                 font=('Segoe UI', 11), wraplength=420, justify='left').pack(anchor='w', pady=(12, 0))
-        tk.Label(content, textvariable=port_var, bg=self._SURFACE, fg=self._TEXT_FAINT,
-                 font=('Segoe UI', 10), wraplength=420, justify='left').pack(anchor='w', pady=(6, 0))
-
-        return {
-            'status_dot': status_dot,
-            'model_var': model_var,
-            'info_var': info_var,
-            'port_var': port_var,
-        }
+        head = tk.Frame(content, bg=self._SURFACE)
+        head.pack(fill=tk.X)
+        tk.Label(head, text=station.name, bg=self._SURFACE, fg=self._ACCENT2,
+                 font=title_font).pack(side=tk.LEFT)
+        phase_var = tk.StringVar(value='En attente')
+        phase_label = tk.Label(head, textvariable=phase_var, bg=self._SURFACE, fg=self._TEXT,
+                               font=('Segoe UI', 10, 'bold'))
+        phase_label.pack(side=tk.RIGHT)
+
+        widgets = {'phase_var': phase_var, 'phase_label': phase_label}
+        for role, title in (('source', 'SOURCE'), ('dest', 'DESTINATION')):
+            row = tk.Frame(content, bg=self._SURFACE)
+            row.pack(fill=tk.X, pady=(8 if compact else 14, 0))
+            dot = tk.Label(row, text='●', bg=self._SURFACE, fg=self._DANGER,
+                           font=('Segoe UI', 12 if compact else 18))
+            dot.pack(side=tk.LEFT)
+            text_var = tk.StringVar(value='')
+            tk.Label(row, text=f"{title} :", bg=self._SURFACE, fg=self._TEXT_DIM,
+                     font=('Segoe UI', 9, 'bold')).pack(side=tk.LEFT, padx=(8, 6))
+            tk.Label(row, textvariable=text_var, bg=self._SURFACE, fg=self._TEXT,
+                     font=disk_font, wraplength=wrap, justify='left').pack(side=tk.LEFT)
+            widgets[f'{role}_dot'] = dot
+            widgets[f'{role}_var'] = text_var
+
+        # Câblage USB : lien négocié en USB 2, bande passante partagée,
+        # durée estimée du clonage en conséquence.
+        link_var = tk.StringVar(value='')
+        tk.Label(content, textvariable=link_var, bg=self._SURFACE, fg=self._WARNING,
+                 font=('Segoe UI', 9), justify='left', wraplength=wrap).pack(anchor='w', pady=(8, 0))
+
+        progress = ttk.Progressbar(content, orient='horizontal', mode='determinate', maximum=100)
+        progress.pack(fill=tk.X, pady=(8, 4))
+
+        detail_row = tk.Frame(content, bg=self._SURFACE)
+        detail_row.pack(fill=tk.X)
+        percent_var = tk.StringVar(value='0 %')
+        speed_var = tk.StringVar(value='')
+        eta_var = tk.StringVar(value='')
+        tk.Label(detail_row, textvariable=percent_var, bg=self._SURFACE, fg=self._ACCENT2,
+                 font=('Segoe UI', 10, 'bold')).pack(side=tk.LEFT)
+        tk.Label(detail_row, textvariable=speed_var, bg=self._SURFACE,
+                 fg=self._TEXT_DIM, font=('Segoe UI', 9)).pack(side=tk.LEFT, padx=(12, 0))
+        tk.Label(detail_row, textvariable=eta_var, bg=self._SURFACE,
+                 fg=self._TEXT_DIM, font=('Segoe UI', 9)).pack(side=tk.RIGHT)
+        io_var = tk.StringVar(value='')
+        tk.Label(content, textvariable=io_var, bg=self._SURFACE, fg=self._TEXT_FAINT,
+                 font=('Segoe UI', 8 if compact else 9), wraplength=wrap,
+                 justify='left').pack(anchor='w', pady=(2, 0))
+
+        btn_row = tk.Frame(content, bg=self._SURFACE)
+        btn_row.pack(fill=tk.X, pady=(10, 0))
+        start_btn = self._action_button(
+            btn_row, 'Démarrer le clonage', lambda: self._on_start_clicked(station),
+            bg=self._ACCENT, hover_bg=self._ACCENT2, accent=True, state=tk.DISABLED,
+        )
+        start_btn.pack(side=tk.LEFT)
+        cancel_btn = self._action_button(
+            btn_row, 'Annuler', lambda: self._on_cancel_clicked(station),
+            bg=self._DANGER, hover_bg='#ff6b66', accent=True, state=tk.DISABLED,
+        )
+        cancel_btn.pack(side=tk.LEFT, padx=(10, 0))
+        pause_btn = self._action_button(
+            btn_row, 'Pause', lambda: self._on_pause_clicked(station), state=tk.DISABLED,
+        )
+        pause_btn.pack(side=tk.LEFT, padx=(10, 0))
+
+        widgets.update({
+            'link_var': link_var,
+            'progress': progress,
+            'percent_var': percent_var,
+            'speed_var': speed_var,
+            'eta_var': eta_var,
+            'io_var': io_var,
+            'start_btn': start_btn,
+            'cancel_btn': cancel_btn,
+            'pause_btn': pause_btn,
+            'indeterminate': False,
+        })
+        return widgets
 
     # ── Rafraîchissement des disques ─────────────────────────────────────
+    def _monitor_active(self) -> bool:
+        return self._monitor is not None and self._monitor.running
+
+    def _on_device_event(self, action: str, disk: DiskInfo) -> None:
+        # Appelé depuis le thread du moniteur : on repasse par la boucle Tk
+        self.root.after(0, self._on_devices_changed)
+
+    def _on_devices_changed(self) -> None:
+        self._refresh_disks()
+
     def _auto_refresh(self) -> None:
-        if not self._cloning:
+        if not self._monitor_active():
             self._refresh_disks()
+        self._render_production()
         self.root.after(self._REFRESH_INTERVAL_MS, self._auto_refresh)
 
     def _refresh_disks(self) -> None:
-        cfg = config_manager.load_config()
-        src_id_path = cfg.get('source_id_path')
-        dst_id_path = cfg.get('dest_id_path')
+        stations = [s for s in load_stations() if s.source_id_path or s.dest_id_path]
+        if stations != self._stations:
+            # Configuration modifiée : on ne reconstruit la grille que si aucun
+            # poste ne clone (sinon on garde l'affichage des jobs en cours).
+            if self._jobs.any_running() and self._stations:
+                stations = self._stations
+            else:
+                self._stations = stations
+                self._build_station_grid()
 
-        if not src_id_path or not dst_id_path:
+        if not any(s.configured for s in self._stations):
             self.warning_var.set(
                 "⚠ Les ports source et destination ne sont pas configurés. "
                 "Rendez-vous dans le panneau Administration."
             )
-
-        self.source_disk = find_disk_by_id_path(src_id_path) if src_id_path else None
-        self.dest_disk = find_disk_by_id_path(dst_id_path) if dst_id_path else None
-
-        self._update_disk_panel(self._source_widgets, self.source_disk, src_id_path)
-        self._update_disk_panel(self._dest_widgets, self.dest_disk, dst_id_path)
-        self._update_start_button_state()
-
-    def _update_disk_panel(self, widgets: dict, disk: Optional[DiskInfo], id_path: Optional[str]) -> None:
-        if disk is None:
-            widgets['status_dot'].configure(fg=self._DANGER)
-            widgets['model_var'].set('Aucun disque détecté' if id_path else 'Port non configuré')
-            widgets['info_var'].set('')
-            widgets['port_var'].set(f"Port : {id_path}" if id_path else 'Configurez ce port dans Administration')
         else:
-            widgets['status_dot'].configure(fg=self._SUCCESS)
-            widgets['model_var'].set(disk.model)
-            widgets['info_var'].set(f"{disk.size_human}  ·  Série : {disk.serial}  ·  {disk.path}")
-            widgets['port_var'].set(f"Port : {disk.id_path}")
-
-    def _update_start_button_state(self) -> None:
-        if self._cloning:
+            self.warning_var.set('⚠ Le clonage écrase intégralement le disque de destination.')
+
+        find = self._monitor.find_by_id_path if self._monitor_active() else find_disk_by_id_path
+        for station in self._stations:
+            if self._jobs.is_running(station.name):
+                continue
+            source = find(station.source_id_path) if station.source_id_path else None
+            dest = find(station.dest_id_path) if station.dest_id_path else None
+            self._station_disks[station.name] = (source, dest)
+            self._update_station_panel(station, source, dest)
+
+    def _update_station_panel(self, station: Station, source: Optional[DiskInfo],
+                              dest: Optional[DiskInfo]) -> None:
+        widgets = self._station_widgets.get(station.name)
+        if widgets is None:
             return
+        for role, disk, id_path in (('source', source, station.source_id_path),
+                                    ('dest', dest, station.dest_id_path)):
+            if disk is None:
+                widgets[f'{role}_dot'].configure(fg=self._DANGER)
+                widgets[f'{role}_var'].set(
+                    'Aucun disque détecté' if id_path else 'Port non configuré (voir Administration)'
+                )
+            else:
+                widgets[f'{role}_dot'].configure(fg=self._SUCCESS)
+                link = f"  ·  {disk.usb.label}" if disk.usb else ''
+                widgets[f'{role}_var'].set(
+                    f"{disk.model}  ·  {disk.size_human}  ·  Série : {disk.serial}  ·  {disk.path}{link}"
+                )
+
         ready = (
-            self.source_disk is not None
-            and self.dest_disk is not None
-            and self.dest_disk.size_bytes >= self.source_disk.size_bytes
+            source is not None
+            and dest is not None
+            and dest.size_bytes >= source.size_bytes
+            and not ({source.devname, dest.devname} & self._jobs.busy_devnames())
         )
-        self.start_btn.configure(state=tk.NORMAL if ready else tk.DISABLED)
+        widgets['start_btn'].configure(state=tk.NORMAL if ready else tk.DISABLED)
 
-        if self.source_disk and self.dest_disk and self.dest_disk.size_bytes < self.source_disk.size_bytes:
-            self.warning_var.set(
-                f"⚠ Le disque de destination ({self.dest_disk.size_human}) est plus petit "
-                f"que le disque source ({self.source_disk.size_human}). Clonage impossible."
-            )
-        elif self.source_disk and self.dest_disk:
-            self.warning_var.set(
-                '⚠ Le clonage écrase intégralement le disque de destination. '
-                f"({self.source_disk.path} -> {self.dest_disk.path})"
+        if source and dest and dest.size_bytes < source.size_bytes:
+            widgets['link_var'].set(
+                f"⚠ La destination ({dest.size_human}) est plus petite "
+                f"que la source ({source.size_human}). Clonage impossible."
             )
+        else:
+            widgets['link_var'].set(self._link_summary(source, dest))
+
+    @staticmethod
+    def _link_summary(source: Optional[DiskInfo], dest: Optional[DiskInfo]) -> str:
+        if source is None or dest is None:
+            return ''
+        lines = [f"⚠ {w}" for w in usb_link_warnings(source, dest)]
+        estimate = estimate_clone_seconds(source, dest)
+        if estimate is not None:
+            minutes = max(1, int(round(estimate / 60)))
+            lines.append(f"Durée estimée (limite des liens USB) : au moins {minutes} min")
+        return '\n'.join(lines)
 
     # ── Journal GUI (thread-safe) ─────────────────────────────────────────
     def _log(self, message: str) -> None:
@@ -339,16 +446,21 @@ class DiskCloneGUI:
             self.log_text.see(tk.END)
         self.root.after(0, _insert)
 
+    def _on_job_log(self, station_name: str, message: str) -> None:
+        # Avec un seul poste, le journal reste identique à l'ancien affichage
+        self._log(message if len(self._stations) <= 1 else f"[{station_name}] {message}")
+
     # ── Démarrage du clonage ─────────────────────────────────────────────
-    def _on_start_clicked(self) -> None:
-        if self.source_disk is None or self.dest_disk is None:
+    def _on_start_clicked(self, station: Station) -> None:
+        source, dest = self._station_disks.get(station.name, (None, None))
+        if source is None or dest is None:
             return
 
         confirm = messagebox.askyesno(
             'Confirmation',
-            "Cette opération va EFFACER DÉFINITIVEMENT toutes les données du "
-            f"disque de destination :\n\n{self.dest_disk.model} "
-            f"({self.dest_disk.size_human}, {self.dest_disk.path})\n\n"
+            f"{station.name} : cette opération va EFFACER DÉFINITIVEMENT toutes "
+            f"les données du disque de destination :\n\n{dest.model} "
+            f"({dest.size_human}, {dest.path})\n\n"
             "Voulez-vous continuer ?",
             icon='warning',
         )
@@ -361,138 +473,171 @@ class DiskCloneGUI:
             parent=self.root,
         )
         if typed != 'EFFACER':
-            self._log("Clonage annulé : confirmation non saisie correctement.")
+            self._on_job_log(station.name, "Clonage annulé : confirmation non saisie correctement.")
             return
 
-        self._start_clone()
+        try:
+            self._jobs.start(station, source, dest)
+        except JobManagerError as e:
+            messagebox.showerror('Clonage impossible', str(e))
+            return
+        # Les autres postes partageant un disque ne doivent plus proposer le départ
+        self._refresh_disks()
 
-    def _start_clone(self) -> None:
-        self._cloning = True
-        self._clone_job = CloneJob()
-        self.start_btn.configure(state=tk.DISABLED)
-        self.cancel_btn.configure(state=tk.NORMAL)
-        self._phase_var.set('Clonage en cours')
-        self._progress.configure(mode='determinate', value=0)
-        self._percent_var.set('0 %')
-        self._start_time = time.time()
+    # ── Suivi des jobs ─────────────────────────────────────────────────────
+    def _on_job_update(self, station_name: str, job: StationJob) -> None:
+        # Appelé depuis le thread de travail du poste
+        self.root.after(0, lambda: self._render_job(station_name, job))
 
-        source_disk = self.source_disk
-        dest_disk = self.dest_disk
+    def _render_job(self, station_name: str, job: StationJob) -> None:
+        widgets = self._station_widgets.get(station_name)
+        if widgets is None:
+            return
+        if job.state == STATE_RUNNING:
+            widgets['start_btn'].configure(state=tk.DISABLED)
+            widgets['cancel_btn'].configure(state=tk.NORMAL)
+            widgets['phase_label'].configure(fg=self._TEXT)
+            widgets['pause_btn'].configure(state=tk.NORMAL,
+                                           text='Reprendre' if job.paused else 'Pause')
+            self._render_progress(widgets, job.progress)
+            if job.paused:
+                widgets['phase_var'].set('En pause')
+                widgets['phase_label'].configure(fg=self._WARNING)
+            return
+        if job.state == STATE_QUEUED:
+            widgets['start_btn'].configure(state=tk.DISABLED)
+            widgets['cancel_btn'].configure(state=tk.NORMAL)
+            widgets['phase_var'].set('En attente de bande passante USB')
+            widgets['phase_label'].configure(fg=self._WARNING)
+            widgets['progress'].configure(mode='determinate', value=0)
+            widgets['percent_var'].set('0 %')
+            return
 
-        log_clone_operation(source_disk.model, dest_disk.model, source_disk.size_bytes)
-        self._log(f"Démarrage du clonage : {source_disk.path} -> {dest_disk.path}")
+        widgets['cancel_btn'].configure(state=tk.DISABLED)
+        widgets['pause_btn'].configure(state=tk.DISABLED, text='Pause')
+        widgets['io_var'].set('')
+        widgets['eta_var'].set('')
+        if widgets['indeterminate']:
+            widgets['progress'].stop()
+            widgets['indeterminate'] = False
+        widgets['progress'].configure(mode='determinate')
+        # Pas de boîte modale pour un job du mode production : personne ne la fermerait
+        single = len(self._stations) <= 1 and not job.unattended
+        if job.state == STATE_SUCCESS:
+            widgets['phase_var'].set('Terminé')
+            widgets['phase_label'].configure(fg=self._SUCCESS)
+            widgets['percent_var'].set('100 %')
+            widgets['progress'].configure(value=100)
+            self._refresh_disks()
+            if single:
+                messagebox.showinfo('Terminé', 'Le clonage du disque est terminé avec succès.')
+        elif job.state == STATE_ERROR:
+            widgets['phase_var'].set('Erreur')
+            widgets['phase_label'].configure(fg=self._DANGER)
+            self._refresh_disks()
+            if single:
+                messagebox.showerror('Erreur de clonage', job.message)
+        elif job.state == STATE_CANCELLED:
+            widgets['phase_var'].set('Annulé')
+            widgets['phase_label'].configure(fg=self._WARNING)
+            self._refresh_disks()
 
-        threading.Thread(
-            target=self._clone_worker,
-            args=(source_disk, dest_disk),
-            daemon=True,
-        ).start()
+    def _render_progress(self, widgets: dict, progress: Optional[CloneProgress]) -> None:
+        if progress is None:
+            widgets['phase_var'].set('Clonage en cours')
+            widgets['progress'].configure(mode='determinate', value=0)
+            widgets['percent_var'].set('0 %')
+            return
+        if progress.phase == 'preflight':
+            widgets['phase_var'].set('Test préalable de la destination')
+        elif progress.phase == 'copy':
+            widgets['phase_var'].set('Clonage en cours')
+        elif progress.phase == 'flush':
+            widgets['phase_var'].set('Écriture des données en attente sur le disque')
+        elif progress.phase == 'verify':
+            widgets['phase_var'].set('Vérification en cours')
+            if progress.percent < 0 and not widgets['indeterminate']:
+                widgets['progress'].configure(mode='indeterminate')
+                widgets['progress'].start()
+                widgets['indeterminate'] = True
+        if progress.percent >= 0:
+            if widgets['indeterminate']:
+                widgets['progress'].stop()
+                widgets['indeterminate'] = False
+            widgets['progress'].configure(mode='determinate', value=progress.percent)
+            widgets['percent_var'].set(f"{progress.percent:.1f} %")
+            widgets['speed_var'].set(f"{progress.speed_mb_s:.1f} Mo/s")
+            eta_m, eta_s = divmod(int(progress.eta_seconds), 60)
+            widgets['eta_var'].set(f"ETA {eta_m:02d}:{eta_s:02d}")
+        if progress.io:
+            widgets['io_var'].set(self._format_device_io(progress.io))
+
+    @staticmethod
+    def _format_device_io(io: dict) -> str:
+        src = io.get('source')
+        dst = io.get('dest')
+        parts = []
+        if src:
+            parts.append(f"Source {src.read_mb_s:.1f} Mo/s ({src.utilization_percent:.0f} %)")
+        if dst:
+            parts.append(f"Destination {dst.write_mb_s:.1f} Mo/s ({dst.utilization_percent:.0f} %)")
+        bottleneck = diagnose_bottleneck(io)
+        if bottleneck:
+            parts.append(f"goulot : {BOTTLENECK_LABELS[bottleneck]}")
+        return '  ·  '.join(parts)
+
+    def _on_pause_clicked(self, station: Station) -> None:
+        job = self._jobs.get(station.name)
+        if job is None:
+            return
+        if job.paused:
+            self._jobs.resume(station.name)
+        else:
+            self._jobs.pause(station.name)
 
-    def _clone_worker(self, source_disk: DiskInfo, dest_disk: DiskInfo) -> None:
-        block_size = config_manager.get_block_size()
-        try:
-            self._clone_job.run(
-                source_disk.devname, dest_disk.devname,
-                block_size=block_size,
-                progress_callback=self._on_progress,
-                log_func=self._log,
-            )
-            log_clone_completed(source_disk.model, dest_disk.model, time.time() - self._start_time)
-
-            if config_manager.get_verify_after_clone():
-                self.root.after(0, lambda: self._phase_var.set('Vérification en cours'))
-                self.root.after(0, lambda: self._progress.configure(mode='indeterminate'))
-                self.root.after(0, self._progress.start)
-                success = verify_clone(
-                    source_disk.devname, dest_disk.devname,
-                    log_func=self._log, cancel_job=self._clone_job,
-                )
-                log_verification_result(source_disk.model, dest_disk.model, success)
-                self.root.after(0, self._progress.stop)
-                self.root.after(0, lambda: self._progress.configure(mode='determinate', value=100))
-                if not success:
-                    self.root.after(0, lambda: self._on_clone_error(
-                        "Le clonage s'est terminé mais la vérification a échoué : "
-                        "les disques ne sont pas identiques."
-                    ))
-                    return
-
-            self.root.after(0, self._on_clone_success)
-
-        except SizeMismatchError as e:
-            log_clone_failed(source_disk.model, dest_disk.model, str(e))
-            self.root.after(0, lambda: self._on_clone_error(str(e)))
-        except CloneError as e:
-            if self._clone_job.is_cancelled():
-                log_clone_process_stopped()
-                self.root.after(0, self._on_clone_cancelled)
-            else:
-                log_clone_failed(source_disk.model, dest_disk.model, str(e))
-                self.root.after(0, lambda: self._on_clone_error(str(e)))
-        except Exception as e:  # sécurité : ne jamais laisser un thread mourir silencieusement
-            log_error(f"Erreur inattendue pendant le clonage : {e}")
-            self.root.after(0, lambda: self._on_clone_error(f"Erreur inattendue : {e}"))
-
-    def _on_progress(self, progress: CloneProgress) -> None:
-        def _update():
-            if progress.percent >= 0:
-                self._progress.configure(mode='determinate', value=progress.percent)
-                self._percent_var.set(f"{progress.percent:.1f} %")
-                self._speed_var.set(f"{progress.speed_mb_s:.1f} Mo/s")
-                eta_m, eta_s = divmod(int(progress.eta_seconds), 60)
-                self._eta_var.set(f"ETA {eta_m:02d}:{eta_s:02d}")
-        self.root.after(0, _update)
-
-    def _on_cancel_clicked(self) -> None:
-        if self._clone_job:
+    def _on_cancel_clicked(self, station: Station) -> None:
+        if self._jobs.is_running(station.name):
             confirm = messagebox.askyesno(
-                'Annuler', "Voulez-vous vraiment interrompre le clonage en cours ?"
+                'Annuler', f"{station.name} : voulez-vous vraiment interrompre le clonage en cours ?"
             )
             if confirm:
-                self._clone_job.cancel()
-                self._log("Demande d'annulation envoyée...")
-
-    def _reset_clone_state(self) -> None:
-        self._cloning = False
-        self.cancel_btn.configure(state=tk.DISABLED)
-        self._clone_job = None
-        self._refresh_disks()
-
-    def _on_clone_success(self) -> None:
-        self._phase_var.set('Terminé')
-        self._percent_var.set('100 %')
-        self._eta_var.set('')
-        self._log("Clonage terminé avec succès.")
-        self._reset_clone_state()
-        messagebox.showinfo('Terminé', 'Le clonage du disque est terminé avec succès.')
-
-    def _on_clone_error(self, message: str) -> None:
-        self._phase_var.set('Erreur')
-        self._log(f"ERREUR : {message}")
-        self._reset_clone_state()
-        messagebox.showerror('Erreur de clonage', message)
-
-    def _on_clone_cancelled(self) -> None:
-        self._phase_var.set('Annulé')
-        self._log("Clonage annulé.")
-        self._reset_clone_state()
+                self._jobs.cancel(station.name)
+
+    # ── Mode production ─────────────────────────────────────────────────
+    def _on_production_changed(self) -> None:
+        # Appelé depuis les threads du moniteur / des jobs
+        self.root.after(0, self._render_production)
+
+    def _render_production(self) -> None:
+        stats = self._production.stats
+        if self._production.armed:
+            self._production_var.set(f"▶ Production armée : {stats.summary()}")
+        elif stats.produced or stats.failed:
+            self._production_var.set(f"Dernière production : {stats.summary()}")
+        else:
+            self._production_var.set('')
 
     # ── Administration ────────────────────────────────────────────────────
     def _open_admin(self) -> None:
         if open_admin_panel is None:
             messagebox.showerror('Erreur', "Le module d'administration est indisponible.")
             return
-        open_admin_panel(self.root, on_ports_changed=self._refresh_disks)
+        open_admin_panel(self.root, on_ports_changed=self._refresh_disks,
+                         job_manager=self._jobs, production=self._production)
 
     # ── Fermeture ───────────────────────────────────────────────────────────
     def _on_quit(self) -> None:
-        if self._cloning:
+        if self._jobs.any_running():
             if not messagebox.askyesno(
                 'Quitter', "Un clonage est en cours. Voulez-vous vraiment quitter ?"
             ):
                 return
-            if self._clone_job:
-                self._clone_job.cancel()
+            self._jobs.cancel_all()
+        self._production.disarm("fermeture de l'application")
+        if self._control is not None:
+            self._control.stop()
+        if self._metrics_exporter is not None:
+            self._metrics_exporter.stop()
         log_application_exit("Fermeture de la fenêtre")
         self.root.destroy()
 
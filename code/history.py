@@ -0,0 +1,447 @@
+"""
+history.py – Historique structuré des clonages (base sqlite3).
+
+Chaque clonage lancé, quelle que soit son issue, y laisse un
+enregistrement : horodatages, poste, ports (ID_PATH), modèles, numéros de
+série et tailles des disques, octets écrits, durée de chaque phase, débits
+(moyen de la copie, E/S réelles de la destination), résultat de la
+vérification. On peut ainsi répondre à « combien de clones de la clé
+maître X ce mois-ci » ou « débit moyen par modèle de clé » sans fouiller
+les journaux.
+
+La base (config `history_db_path`, "" = désactivée) est en mode WAL : les
+lectures (panneau admin, rapport PDF) ne sont jamais bloquées par une
+écriture, ni l'inverse. Les écritures passent par un thread unique
+« history-writer » : record() ne fait que déposer l'enregistrement dans
+une file, le chemin du clonage n'attend jamais le disque. Les requêtes
+ouvrent leur propre connexion en lecture seule ; les index sur la date,
+les numéros de série et les ports les gardent rapides.
+
+Le clonage compare les disques octet par octet (cmp) sans calculer
+d'empreinte : c'est le résultat de cette comparaison qui est conservé.
+"""
+from __future__ import annotations
+
+import atexit
+import contextlib
+import dataclasses
+import os
+import queue
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import config_manager
+import metrics
+from clone import JobMetrics
+from utils import DiskInfo, human_size
+
+PHASES = ("preflight", "copy", "flush", "verify")
+_SCHEMA_VERSION = 1
+_BUSY_TIMEOUT = 5.0
+_FLUSH_TIMEOUT = 5.0
+_STOP = object()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS clones (
+    id                   INTEGER PRIMARY KEY,
+    started_at           REAL NOT NULL,
+    finished_at          REAL NOT NULL,
+    station              TEXT NOT NULL,
+    result               TEXT NOT NULL,
+    message              TEXT NOT NULL DEFAULT '',
+    unattended           INTEGER NOT NULL DEFAULT 0,
+    source_serial        TEXT NOT NULL DEFAULT '',
+    source_model         TEXT NOT NULL DEFAULT '',
+    source_port          TEXT NOT NULL DEFAULT '',
+    source_size          INTEGER NOT NULL DEFAULT 0,
+    dest_serial          TEXT NOT NULL DEFAULT '',
+    dest_model           TEXT NOT NULL DEFAULT '',
+    dest_port            TEXT NOT NULL DEFAULT '',
+    dest_size            INTEGER NOT NULL DEFAULT 0,
+    bytes_written        INTEGER NOT NULL DEFAULT 0,
+    block_size           TEXT NOT NULL DEFAULT '',
+    cache_mode           TEXT NOT NULL DEFAULT '',
+    verify               INTEGER NOT NULL DEFAULT 0,
+    verified             INTEGER,
+    preflight_s          REAL,
+    copy_s               REAL,
+    flush_s              REAL,
+    verify_s             REAL,
+    copy_mb_s            REAL,
+    dest_write_mb_s_avg  REAL,
+    dest_write_mb_s_max  REAL,
+    source_read_mb_s_avg REAL,
+    preflight_write_mb_s REAL
+);
+CREATE INDEX IF NOT EXISTS clones_started_at ON clones (started_at);
+CREATE INDEX IF NOT EXISTS clones_source_serial ON clones (source_serial, started_at);
+CREATE INDEX IF NOT EXISTS clones_dest_serial ON clones (dest_serial, started_at);
+CREATE INDEX IF NOT EXISTS clones_source_port ON clones (source_port, started_at);
+CREATE INDEX IF NOT EXISTS clones_dest_port ON clones (dest_port, started_at);
+"""
+
+
+@dataclass
+class CloneRecord:
+    """Un clonage terminé (réussi, en échec ou annulé), tel que stocké."""
+    started_at: float
+    finished_at: float
+    station: str
+    result: str                     # "success", "error" ou "cancelled"
+    message: str = ""
+    unattended: bool = False
+    source_serial: str = ""
+    source_model: str = ""
+    source_port: str = ""
+    source_size: int = 0
+    dest_serial: str = ""
+    dest_model: str = ""
+    dest_port: str = ""
+    dest_size: int = 0
+    bytes_written: int = 0
+    block_size: str = ""
+    cache_mode: str = ""
+    verify: bool = False
+    verified: Optional[bool] = None    # None : pas de vérification menée à terme
+    phase_seconds: Dict[str, float] = field(default_factory=dict)
+    copy_mb_s: Optional[float] = None
+    dest_write_mb_s_avg: Optional[float] = None
+    dest_write_mb_s_max: Optional[float] = None
+    source_read_mb_s_avg: Optional[float] = None
+    preflight_write_mb_s: Optional[float] = None
+    id: Optional[int] = None
+
+    @property
+    def duration_s(self) -> float:
+        return max(self.finished_at - self.started_at, 0.0)
+
+    def to_row(self) -> Dict[str, object]:
+        row = dataclasses.asdict(self)
+        del row["id"], row["phase_seconds"]
+        for phase in PHASES:
+            row[f"{phase}_s"] = self.phase_seconds.get(phase)
+        return row
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> "CloneRecord":
+        data = dict(row)
+        phases = {p: data.pop(f"{p}_s") for p in PHASES}
+        data["phase_seconds"] = {p: s for p, s in phases.items() if s is not None}
+        data["unattended"] = bool(data["unattended"])
+        data["verify"] = bool(data["verify"])
+        if data["verified"] is not None:
+            data["verified"] = bool(data["verified"])
+        return cls(**data)
+
+
+def clone_record(
+    station: str,
+    source: DiskInfo,
+    dest: DiskInfo,
+    result: str,
+    started_at: float,
+    finished_at: float,
+    bytes_written: int,
+    phase_seconds: Dict[str, float],
+    job_metrics: Optional[JobMetrics] = None,
+    block_size: str = "",
+    cache_mode: str = "",
+    verify: bool = False,
+    verified: Optional[bool] = None,
+    message: str = "",
+    unattended: bool = False,
+) -> CloneRecord:
+    """Assemble l'enregistrement d'un clonage à partir de l'état final du job."""
+    record = CloneRecord(
+        started_at=started_at, finished_at=finished_at, station=station, result=result,
+        message=message, unattended=unattended,
+        source_serial=source.serial or "", source_model=source.model or "",
+        source_port=source.id_path or "", source_size=source.size_bytes,
+        dest_serial=dest.serial or "", dest_model=dest.model or "",
+        dest_port=dest.id_path or "", dest_size=dest.size_bytes,
+        bytes_written=bytes_written, block_size=block_size, cache_mode=cache_mode,
+        verify=verify, verified=verified, phase_seconds=dict(phase_seconds),
+    )
+    copy_seconds = phase_seconds.get("copy")
+    if copy_seconds and bytes_written:
+        record.copy_mb_s = bytes_written / (1024 * 1024) / copy_seconds
+    if job_metrics is not None:
+        io = job_metrics.io_by_phase.get("copy", {})
+        if io.get("dest") is not None and io["dest"].samples:
+            record.dest_write_mb_s_avg = io["dest"].write_mb_s_avg
+            record.dest_write_mb_s_max = io["dest"].write_mb_s_max
+        if io.get("source") is not None and io["source"].samples:
+            record.source_read_mb_s_avg = io["source"].read_mb_s_avg
+        if job_metrics.preflight is not None and job_metrics.preflight.write_mb_s:
+            record.preflight_write_mb_s = job_metrics.preflight.write_mb_s
+    return record
+
+
+# -- Écriture -------------------------------------------------------------------
+def _open_for_writing(path: str) -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(path), mode=0o750, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=_BUSY_TIMEOUT)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")   # WAL : pas de fsync à chaque commit, base toujours cohérente
+    if conn.execute("PRAGMA user_version").fetchone()[0] < _SCHEMA_VERSION:
+        with conn:
+            conn.executescript(_SCHEMA)
+            conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+    return conn
+
+
+class _HistoryWriter(threading.Thread):
+    """
+    Seul écrivain de la base. Éléments de la file : CloneRecord à insérer,
+    threading.Event à signaler (flush) ou _STOP.
+    """
+
+    def __init__(self, path: str) -> None:
+        super().__init__(daemon=True, name="history-writer")
+        self.path = path
+        self.queue: "queue.Queue" = queue.Queue()
+        self.last_error: Optional[sqlite3.Error] = None
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def run(self) -> None:
+        while True:
+            item = self.queue.get()
+            if item is _STOP:
+                break
+            if isinstance(item, threading.Event):
+                item.set()
+                continue
+            self._insert(item)
+        if self._conn is not None:
+            self._conn.close()
+
+    def _insert(self, record: CloneRecord) -> None:
+        row = record.to_row()
+        columns = ", ".join(row)
+        values = ", ".join(f":{name}" for name in row)
+        try:
+            if self._conn is None:
+                self._conn = _open_for_writing(self.path)
+            with self._conn:
+                self._conn.execute(f"INSERT INTO clones ({columns}) VALUES ({values})", row)
+        except (sqlite3.Error, OSError) as e:
+            self.last_error = e
+            metrics.HISTORY_WRITE_ERRORS.inc()
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None   # nouvel essai au prochain enregistrement
+            return
+        self.last_error = None
+
+
+_writer: Optional[_HistoryWriter] = None
+_writer_lock = threading.Lock()
+
+
+def _get_writer() -> Optional[_HistoryWriter]:
+    global _writer
+    path = config_manager.get_history_db_path()
+    if not path:
+        return None
+    with _writer_lock:
+        if _writer is None or _writer.path != path:
+            _writer = _HistoryWriter(path)
+            _writer.start()
+        return _writer
+
+
+def record(entry: CloneRecord) -> None:
+    """Enregistre un clonage, sans attendre l'écriture. Sans effet si l'historique est désactivé."""
+    writer = _get_writer()
+    if writer is not None:
+        writer.queue.put(entry)
+
+
+def flush(timeout: float = _FLUSH_TIMEOUT) -> bool:
+    """Attend l'écriture des enregistrements en file. False si le délai expire."""
+    writer = _writer
+    if writer is None or not writer.is_alive():
+        return True
+    done = threading.Event()
+    writer.queue.put(done)
+    return done.wait(timeout)
+
+
+def last_write_error() -> Optional[Exception]:
+    """Erreur de la dernière écriture, None si elle a réussi."""
+    return _writer.last_error if _writer is not None else None
+
+
+def _shutdown() -> None:
+    writer = _writer
+    if writer is not None and writer.is_alive():
+        writer.queue.put(_STOP)
+        writer.join(_FLUSH_TIMEOUT)
+
+
+atexit.register(_shutdown)
+
+
+# -- Requêtes -------------------------------------------------------------------
+@contextlib.contextmanager
+def _reader() -> Iterator[Optional[sqlite3.Connection]]:
+    """Connexion en lecture seule ; None si l'historique est désactivé ou encore vide."""
+    path = config_manager.get_history_db_path()
+    if not path or not os.path.exists(path):
+        yield None
+        return
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, timeout=_BUSY_TIMEOUT)
+    conn.row_factory = sqlite3.Row
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def _where(since: Optional[float], until: Optional[float], serial: Optional[str],
+           port: Optional[str]) -> Tuple[str, Dict[str, object]]:
+    clauses, params = [], {}
+    if since is not None:
+        clauses.append("started_at >= :since")
+        params["since"] = since
+    if until is not None:
+        clauses.append("started_at < :until")
+        params["until"] = until
+    if serial:
+        clauses.append("(source_serial = :serial OR dest_serial = :serial)")
+        params["serial"] = serial
+    if port:
+        clauses.append("(source_port = :port OR dest_port = :port)")
+        params["port"] = port
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+def month_start(timestamp: Optional[float] = None) -> float:
+    """Début (heure locale) du mois contenant `timestamp` (maintenant par défaut)."""
+    t = time.localtime(timestamp)
+    return time.mktime((t.tm_year, t.tm_mon, 1, 0, 0, 0, 0, 0, -1))
+
+
+def records(
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    serial: Optional[str] = None,
+    port: Optional[str] = None,
+    limit: Optional[int] = None,
+    newest_first: bool = True,
+) -> List[CloneRecord]:
+    """Clonages filtrés par période, numéro de série (source ou destination) et port."""
+    return list(iter_records(since, until, serial, port, limit, newest_first))
+
+
+def iter_records(
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    serial: Optional[str] = None,
+    port: Optional[str] = None,
+    limit: Optional[int] = None,
+    newest_first: bool = False,
+) -> Iterator[CloneRecord]:
+    """Comme records(), en flux : l'historique complet ne tient jamais en mémoire."""
+    where, params = _where(since, until, serial, port)
+    sql = f"SELECT * FROM clones{where} ORDER BY started_at {'DESC' if newest_first else 'ASC'}"
+    if limit is not None:
+        sql += " LIMIT :limit"
+        params["limit"] = int(limit)
+    with _reader() as conn:
+        if conn is None:
+            return
+        for row in conn.execute(sql, params):
+            yield CloneRecord.from_row(row)
+
+
+@dataclass
+class HistorySummary:
+    """Agrégats d'une période."""
+    total: int = 0
+    success: int = 0
+    error: int = 0
+    cancelled: int = 0
+    bytes_written: int = 0
+    avg_copy_mb_s: Optional[float] = None
+
+    def summary(self) -> str:
+        text = (f"{self.total} clonage(s) : {self.success} réussi(s), {self.error} en échec, "
+                f"{self.cancelled} annulé(s), {human_size(self.bytes_written)} écrits")
+        if self.avg_copy_mb_s is not None:
+            text += f", {self.avg_copy_mb_s:.1f} Mo/s en moyenne"
+        return text
+
+
+@dataclass
+class GroupStats:
+    """Agrégats d'un groupe (modèle de clé, clé maître...)."""
+    key: str
+    label: str
+    count: int
+    success: int
+    avg_copy_mb_s: Optional[float]
+
+
+def summarize(since: Optional[float] = None, until: Optional[float] = None,
+              serial: Optional[str] = None, port: Optional[str] = None) -> HistorySummary:
+    where, params = _where(since, until, serial, port)
+    with _reader() as conn:
+        if conn is None:
+            return HistorySummary()
+        row = conn.execute(
+            "SELECT COUNT(*), "
+            "       COALESCE(SUM(result = 'success'), 0), "
+            "       COALESCE(SUM(result = 'error'), 0), "
+            "       COALESCE(SUM(result = 'cancelled'), 0), "
+            "       COALESCE(SUM(bytes_written), 0), "
+            "       AVG(CASE WHEN result = 'success' THEN copy_mb_s END) "
+            f"FROM clones{where}", params,
+        ).fetchone()
+    return HistorySummary(*row)
+
+
+def _group_stats(column: str, label_column: str, since: Optional[float],
+                 until: Optional[float], limit: Optional[int]) -> List[GroupStats]:
+    where, params = _where(since, until, None, None)
+    sql = (f"SELECT {column}, MAX({label_column}), COUNT(*), SUM(result = 'success'), "
+           f"       AVG(CASE WHEN result = 'success' THEN copy_mb_s END) "
+           f"FROM clones{where} GROUP BY {column} ORDER BY COUNT(*) DESC, {column}")
+    if limit is not None:
+        sql += " LIMIT :limit"
+        params["limit"] = int(limit)
+    with _reader() as conn:
+        if conn is None:
+            return []
+        return [GroupStats(*row) for row in conn.execute(sql, params)]
+
+
+def stats_by_dest_model(since: Optional[float] = None, until: Optional[float] = None,
+                        limit: Optional[int] = None) -> List[GroupStats]:
+    """Par modèle de clé destination : nombre de clonages, réussites, débit moyen de copie."""
+    return _group_stats("dest_model", "dest_model", since, until, limit)
+
+
+def stats_by_master(since: Optional[float] = None, until: Optional[float] = None,
+                    limit: Optional[int] = None) -> List[GroupStats]:
+    """Par clé maître (numéro de série source) : nombre de clonages et réussites."""
+    return _group_stats("source_serial", "source_model", since, until, limit)
+
+
+def format_record(entry: CloneRecord) -> str:
+    """Une ligne par clonage, pour le rapport PDF (ASCII : les polices standard du PDF n'ont pas d'accents)."""
+    result = {"success": "OK", "error": "ECHEC", "cancelled": "ANNULE"}.get(entry.result, entry.result)
+    text = (f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(entry.started_at))} "
+            f"[{entry.station}] {result} : {entry.source_model} ({entry.source_serial or '?'}) -> "
+            f"{entry.dest_model} ({entry.dest_serial or '?'}), {human_size(entry.bytes_written)} "
+            f"en {entry.duration_s / 60:.1f} min")
+    if entry.copy_mb_s is not None:
+        text += f", copie {entry.copy_mb_s:.1f} Mo/s"
+    if entry.verified is not None:
+        text += ", verifie" if entry.verified else ", verification echouee"
+    if entry.message:
+        text += f" - {entry.message}"
+    return text
@@ -0,0 +1,272 @@
+"""
+iostats.py – Statistiques d'E/S au niveau des périphériques pendant un job.
+
+Le compteur d'octets de dd mesure ce qui est écrit dans le cache, pas ce
+qui arrive réellement sur le disque. On échantillonne donc, à intervalle
+fixe, /sys/block/<dev>/stat pour la source et la destination et l'on en
+déduit, par intervalle :
+
+  * débit réel en lecture / écriture (Mo/s) et IOPS
+  * taille moyenne des requêtes (Ko)
+  * profondeur moyenne de file (time_in_queue / durée)
+  * latence moyenne des E/S (ms) et taux d'occupation du périphérique
+
+Ces chiffres permettent de savoir si le goulot est la source, la
+destination ou le bus/hub USB (aucun des deux disques saturé).
+"""
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+_SECTOR_SIZE = 512
+_MB = 1024 * 1024
+
+# Au-delà de ce taux d'occupation, un périphérique est considéré saturé
+_SATURATION_PERCENT = 90.0
+
+BOTTLENECK_LABELS = {
+    "source": "disque source",
+    "dest": "disque destination",
+    "bus": "lien USB / hub",
+}
+
+
+@dataclass
+class DiskStatCounters:
+    """Compteurs bruts de /sys/block/<dev>/stat (cumulés depuis le boot)."""
+    timestamp: float
+    read_ios: int
+    read_sectors: int
+    read_ticks_ms: int
+    write_ios: int
+    write_sectors: int
+    write_ticks_ms: int
+    in_flight: int
+    io_ticks_ms: int
+    time_in_queue_ms: int
+
+
+@dataclass
+class DeviceIoStats:
+    """Statistiques dérivées sur un intervalle d'échantillonnage."""
+    devname: str
+    read_mb_s: float
+    write_mb_s: float
+    read_iops: float
+    write_iops: float
+    avg_request_kb: float
+    queue_depth: float
+    await_ms: float
+    utilization_percent: float
+    in_flight: int
+
+
+@dataclass
+class IoStatsSummary:
+    """Synthèse d'un périphérique sur toute la durée d'une phase."""
+    devname: str
+    samples: int = 0
+    read_mb_s_avg: float = 0.0
+    read_mb_s_max: float = 0.0
+    write_mb_s_avg: float = 0.0
+    write_mb_s_max: float = 0.0
+    iops_avg: float = 0.0
+    avg_request_kb: float = 0.0
+    queue_depth_avg: float = 0.0
+    await_ms_avg: float = 0.0
+    utilization_avg: float = 0.0
+
+
+def read_disk_stat(devname: str) -> Optional[DiskStatCounters]:
+    devname = devname.lstrip("/").removeprefix("dev/")
+    try:
+        with open(f"/sys/block/{devname}/stat", "r") as f:
+            fields = [int(v) for v in f.read().split()]
+    except (OSError, ValueError):
+        return None
+    if len(fields) < 11:
+        return None
+    return DiskStatCounters(
+        timestamp=time.monotonic(),
+        read_ios=fields[0],
+        read_sectors=fields[2],
+        read_ticks_ms=fields[3],
+        write_ios=fields[4],
+        write_sectors=fields[6],
+        write_ticks_ms=fields[7],
+        in_flight=fields[8],
+        io_ticks_ms=fields[9],
+        time_in_queue_ms=fields[10],
+    )
+
+
+def compute_io_stats(devname: str, prev: DiskStatCounters, cur: DiskStatCounters) -> DeviceIoStats:
+    dt = max(cur.timestamp - prev.timestamp, 0.001)
+    d_rios = cur.read_ios - prev.read_ios
+    d_wios = cur.write_ios - prev.write_ios
+    d_rsec = cur.read_sectors - prev.read_sectors
+    d_wsec = cur.write_sectors - prev.write_sectors
+    d_ios = d_rios + d_wios
+    d_ticks = (cur.read_ticks_ms - prev.read_ticks_ms) + (cur.write_ticks_ms - prev.write_ticks_ms)
+    return DeviceIoStats(
+        devname=devname,
+        read_mb_s=d_rsec * _SECTOR_SIZE / _MB / dt,
+        write_mb_s=d_wsec * _SECTOR_SIZE / _MB / dt,
+        read_iops=d_rios / dt,
+        write_iops=d_wios / dt,
+        avg_request_kb=(d_rsec + d_wsec) * _SECTOR_SIZE / 1024 / d_ios if d_ios else 0.0,
+        queue_depth=(cur.time_in_queue_ms - prev.time_in_queue_ms) / (dt * 1000),
+        await_ms=d_ticks / d_ios if d_ios else 0.0,
+        utilization_percent=min(100.0, (cur.io_ticks_ms - prev.io_ticks_ms) / (dt * 1000) * 100),
+        in_flight=cur.in_flight,
+    )
+
+
+def diagnose_bottleneck(stats: Dict[str, DeviceIoStats]) -> str:
+    """
+    Désigne le goulot d'étranglement probable ("source", "dest", "bus")
+    d'après le taux d'occupation des périphériques : si aucun n'est
+    saturé alors que les données circulent, c'est le lien USB/hub qui
+    limite. Retourne "" si rien ne circule.
+    """
+    if not stats or all(s.read_mb_s + s.write_mb_s < 0.1 for s in stats.values()):
+        return ""
+    role, busiest = max(stats.items(), key=lambda item: item[1].utilization_percent)
+    if busiest.utilization_percent >= _SATURATION_PERCENT:
+        return role
+    return "bus"
+
+
+def summary_bottleneck(summaries: Dict[str, IoStatsSummary]) -> str:
+    """Même diagnostic que diagnose_bottleneck, sur les moyennes d'une phase."""
+    active = {role: s for role, s in summaries.items() if s.samples}
+    if not active:
+        return ""
+    role, busiest = max(active.items(), key=lambda item: item[1].utilization_avg)
+    if busiest.utilization_avg >= _SATURATION_PERCENT:
+        return role
+    return "bus"
+
+
+@dataclass
+class _RunningTotals:
+    """Sommes et maxima des échantillons d'un périphérique : mémoire constante quelle que soit la durée."""
+    samples: int = 0
+    read_mb_s: float = 0.0
+    read_mb_s_max: float = 0.0
+    write_mb_s: float = 0.0
+    write_mb_s_max: float = 0.0
+    iops: float = 0.0
+    request_kb: float = 0.0
+    queue_depth: float = 0.0
+    await_ms: float = 0.0
+    utilization: float = 0.0
+
+    def add(self, s: DeviceIoStats) -> None:
+        self.samples += 1
+        self.read_mb_s += s.read_mb_s
+        self.read_mb_s_max = max(self.read_mb_s_max, s.read_mb_s)
+        self.write_mb_s += s.write_mb_s
+        self.write_mb_s_max = max(self.write_mb_s_max, s.write_mb_s)
+        self.iops += s.read_iops + s.write_iops
+        self.request_kb += s.avg_request_kb
+        self.queue_depth += s.queue_depth
+        self.await_ms += s.await_ms
+        self.utilization += s.utilization_percent
+
+    def summary(self, devname: str) -> IoStatsSummary:
+        summary = IoStatsSummary(devname=devname, samples=self.samples)
+        n = self.samples
+        if n:
+            summary.read_mb_s_avg = self.read_mb_s / n
+            summary.read_mb_s_max = self.read_mb_s_max
+            summary.write_mb_s_avg = self.write_mb_s / n
+            summary.write_mb_s_max = self.write_mb_s_max
+            summary.iops_avg = self.iops / n
+            summary.avg_request_kb = self.request_kb / n
+            summary.queue_depth_avg = self.queue_depth / n
+            summary.await_ms_avg = self.await_ms / n
+            summary.utilization_avg = self.utilization / n
+        return summary
+
+
+class IoStatsSampler:
+    """
+    Thread léger échantillonnant /sys/block/<dev>/stat à intervalle fixe
+    pour un ensemble de périphériques nommés par rôle
+    (ex: {"source": "sda", "dest": "sdb"}).
+    """
+
+    def __init__(self, devices: Dict[str, str], interval: float = 1.0) -> None:
+        self._devices = {role: name.split("/")[-1] for role, name in devices.items()}
+        self._interval = interval
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._latest: Dict[str, DeviceIoStats] = {}
+        self._totals: Dict[str, _RunningTotals] = {role: _RunningTotals() for role in self._devices}
+        self._previous: Optional[Dict[str, Optional[DiskStatCounters]]] = None
+
+    def start(self) -> "IoStatsSampler":
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(self._interval * 2)
+
+    def latest(self) -> Dict[str, DeviceIoStats]:
+        with self._lock:
+            return dict(self._latest)
+
+    def summary(self) -> Dict[str, IoStatsSummary]:
+        with self._lock:
+            return {role: totals.summary(self._devices[role]) for role, totals in self._totals.items()}
+
+    def sample(self) -> None:
+        """Relève les compteurs ; le premier appel ne fait que fixer l'origine."""
+        previous = self._previous
+        current = {role: read_disk_stat(name) for role, name in self._devices.items()}
+        self._previous = current
+        if previous is None:
+            return
+        latest: Dict[str, DeviceIoStats] = {}
+        for role, name in self._devices.items():
+            prev, cur = previous.get(role), current[role]
+            if cur is not None and prev is not None:
+                latest[role] = compute_io_stats(name, prev, cur)
+        with self._lock:
+            self._latest = latest
+            for role, stats in latest.items():
+                self._totals[role].add(stats)
+
+    def _run(self) -> None:
+        self.sample()
+        while not self._stop_event.wait(self._interval):
+            self.sample()
+
+
+def format_io_summary(summaries: Dict[str, IoStatsSummary]) -> str:
+    """Résumé lisible, une fois la phase terminée, pour le journal."""
+    labels = {"source": "source", "dest": "destination"}
+    parts = []
+    for role, s in summaries.items():
+        if not s.samples:
+            continue
+        parts.append(
+            f"{labels.get(role, role)} ({s.devname}) : "
+            f"lecture {s.read_mb_s_avg:.1f} Mo/s (max {s.read_mb_s_max:.1f}), "
+            f"écriture {s.write_mb_s_avg:.1f} Mo/s (max {s.write_mb_s_max:.1f}), "
+            f"{s.iops_avg:.0f} IOPS, requête moy. {s.avg_request_kb:.0f} Ko, "
+            f"file {s.queue_depth_avg:.1f}, latence {s.await_ms_avg:.1f} ms, "
+            f"occupation {s.utilization_avg:.0f} %"
+        )
+    bottleneck = summary_bottleneck(summaries)
+    if parts and bottleneck:
+        parts.append(f"goulot probable : {BOTTLENECK_LABELS[bottleneck]}")
+    return " | ".join(parts)
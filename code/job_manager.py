@@ -0,0 +1,511 @@
+"""
+job_manager.py – Exécution simultanée de plusieurs clonages (un par poste).
+
+Un « poste » (station) est une paire de ports physiques source /
+destination enregistrée dans la configuration. Une même borne peut en
+servir plusieurs en parallèle : chaque poste a son propre processus de
+clonage (clone_worker.ProcessCloneJob), sa progression, son journal, sa
+pause et son annulation. Tous les processus sont suivis par une seule
+boucle asyncio (orchestrator.AsyncBridge), une coroutine par job.
+
+Avant d'être lancé, chaque job passe par l'ordonnanceur (scheduler.py) :
+s'il saturerait un bus USB déjà occupé, il reste « en attente de bande
+passante » et démarre automatiquement quand un autre job se termine.
+
+Le gestionnaire ne connaît pas Tkinter : il notifie les changements d'état
+par des callbacks appelés depuis le thread de la boucle, à charge pour
+l'interface de repasser par sa boucle d'événements.
+"""
+from __future__ import annotations
+
+import collections
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List, Optional
+
+import config_manager
+import history
+import metrics
+from clone import CloneError, CloneProgress, SizeMismatchError
+from clone_worker import ProcessCloneJob
+from iostats import format_io_summary
+from log_handler import (
+    log_clone_completed,
+    log_clone_failed,
+    log_clone_operation,
+    log_clone_process_stopped,
+    log_error,
+    log_info,
+    log_verification_result,
+)
+from orchestrator import AsyncBridge, get_bridge
+from scheduler import BandwidthScheduler, BusDemand, SchedulerStats, jain_fairness, job_demand
+from utils import DiskInfo
+
+# États d'un poste
+STATE_IDLE = "idle"
+STATE_QUEUED = "queued"
+STATE_RUNNING = "running"
+STATE_SUCCESS = "success"
+STATE_ERROR = "error"
+STATE_CANCELLED = "cancelled"
+
+_LOG_LINES_PER_STATION = 200
+
+
+@dataclass
+class Station:
+    """Paire de ports physiques (ID_PATH) servie par un opérateur."""
+    name: str
+    source_id_path: Optional[str] = None
+    dest_id_path: Optional[str] = None
+    source_label: Optional[str] = None
+    dest_label: Optional[str] = None
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.source_id_path) and bool(self.dest_id_path)
+
+    @classmethod
+    def from_config(cls, data: Dict[str, Optional[str]]) -> "Station":
+        return cls(
+            name=data.get("name") or "Poste",
+            source_id_path=data.get("source_id_path"),
+            dest_id_path=data.get("dest_id_path"),
+            source_label=data.get("source_label"),
+            dest_label=data.get("dest_label"),
+        )
+
+
+def load_stations() -> List[Station]:
+    return [Station.from_config(s) for s in config_manager.get_stations()]
+
+
+@dataclass
+class CloneOptions:
+    """Réglages de clonage figés au lancement d'un job."""
+    block_size: str = "4M"
+    verify: bool = False
+    bdi_max_ratio: Optional[int] = None
+    cache_mode: str = "buffered"
+    preflight: bool = False
+    min_write_mb_s: float = 0.0
+    io_priority: Optional[int] = None
+    max_rate_mb_s: float = 0.0
+
+    @classmethod
+    def from_config(cls) -> "CloneOptions":
+        return cls(
+            block_size=config_manager.get_block_size(),
+            verify=config_manager.get_verify_after_clone(),
+            bdi_max_ratio=config_manager.get_dest_bdi_max_ratio(),
+            cache_mode=config_manager.get_cache_mode(),
+            preflight=config_manager.get_preflight_enabled(),
+            min_write_mb_s=config_manager.get_preflight_min_write_mb_s(),
+            io_priority=config_manager.get_clone_ionice_level(),
+            max_rate_mb_s=config_manager.get_job_max_rate_mb_s(),
+        )
+
+
+@dataclass
+class StationJob:
+    """État courant (ou dernier état connu) du clonage d'un poste."""
+    station: Station
+    source: DiskInfo
+    dest: DiskInfo
+    options: CloneOptions
+    job: ProcessCloneJob = field(default_factory=ProcessCloneJob)
+    state: str = STATE_RUNNING
+    demand: BusDemand = field(default_factory=BusDemand)
+    unattended: bool = False        # lancé par le mode production : aucun dialogue
+    current_phase: str = ""
+    phase_started_at: float = 0.0
+    phase_durations: Dict[str, float] = field(default_factory=dict)   # secondes par phase
+    progress: Optional[CloneProgress] = None
+    copied_bytes: int = 0               # avancement de la phase de copie
+    verified: Optional[bool] = None     # résultat de la vérification, si menée à terme
+    message: str = ""
+    started_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    log_lines: Deque[str] = field(default_factory=lambda: collections.deque(maxlen=_LOG_LINES_PER_STATION))
+
+    @property
+    def running(self) -> bool:
+        """Job non terminé : en cours ou en file d'attente."""
+        return self.state in (STATE_RUNNING, STATE_QUEUED)
+
+    def current_mb_s(self) -> float:
+        """Débit actuel : écriture réelle sur la destination, sinon celui de dd."""
+        progress = self.progress
+        if progress is None or self.state != STATE_RUNNING:
+            return 0.0
+        dest_io = (progress.io or {}).get("dest")
+        if dest_io is not None:
+            return dest_io.write_mb_s
+        return progress.speed_mb_s
+
+    @property
+    def paused(self) -> bool:
+        return self.job.paused
+
+    @property
+    def devnames(self) -> set:
+        return {self.source.devname, self.dest.devname}
+
+
+# Callbacks : (nom du poste, job) à chaque changement ; (nom du poste, ligne) pour le journal
+JobListener = Callable[[str, StationJob], None]
+JobLogListener = Callable[[str, str], None]
+
+
+class JobManagerError(Exception):
+    """Levée quand un job ne peut pas être lancé (poste occupé, disque déjà utilisé...)."""
+
+
+class JobManager:
+    """
+    Lance et suit un clonage (processus dédié) par poste. Thread-safe :
+    start/cancel peuvent être appelés depuis le thread GUI pendant que les
+    workers tournent.
+    """
+
+    def __init__(
+        self,
+        on_update: Optional[JobListener] = None,
+        on_log: Optional[JobLogListener] = None,
+        scheduler: Optional[BandwidthScheduler] = None,
+        bridge: Optional[AsyncBridge] = None,
+    ) -> None:
+        self._on_update = on_update
+        self._on_log = on_log
+        self._listeners: List[JobListener] = []
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, StationJob] = {}
+        self._queue: List[StationJob] = []
+        self._scheduler = scheduler or BandwidthScheduler(config_manager.get_scheduler_max_bus_load())
+        self._bridge = bridge
+
+    def add_listener(self, listener: JobListener) -> None:
+        """Abonné supplémentaire aux changements d'état (ex : mode production)."""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: JobListener) -> None:
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    # -- Consultation -------------------------------------------------------
+    def get(self, station_name: str) -> Optional[StationJob]:
+        with self._lock:
+            return self._jobs.get(station_name)
+
+    def jobs(self) -> List[StationJob]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def is_running(self, station_name: str) -> bool:
+        job = self.get(station_name)
+        return job is not None and job.running
+
+    def any_running(self) -> bool:
+        return any(job.running for job in self.jobs())
+
+    def busy_devnames(self) -> set:
+        """Disques engagés dans un job en cours, tous postes confondus."""
+        busy: set = set()
+        for job in self.jobs():
+            if job.running:
+                busy |= job.devnames
+        return busy
+
+    def stats(self) -> SchedulerStats:
+        """Débit agrégé, équité et charge des bus pour les jobs en cours."""
+        jobs = self.jobs()
+        running = [job for job in jobs if job.state == STATE_RUNNING]
+        rates = [job.current_mb_s() for job in running]
+        return SchedulerStats(
+            running=len(running),
+            queued=sum(1 for job in jobs if job.state == STATE_QUEUED),
+            aggregate_mb_s=sum(rates),
+            fairness=jain_fairness(rates) if len(rates) > 1 else None,
+            bus_load=self._scheduler.bus_load_ratio(job.demand for job in running),
+        )
+
+    def set_max_bus_load(self, value: float) -> None:
+        """Change la charge maximale des bus ; la file est réexaminée aussitôt."""
+        self._scheduler.max_bus_load = max(float(value), 0.0)
+        self._admit_queued()
+
+    def set_rate_limit(self, max_rate_mb_s: float) -> None:
+        """Applique un nouveau plafond de débit à tous les jobs non terminés."""
+        for job in self.jobs():
+            if job.running:
+                job.options.max_rate_mb_s = max_rate_mb_s
+                job.job.set_rate_limit(max_rate_mb_s)
+
+    # -- Pilotage -------------------------------------------------------------
+    def start(
+        self,
+        station: Station,
+        source: DiskInfo,
+        dest: DiskInfo,
+        options: Optional[CloneOptions] = None,
+        unattended: bool = False,
+    ) -> StationJob:
+        """
+        Lance le clonage du poste dans un processus dédié, ou le met en file
+        d'attente si la bande passante de ses bus USB est déjà prise. Lève
+        JobManagerError si le poste clone déjà, ou si l'un des disques est
+        déjà engagé dans le job d'un autre poste (même disque vu par deux
+        paires de ports).
+        """
+        with self._lock:
+            current = self._jobs.get(station.name)
+            if current is not None and current.running:
+                raise JobManagerError(f"{station.name} : un clonage est déjà en cours.")
+            busy = set()
+            for job in self._jobs.values():
+                if job.running:
+                    busy |= job.devnames
+            conflict = {source.devname, dest.devname} & busy
+            if conflict:
+                raise JobManagerError(
+                    f"{station.name} : disque déjà utilisé par un autre poste ({', '.join(sorted(conflict))})."
+                )
+            options = options or CloneOptions.from_config()
+            job = StationJob(station=station, source=source, dest=dest, options=options,
+                             demand=job_demand(source, dest, options.max_rate_mb_s),
+                             unattended=unattended)
+            job.job.set_rate_limit(options.max_rate_mb_s)
+            running = [j.demand for j in self._jobs.values() if j.state == STATE_RUNNING]
+            # Premier arrivé, premier servi : pas de dépassement de la file
+            if self._queue or not self._scheduler.can_admit(job.demand, running):
+                job.state = STATE_QUEUED
+                self._queue.append(job)
+            self._jobs[station.name] = job
+
+        if job.state == STATE_QUEUED:
+            buses = ", ".join(job.demand.buses)
+            self._log(job, f"En attente de bande passante USB ({buses}) : "
+                           "le clonage démarrera quand un autre poste aura terminé.")
+            self._notify(job)
+        else:
+            self._launch(job)
+        return job
+
+    def _launch(self, job: StationJob) -> None:
+        source, dest = job.source, job.dest
+        job.state = STATE_RUNNING
+        job.started_at = time.time()
+        log_clone_operation(self._disk_id(job, source), self._disk_id(job, dest), source.size_bytes)
+        metrics.CLONES_STARTED.inc()
+        self._log(job, f"Démarrage du clonage : {source.path} -> {dest.path}")
+        self._notify(job)
+        if self._bridge is None:
+            self._bridge = get_bridge()
+        self._bridge.submit(self._run(job))
+
+    def _admit_queued(self) -> None:
+        """Démarre, dans l'ordre d'arrivée, les jobs en file qui tiennent désormais."""
+        admitted: List[StationJob] = []
+        with self._lock:
+            running = [j.demand for j in self._jobs.values() if j.state == STATE_RUNNING]
+            for job in list(self._queue):
+                if not self._scheduler.can_admit(job.demand, running):
+                    break
+                self._queue.remove(job)
+                job.state = STATE_RUNNING
+                running.append(job.demand)
+                admitted.append(job)
+        for job in admitted:
+            self._launch(job)
+
+    def cancel(self, station_name: str) -> bool:
+        job = self.get(station_name)
+        if job is None or not job.running:
+            return False
+        with self._lock:
+            queued = job in self._queue
+            if queued:
+                self._queue.remove(job)
+        if queued:
+            self._log(job, "Clonage annulé avant son démarrage.")
+            self._finish(job, STATE_CANCELLED)
+            return True
+        job.job.cancel()
+        self._log(job, "Demande d'annulation envoyée...")
+        return True
+
+    def pause(self, station_name: str) -> bool:
+        job = self.get(station_name)
+        if job is None or job.state != STATE_RUNNING or job.paused:
+            return False
+        job.job.pause()
+        self._log(job, "Clonage mis en pause.")
+        self._notify(job)
+        return True
+
+    def resume(self, station_name: str) -> bool:
+        job = self.get(station_name)
+        if job is None or not job.paused:
+            return False
+        job.job.resume()
+        self._log(job, "Reprise du clonage.")
+        self._notify(job)
+        return True
+
+    def cancel_all(self) -> None:
+        # File vidée d'abord : rien ne doit démarrer pendant les annulations
+        for job in sorted(self.jobs(), key=lambda j: j.state != STATE_QUEUED):
+            if job.running:
+                self.cancel(job.station.name)
+
+    def dismiss(self, station_name: str) -> None:
+        """Oublie l'état final d'un poste (retour à l'état « en attente »)."""
+        with self._lock:
+            job = self._jobs.get(station_name)
+            if job is not None and not job.running:
+                del self._jobs[station_name]
+
+    # -- Worker ---------------------------------------------------------------
+    @staticmethod
+    def _disk_id(job: StationJob, disk: DiskInfo) -> str:
+        return f"[{job.station.name}] {disk.model}"
+
+    def _log(self, job: StationJob, message: str) -> None:
+        ts = time.strftime("%Y-%m-%d %H:%M:%S")
+        job.log_lines.append(f"[{ts}] {message}")
+        if self._on_log:
+            self._on_log(job.station.name, message)
+
+    def _notify(self, job: StationJob) -> None:
+        if self._on_update:
+            self._on_update(job.station.name, job)
+        with self._lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(job.station.name, job)
+            except Exception:
+                pass  # un abonné défaillant ne doit pas interrompre le clonage
+
+    def _on_progress(self, job: StationJob, progress: CloneProgress) -> None:
+        if progress.phase != job.current_phase:
+            now = time.time()
+            self._end_phase(job, now)
+            job.current_phase, job.phase_started_at = progress.phase, now
+        if progress.phase == "copy":
+            job.copied_bytes = progress.copied_bytes
+        job.progress = progress
+        self._notify(job)
+
+    @staticmethod
+    def _end_phase(job: StationJob, now: float) -> None:
+        if job.current_phase:
+            elapsed = now - job.phase_started_at
+            job.phase_durations[job.current_phase] = job.phase_durations.get(job.current_phase, 0.0) + elapsed
+            job.current_phase = ""
+
+    @staticmethod
+    def _record_metrics(job: StationJob) -> None:
+        """Métriques Prometheus d'un job lancé, une fois son état final connu."""
+        metrics.CLONES_FINISHED.inc(result=job.state)
+        for phase, seconds in job.phase_durations.items():
+            metrics.PHASE_SECONDS.observe(seconds, phase=phase)
+        if job.state == STATE_SUCCESS:
+            metrics.BYTES_COPIED.inc(job.source.size_bytes)
+            copy_seconds = job.phase_durations.get("copy")
+            if copy_seconds:
+                metrics.THROUGHPUT_MB_S.observe(job.source.size_bytes / (1024 * 1024) / copy_seconds)
+
+    @staticmethod
+    def _record_history(job: StationJob) -> None:
+        """Enregistrement du job dans l'historique des clonages (écriture différée)."""
+        options = job.options
+        copy_done = job.state == STATE_SUCCESS or job.verified is not None
+        history.record(history.clone_record(
+            job.station.name, job.source, job.dest, job.state,
+            started_at=job.started_at,
+            finished_at=job.finished_at or time.time(),
+            bytes_written=job.source.size_bytes if copy_done else job.copied_bytes,
+            phase_seconds=job.phase_durations,
+            job_metrics=job.job.metrics,
+            block_size=options.block_size,
+            cache_mode=options.cache_mode,
+            verify=options.verify,
+            verified=job.verified,
+            message=job.message,
+            unattended=job.unattended,
+        ))
+
+    def _finish(self, job: StationJob, state: str, message: str = "") -> None:
+        job.state = state
+        job.message = message
+        job.finished_at = time.time()
+        self._end_phase(job, job.finished_at)
+        self._notify(job)
+        self._admit_queued()
+
+    async def _run(self, job: StationJob) -> None:
+        source, dest, options = job.source, job.dest, job.options
+        src_id, dst_id = self._disk_id(job, source), self._disk_id(job, dest)
+        log = lambda message: self._log(job, message)
+        progress = lambda p: self._on_progress(job, p)
+        try:
+            success = await job.job.execute(
+                source.devname, dest.devname,
+                verify=options.verify,
+                progress_callback=progress,
+                log_func=log,
+                on_copied=lambda: log_clone_completed(src_id, dst_id, time.time() - job.started_at),
+                block_size=options.block_size,
+                bdi_max_ratio=options.bdi_max_ratio,
+                cache_mode=options.cache_mode,
+                preflight=options.preflight,
+                min_write_mb_s=options.min_write_mb_s,
+                io_priority=options.io_priority,
+            )
+
+            if options.verify:
+                job.verified = success
+                log_verification_result(src_id, dst_id, success)
+                if not success:
+                    metrics.VERIFY_FAILURES.inc()
+                    self._fail(job, "Le clonage s'est terminé mais la vérification a échoué : "
+                                    "les disques ne sont pas identiques.")
+                    return
+
+            job_metrics = job.job.metrics
+            summaries = [job_metrics.memory_summary()] + [
+                f"E/S ({phase}) — {format_io_summary(io)}"
+                for phase, io in job_metrics.io_by_phase.items() if format_io_summary(io)
+            ]
+            for summary in filter(None, summaries):
+                log_info(f"[{job.station.name}] {summary}")
+                log(summary)
+            log("Clonage terminé avec succès.")
+            self._finish(job, STATE_SUCCESS)
+
+        except SizeMismatchError as e:
+            log_clone_failed(src_id, dst_id, str(e))
+            self._fail(job, str(e))
+        except CloneError as e:
+            if job.job.is_cancelled():
+                log_clone_process_stopped()
+                log("Clonage annulé.")
+                self._finish(job, STATE_CANCELLED)
+            else:
+                log_clone_failed(src_id, dst_id, str(e))
+                self._fail(job, str(e))
+        except Exception as e:  # sécurité : ni tâche ni processus ne doit mourir silencieusement
+            log_error(f"[{job.station.name}] Erreur inattendue pendant le clonage : {e}")
+            self._fail(job, f"Erreur inattendue : {e}")
+        finally:
+            self._record_metrics(job)
+            self._record_history(job)
+
+    def _fail(self, job: StationJob, message: str) -> None:
+        self._log(job, f"ERREUR : {message}")
+        self._finish(job, STATE_ERROR, message)
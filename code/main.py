@@ -3,21 +3,33 @@
 main.py – Point d'entrée du cloneur de disque (borne autonome, Debian 13).
 
 Usage :
-    sudo python3 main.py
+    sudo python3 main.py                 # interface graphique
+    sudo python3 main.py clone ...       # clonage sans interface (voir cli.py)
+    python3 main.py list                 # disques et postes, en NDJSON
+    sudo python3 main.py daemon          # production sans écran
+
+L'interface Tk n'est importée que pour le mode graphique.
 """
 import os
 import sys
 
-from gui_interface import run_gui_mode
+import cli
+import log_handler
 
 
 def main() -> None:
+    args = cli.build_parser().parse_args()
+    log_handler.start()
+    if args.command not in (None, "gui"):
+        sys.exit(cli.run(args))
+
     if os.geteuid() != 0:
         print("Ce programme doit être exécuté en tant que root (accès direct aux disques).")
-        sys.exit(1)
+        sys.exit(cli.EXIT_NOT_ROOT)
 
+    from gui_interface import run_gui_mode
     run_gui_mode()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
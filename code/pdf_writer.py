@@ -0,0 +1,549 @@
+"""
+pdf_writer.py – Rapports PDF texte écrits en flux (stdlib uniquement).
+
+Un historique de journaux peut peser des centaines de Mo : le rapport est
+produit page par page à partir d'un itérateur de lignes, chaque objet
+étant écrit directement dans le fichier. Seuls les offsets des objets
+(table xref) et les numéros des pages restent en mémoire, quelle que soit
+la taille de l'entrée.
+
+Ce qui n'est connu qu'à la fin (nombre total de pages, de lignes) est
+dessiné par un Form XObject que chaque page référence et qui n'est écrit
+qu'en dernier : « Page 3/ » est dans le flux de la page, « 412 » dans
+l'XObject.
+
+Les flux de contenu des pages sont compressés (/FlateDecode), avec un
+niveau zlib choisi selon la taille attendue du rapport : compression
+maximale pour les petits rapports, rapide pour les gros. Au-delà de
+_PARALLEL_THRESHOLD, la compression part dans un pool de threads (zlib
+libère le GIL) pendant que le thread appelant met en page les suivantes.
+
+Fragments : render_fragment() met en page un fichier texte entier en flux
+« corps de page » seuls (lignes numérotées depuis 1, sans titre ni numéro
+de page), stockés dans un fichier avec leur index. write_fragmented_report()
+assemble des fragments sans les recalculer : chaque page a pour /Contents
+[bandeau, corps], le bandeau (titre, fichier, « Page n/N ») étant seul
+produit à chaque rapport. Un fichier qui ne change plus (journal tourné)
+n'est ainsi mis en page qu'une fois.
+
+Les générations longues acceptent `progress(lignes, pages)`, appelé toutes
+les _PROGRESS_EVERY lignes, et `cancel_check()` : s'il retourne True, la
+génération s'arrête sur ReportCancelled et ne laisse aucun fichier partiel.
+"""
+from __future__ import annotations
+
+import collections
+import gzip
+import json
+import os
+import struct
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import IO, Any, BinaryIO, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+PAGE_WIDTH       = 612
+PAGE_HEIGHT      = 792
+LINES_PER_PAGE   = 55
+WRAP_WIDTH       = 90
+_MARGIN_X        = 50
+_TOP             = 750
+_FOOTER_Y        = 30
+_LEADING         = 11
+_COURIER_ADVANCE = 0.6    # chasse d'un glyphe Courier, en fraction du corps
+_FLATE           = " /Filter /FlateDecode"
+_PARALLEL_THRESHOLD = 8 * 1024 * 1024   # octets de texte en entrée
+_COMPRESS_WORKERS   = min(4, (os.cpu_count() or 1) - 1)   # un coeur reste à la mise en page
+_PIPELINE_DEPTH     = 64                # pages compressées d'avance, au plus
+_BODY_TOP        = 720    # haut du corps des pages de fragment (sous le bandeau)
+_INDEX_SIZE      = struct.Struct(">Q")   # taille de l'index JSON, en fin de fragment
+_PROGRESS_EVERY  = 2000   # lignes entre deux appels de progress / cancel_check
+_ESCAPES = str.maketrans({"\\": "\\\\", "(": "\\(", ")": "\\)", "\r": " ", "\n": " ", "\t": " "})
+
+
+ProgressCallback = Callable[[int, int], None]   # (lignes, pages) traitées
+CancelCheck      = Callable[[], bool]
+
+
+class ReportCancelled(Exception):
+    """Génération interrompue : cancel_check() a retourné True."""
+
+
+def _checkpoint(lines: int, pages: int, progress: Optional[ProgressCallback],
+                cancel_check: Optional[CancelCheck]) -> None:
+    if cancel_check is not None and cancel_check():
+        raise ReportCancelled()
+    if progress is not None:
+        progress(lines, pages)
+
+
+def escape_text(text: str) -> str:
+    """Chaîne littérale PDF : parenthèses et antislash échappés, ASCII imprimable seul."""
+    if text is None:
+        return ""
+    text = str(text).translate(_ESCAPES)
+    if text.isascii() and text.isprintable():
+        return text   # cas courant : aucun caractère à remplacer un par un
+    return "".join(c if 32 <= ord(c) <= 126 else " " for c in text)
+
+
+def compression_level(size_hint: int) -> int:
+    """Niveau zlib selon la taille du texte à mettre en page (octets, 0 si inconnue)."""
+    if size_hint < 8 * 1024 * 1024:
+        return 9
+    if size_hint < 64 * 1024 * 1024:
+        return 6
+    return 1   # gain marginal au-delà : la vitesse prime
+
+
+def wrap_line(line: str, width: int) -> List[str]:
+    """
+    Découpe une ligne en morceaux de `width` caractères au plus (au moins
+    un), au dernier espace ou, à défaut, en plein mot. Version simplifiée
+    de textwrap.wrap (pas de coupure aux tirets ; un mot plus long qu'une
+    ligne commence sur une ligne neuve) : textwrap représentait l'essentiel
+    du temps de génération d'un gros rapport.
+    """
+    if "\t" in line:
+        line = line.expandtabs()
+    line = line.rstrip()
+    if len(line) <= width:
+        return [line or " "]
+    parts: List[str] = []
+    while len(line) > width:
+        cut = line.rfind(" ", 0, width + 1)
+        head = line[:cut].rstrip() if cut > 0 else ""
+        if head:
+            line = line[cut + 1:].lstrip()
+        else:
+            head, line = line[:width], line[width:]
+        parts.append(head)
+    if line:
+        parts.append(line)
+    return parts
+
+
+def numbered_parts(number: int, line: str) -> List[str]:
+    """Ligne `number` repliée : préfixe « 1234: » puis lignes de suite indentées."""
+    prefix = f"{number:4d}: "
+    parts = wrap_line(line or " ", WRAP_WIDTH - len(prefix))
+    return [f"{prefix if j == 0 else '      '}{part}" for j, part in enumerate(parts)]
+
+
+def _body_ops(page_lines: List[str], y: float) -> List[str]:
+    """Lignes de corps en Courier 8, la première à `y` - interligne."""
+    ops = [f"BT /F1 8 Tf {_LEADING} TL {_MARGIN_X} {y} Td"]
+    ops.extend(f"T* ({escape_text(line)}) Tj" for line in page_lines)
+    ops.append("ET")
+    return ops
+
+
+def open_text(path: str) -> IO[str]:
+    """Ouvre un fichier texte en lecture, compressé en gzip ou non."""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", errors="replace")
+    try:
+        return open(path, "r", errors="replace")
+    except FileNotFoundError:
+        # Journal compressé entre la liste des fichiers et la lecture
+        if os.path.exists(f"{path}.gz"):
+            return gzip.open(f"{path}.gz", "rt", errors="replace")
+        raise
+
+
+class PdfWriter:
+    """Écriture bas niveau : objets ajoutés au fil de l'eau, table xref à la fin."""
+
+    def __init__(self, stream: BinaryIO) -> None:
+        self._stream = stream
+        self._pos = 0
+        self._offsets: Dict[int, int] = {}
+        self._count = 0
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def reserve(self) -> int:
+        """Numéro d'un objet qui sera écrit plus tard (référence en avant)."""
+        self._count += 1
+        return self._count
+
+    def add_object(self, body: str, obj_id: Optional[int] = None) -> int:
+        obj_id = obj_id or self.reserve()
+        self._offsets[obj_id] = self._pos
+        self._write(f"{obj_id} 0 obj\n{body}\nendobj\n".encode("latin-1"))
+        return obj_id
+
+    def add_stream(self, data: bytes, entries: str = "", obj_id: Optional[int] = None) -> int:
+        obj_id = obj_id or self.reserve()
+        self._offsets[obj_id] = self._pos
+        self._write(f"{obj_id} 0 obj\n<< /Length {len(data)}{entries} >>\nstream\n".encode("latin-1"))
+        self._write(data)
+        self._write(b"\nendstream\nendobj\n")
+        return obj_id
+
+    def finish(self, root_id: int) -> None:
+        """Écrit la table xref et le trailer ; tous les objets réservés doivent exister."""
+        missing = [i for i in range(1, self._count + 1) if i not in self._offsets]
+        if missing:
+            raise ValueError(f"Objets PDF réservés mais jamais écrits : {missing[:10]}")
+        xref = self._pos
+        self._write(f"xref\n0 {self._count + 1}\n0000000000 65535 f \n".encode())
+        for start in range(1, self._count + 1, 1024):
+            stop = min(start + 1024, self._count + 1)
+            self._write("".join(f"{self._offsets[i]:010d} 00000 n \n" for i in range(start, stop)).encode())
+        self._write(f"trailer\n<< /Size {self._count + 1} /Root {root_id} 0 R >>\n"
+                    f"startxref\n{xref}\n%%EOF\n".encode())
+
+    def _write(self, data: bytes) -> None:
+        self._stream.write(data)
+        self._pos += len(data)
+
+
+class _DeferredNumber:
+    """Nombre connu en fin de rapport, dessiné par un Form XObject écrit dans close()."""
+
+    def __init__(self, writer: PdfWriter, name: str) -> None:
+        self.obj_id = writer.reserve()
+        self.name = name
+
+    def draw(self, x: float, y: float, size: float) -> str:
+        # XObject dessiné en corps 1 : la matrice le met à l'échelle et en place
+        return f"q {size} 0 0 {size} {x:.2f} {y} cm /{self.name} Do Q"
+
+    def write(self, writer: PdfWriter, value: int, font_id: int) -> None:
+        text = str(value)
+        content = f"BT /F1 1 Tf 0 0 Td ({text}) Tj ET".encode()
+        writer.add_stream(
+            content,
+            f" /Type /XObject /Subtype /Form /BBox [0 -0.3 {len(text) * _COURIER_ADVANCE + 0.1:.2f} 1]"
+            f" /Resources << /Font << /F1 {font_id} 0 R >> >>",
+            self.obj_id,
+        )
+
+
+class TextReport:
+    """
+    Rapport texte paginé (Courier, lignes numérotées et repliées) écrit en
+    flux : add_line() pour chaque ligne, puis close().
+    """
+
+    def __init__(
+        self,
+        stream: BinaryIO,
+        title: str,
+        info_lines: Iterable[str] = (),
+        line_count_label: Optional[str] = None,
+        compress_level: Optional[int] = 6,
+        workers: int = 0,
+    ) -> None:
+        """compress_level None : flux non compressés ; workers > 0 : compression en parallèle."""
+        self._writer = PdfWriter(stream)
+        self._title = title
+        self._info_lines = list(info_lines)
+        self._line_count_label = line_count_label
+        self._catalog_id = self._writer.reserve()
+        self._pages_id = self._writer.reserve()
+        self._font_id = self._writer.add_object(
+            "<< /Type /Font /Subtype /Type1 /BaseFont /Courier >>")
+        self._page_total = _DeferredNumber(self._writer, "NP")
+        self._line_total = _DeferredNumber(self._writer, "NL")
+        self._resources_id = self._writer.add_object(
+            f"<< /Font << /F1 {self._font_id} 0 R >> "
+            f"/XObject << /NP {self._page_total.obj_id} 0 R /NL {self._line_total.obj_id} 0 R >> >>")
+        self._page_ids: List[int] = []
+        self._pending: List[str] = []
+        self._page_count = 0
+        self._level = compress_level
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._inflight: Deque["Future[bytes]"] = collections.deque()
+        if compress_level is not None and workers > 0:
+            self._executor = ThreadPoolExecutor(workers, thread_name_prefix="pdf-zlib")
+        self.lines = 0
+
+    @property
+    def pages(self) -> int:
+        return self._page_count
+
+    def add_line(self, line: str) -> None:
+        self.lines += 1
+        for part in numbered_parts(self.lines, line):
+            self._pending.append(part)
+            if len(self._pending) == LINES_PER_PAGE:
+                self._flush_page()
+
+    def close(self) -> Tuple[int, int]:
+        """Termine le document ; retourne (lignes, pages)."""
+        if self._pending or not self._page_count:
+            self._flush_page()
+        while self._inflight:
+            self._write_page(self._inflight.popleft().result())
+        self.abort()
+        w = self._writer
+        self._page_total.write(w, len(self._page_ids), self._font_id)
+        self._line_total.write(w, self.lines, self._font_id)
+        kids = " ".join(f"{pid} 0 R" for pid in self._page_ids)
+        w.add_object(f"<< /Type /Pages /Kids [{kids}] /Count {len(self._page_ids)} >>", self._pages_id)
+        w.add_object(f"<< /Type /Catalog /Pages {self._pages_id} 0 R >>", self._catalog_id)
+        w.finish(self._catalog_id)
+        return self.lines, len(self._page_ids)
+
+    def abort(self) -> None:
+        """Libère le pool de compression (appelé par close(), ou seul en cas d'erreur)."""
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def _flush_page(self) -> None:
+        self._page_count += 1
+        content = self._page_content(self._pending, self._page_count)
+        self._pending = []
+        if self._level is None:
+            self._write_page(content)
+        elif self._executor is None:
+            self._write_page(zlib.compress(content, self._level))
+        else:
+            # Les pages sortent dans l'ordre ; le pool garde au plus _PIPELINE_DEPTH d'avance
+            self._inflight.append(self._executor.submit(zlib.compress, content, self._level))
+            if len(self._inflight) > _PIPELINE_DEPTH:
+                self._write_page(self._inflight.popleft().result())
+
+    def _write_page(self, content: bytes) -> None:
+        w = self._writer
+        content_id = w.add_stream(content, _FLATE if self._level is not None else "")
+        self._page_ids.append(w.add_object(
+            f"<< /Type /Page /Parent {self._pages_id} 0 R "
+            f"/MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Contents {content_id} 0 R /Resources {self._resources_id} 0 R >>"))
+
+    def _page_content(self, page_lines: List[str], page_num: int) -> bytes:
+        x = _MARGIN_X
+        ops: List[str] = []
+        if page_num == 1:
+            ops.append(f"BT /F1 14 Tf {x} {_TOP} Td ({escape_text(self._title)}) Tj ET")
+            y = _TOP
+            for info in self._info_lines:
+                y -= 14
+                ops.append(f"BT /F1 9 Tf {x} {y} Td ({escape_text(info)}) Tj ET")
+            if self._line_count_label is not None:
+                y -= 14
+                label = escape_text(self._line_count_label)
+                ops.append(f"BT /F1 9 Tf {x} {y} Td ({label}) Tj ET")
+                ops.append(self._line_total.draw(x + len(self._line_count_label) * _COURIER_ADVANCE * 9, y, 9))
+            y -= 18
+        else:
+            ops.append(f"BT /F1 11 Tf {x} {_TOP} Td ({escape_text(f'{self._title} - page {page_num}')}) Tj ET")
+            y = _TOP - 20
+
+        ops.extend(_body_ops(page_lines, y))
+
+        label = f"Page {page_num}/"
+        ops.append(f"BT /F1 7 Tf {x} {_FOOTER_Y} Td ({label}) Tj ET")
+        ops.append(self._page_total.draw(x + len(label) * _COURIER_ADVANCE * 7, _FOOTER_Y, 7))
+        return "\n".join(ops).encode("ascii")
+
+
+def write_text_report(
+    pdf_path: str,
+    title: str,
+    lines: Iterable[str],
+    info_lines: Iterable[str] = (),
+    line_count_label: Optional[str] = None,
+    size_hint: int = 0,
+    compress: bool = True,
+    progress: Optional[ProgressCallback] = None,
+    cancel_check: Optional[CancelCheck] = None,
+) -> Tuple[int, int]:
+    """
+    Écrit le rapport `pdf_path` (via un fichier temporaire renommé à la
+    fin) en consommant `lines` au fil de l'eau. `size_hint` (taille du
+    texte source, en octets) règle la compression. Retourne (lignes, pages).
+    """
+    level = compression_level(size_hint) if compress else None
+    workers = _COMPRESS_WORKERS if compress and size_hint >= _PARALLEL_THRESHOLD else 0   # 0 : en ligne
+    tmp_path = f"{pdf_path}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            report = TextReport(f, title, info_lines, line_count_label, level, workers)
+            try:
+                for line in lines:
+                    report.add_line(line)
+                    if report.lines % _PROGRESS_EVERY == 0:
+                        _checkpoint(report.lines, report.pages, progress, cancel_check)
+                result = report.close()
+                _checkpoint(*result, progress, None)
+            finally:
+                report.abort()
+        os.replace(tmp_path, pdf_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return result
+
+
+# -- Fragments ----------------------------------------------------------------------
+def render_fragment(
+    source_path: str,
+    fragment_path: str,
+    compress_level: Optional[int] = 6,
+    progress: Optional[ProgressCallback] = None,
+    cancel_check: Optional[CancelCheck] = None,
+) -> Dict[str, Any]:
+    """
+    Met en page `source_path` dans `fragment_path` : les corps de page à la
+    suite, puis un index JSON et sa taille. Retourne l'index : key (nom,
+    taille et mtime_ns du fichier source), lines, lengths (octets de chaque
+    page), flate. Fonction de module sans état : utilisable dans un pool
+    de processus.
+    """
+    lengths: List[int] = []
+    pending: List[str] = []
+    lines = 0
+    tmp_path = f"{fragment_path}.tmp"
+
+    try:
+        with open_text(source_path) as src, open(tmp_path, "wb") as out:
+            st = os.fstat(src.fileno())
+
+            def flush_page() -> None:
+                data = "\n".join(_body_ops(pending, _BODY_TOP)).encode("ascii")
+                if compress_level is not None:
+                    data = zlib.compress(data, compress_level)
+                out.write(data)
+                lengths.append(len(data))
+                pending.clear()
+
+            for line in src:
+                lines += 1
+                for part in numbered_parts(lines, line.rstrip("\r\n")):
+                    pending.append(part)
+                    if len(pending) == LINES_PER_PAGE:
+                        flush_page()
+                if lines % _PROGRESS_EVERY == 0:
+                    _checkpoint(lines, len(lengths), progress, cancel_check)
+            if pending:
+                flush_page()
+            index = {"key": [os.path.basename(source_path), st.st_size, st.st_mtime_ns],
+                     "lines": lines, "lengths": lengths, "flate": compress_level is not None}
+            raw = json.dumps(index).encode()
+            out.write(raw)
+            out.write(_INDEX_SIZE.pack(len(raw)))
+        os.replace(tmp_path, fragment_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return index
+
+
+def read_fragment_index(fragment_path: str) -> Optional[Dict[str, Any]]:
+    """Index d'un fragment ; None s'il est absent ou illisible."""
+    try:
+        with open(fragment_path, "rb") as f:
+            f.seek(-_INDEX_SIZE.size, os.SEEK_END)
+            (size,) = _INDEX_SIZE.unpack(f.read(_INDEX_SIZE.size))
+            f.seek(-_INDEX_SIZE.size - size, os.SEEK_END)
+            return json.loads(f.read(size))
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+def _cover_content(title: str, info_lines: Iterable[str],
+                   summary: List[Tuple[str, int, int, int]], total_pages: int) -> bytes:
+    x = _MARGIN_X
+    ops = [f"BT /F1 14 Tf {x} {_TOP} Td ({escape_text(title)}) Tj ET"]
+    y = _TOP
+    for info in info_lines:
+        y -= 14
+        ops.append(f"BT /F1 9 Tf {x} {y} Td ({escape_text(info)}) Tj ET")
+    y -= 28
+    ops.append(f"BT /F1 9 Tf {x} {y} Td (Fichiers :) Tj ET")
+    for i, (label, lines, first, last) in enumerate(summary):
+        y -= 12
+        if y < _FOOTER_Y + 30:
+            ops.append(f"BT /F1 8 Tf {x} {y} Td ({escape_text(f'... et {len(summary) - i} autre(s)')}) Tj ET")
+            break
+        pages = f"pages {first}-{last}" if last >= first else "vide"
+        ops.append(f"BT /F1 8 Tf {x + 10} {y} Td "
+                   f"({escape_text(f'{label:<44} {lines:>9} lignes  {pages}')}) Tj ET")
+    ops.append(f"BT /F1 7 Tf {x} {_FOOTER_Y} Td (Page 1/{total_pages}) Tj ET")
+    return "\n".join(ops).encode("ascii")
+
+
+def _banner_content(title: str, label: str, page_num: int, total_pages: int,
+                    part: int, parts: int) -> bytes:
+    x = _MARGIN_X
+    return "\n".join((
+        f"BT /F1 11 Tf {x} {_TOP} Td ({escape_text(f'{title} - page {page_num}')}) Tj ET",
+        f"BT /F1 8 Tf {x} {_TOP - 14} Td ({escape_text(f'Fichier : {label} ({part}/{parts})')}) Tj ET",
+        f"BT /F1 7 Tf {x} {_FOOTER_Y} Td (Page {page_num}/{total_pages}) Tj ET",
+    )).encode("ascii")
+
+
+def write_fragmented_report(
+    pdf_path: str,
+    title: str,
+    info_lines: Iterable[str],
+    sections: List[Tuple[str, str]],
+    cancel_check: Optional[CancelCheck] = None,
+) -> Tuple[int, int]:
+    """
+    Assemble `sections` ((libellé, fragment), dans l'ordre) en un rapport :
+    page 1 = sommaire (infos, lignes et pages de chaque section), puis les
+    pages de chaque fragment, recopiées telles quelles. Retourne (lignes, pages).
+    """
+    indexes = []
+    for label, fragment in sections:
+        index = read_fragment_index(fragment)
+        if index is None:
+            raise ValueError(f"Fragment PDF illisible pour {label} : {fragment}")
+        indexes.append(index)
+    total_lines = sum(index["lines"] for index in indexes)
+    total_pages = 1 + sum(len(index["lengths"]) for index in indexes)
+    summary: List[Tuple[str, int, int, int]] = []
+    page_num = 2
+    for (label, _), index in zip(sections, indexes):
+        count = len(index["lengths"])
+        summary.append((label, index["lines"], page_num, page_num + count - 1))
+        page_num += count
+    info_lines = list(info_lines) + [f"Lignes totales : {total_lines}", f"Pages : {total_pages}"]
+
+    tmp_path = f"{pdf_path}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            w = PdfWriter(f)
+            catalog_id = w.reserve()
+            pages_id = w.reserve()
+            font_id = w.add_object("<< /Type /Font /Subtype /Type1 /BaseFont /Courier >>")
+            resources_id = w.add_object(f"<< /Font << /F1 {font_id} 0 R >> >>")
+            page_dict = (f"<< /Type /Page /Parent {pages_id} 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+                         f"/Resources {resources_id} 0 R /Contents ")
+            cover_id = w.add_stream(_cover_content(title, info_lines, summary, total_pages))
+            page_ids = [w.add_object(f"{page_dict}{cover_id} 0 R >>")]
+
+            for (label, fragment), index in zip(sections, indexes):
+                lengths = index["lengths"]
+                body_filter = _FLATE if index["flate"] else ""
+                with open(fragment, "rb") as frag:
+                    for part, length in enumerate(lengths, 1):
+                        if part % 500 == 0:
+                            _checkpoint(0, 0, None, cancel_check)
+                        body_id = w.add_stream(frag.read(length), body_filter)
+                        banner_id = w.add_stream(_banner_content(
+                            title, label, len(page_ids) + 1, total_pages, part, len(lengths)))
+                        page_ids.append(w.add_object(f"{page_dict}[{banner_id} 0 R {body_id} 0 R] >>"))
+
+            kids = " ".join(f"{pid} 0 R" for pid in page_ids)
+            w.add_object(f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>", pages_id)
+            w.add_object(f"<< /Type /Catalog /Pages {pages_id} 0 R >>", catalog_id)
+            w.finish(catalog_id)
+        os.replace(tmp_path, pdf_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return total_lines, total_pages
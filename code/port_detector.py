@@ -7,13 +7,27 @@ un disque quelconque sur ce port. On compare l'ensemble des périphériques
 USB visibles avant/après pour repérer le nouveau venu, puis on lit sa
 propriété udev ID_PATH : cette valeur identifie le port physique et reste
 stable quel que soit le disque qui y sera branché par la suite.
+
+Quand le moniteur udev (device_monitor) est actif, l'assistant ne sonde
+plus rien : il s'abonne aux uevents et rend la main dès que l'événement
+"add" portant ID_PATH a été traité, sans délai de stabilisation fixe.
+
+Pour les hubs à nombreux ports, learn_port_sequence() apprend tout un hub
+en une passe : l'opérateur branche une clé sur chaque port, dans l'ordre,
+et l'on relève la liste ordonnée des ID_PATH.
 """
 from __future__ import annotations
 
+import queue
+import threading
 import time
-from typing import Callable, Optional
+from typing import Callable, List, Optional
 
-from utils import DiskInfo, list_block_devices, snapshot_usb_devnames
+from device_monitor import DeviceMonitor, get_device_monitor
+from utils import DiskInfo, list_block_devices, snapshot_usb_devnames, usb_port_key
+
+# Intervalle de vérification de l'annulation pendant l'attente d'un uevent
+_CANCEL_POLL = 0.2
 
 
 class DetectionTimeout(Exception):
@@ -24,6 +38,11 @@ class DetectionCancelled(Exception):
     """Levée quand l'utilisateur annule la détection en cours."""
 
 
+def _active_monitor() -> Optional[DeviceMonitor]:
+    monitor = get_device_monitor()
+    return monitor if monitor is not None and monitor.running else None
+
+
 def wait_for_unplugged(
     timeout: int = 60,
     poll_interval: float = 1.0,
@@ -35,10 +54,38 @@ def wait_for_unplugged(
     d'obtenir une base propre avant de demander à l'utilisateur de brancher
     le disque de test. Retourne l'ensemble (vide, idéalement) des devnames
     USB restants au bout du délai — utilisé tel quel comme référence.
+
+    Avec le moniteur udev, on est réveillé par chaque événement "remove" ;
+    sinon, on sonde toutes les `poll_interval` secondes.
     """
-    deadline = time.time() + timeout
+    deadline = time.monotonic() + timeout
+    monitor = _active_monitor()
+    if monitor is not None:
+        changed = threading.Event()
+
+        def on_event(action: str, _disk: DiskInfo) -> None:
+            if action == "remove":
+                changed.set()
+
+        monitor.add_listener(on_event)
+        try:
+            baseline = {d.devname for d in monitor.snapshot().values()}
+            while baseline and time.monotonic() < deadline and monitor.running:
+                if cancel_check and cancel_check():
+                    raise DetectionCancelled()
+                if status_cb:
+                    status_cb(f"En attente du débranchement ({len(baseline)} disque(s) encore présent(s))...")
+                if changed.wait(_CANCEL_POLL):
+                    changed.clear()
+                    baseline = {d.devname for d in monitor.snapshot().values()}
+            if not baseline or time.monotonic() >= deadline:
+                return baseline
+        finally:
+            monitor.remove_listener(on_event)
+        # Moniteur arrêté en cours d'attente : on termine par sondage
+
     baseline = snapshot_usb_devnames()
-    while baseline and time.time() < deadline:
+    while baseline and time.monotonic() < deadline:
         if cancel_check and cancel_check():
             raise DetectionCancelled()
         if status_cb:
@@ -48,37 +95,86 @@ def wait_for_unplugged(
     return baseline
 
 
+def _wait_for_add_event(
+    monitor: DeviceMonitor,
+    baseline: set,
+    deadline: float,
+    cancel_check: Optional[Callable[[], bool]],
+    status_cb: Optional[Callable[[str], None]],
+) -> Optional[DiskInfo]:
+    """
+    Attend l'uevent "add" d'un disque absent de `baseline`. Le moniteur ne
+    transmet que des disques dont ID_PATH est déjà renseigné (événement émis
+    par udev après application des règles) : aucun délai de stabilisation
+    n'est nécessaire. Retourne None si le moniteur s'arrête en cours de route.
+    """
+    arrivals: "queue.Queue[DiskInfo]" = queue.Queue()
+
+    def on_event(action: str, disk: DiskInfo) -> None:
+        if action == "add" and disk.devname not in baseline:
+            arrivals.put(disk)
+
+    monitor.add_listener(on_event)
+    try:
+        # Disque branché entre la prise de référence et l'abonnement
+        for disk in monitor.snapshot().values():
+            if disk.devname not in baseline:
+                return disk
+        if status_cb:
+            status_cb("En attente du branchement du disque de test...")
+        while monitor.running:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise DetectionTimeout(
+                    "Aucun nouveau disque USB détecté dans le délai imparti."
+                )
+            if cancel_check and cancel_check():
+                raise DetectionCancelled()
+            try:
+                return arrivals.get(timeout=min(_CANCEL_POLL, remaining))
+            except queue.Empty:
+                continue
+        return None
+    finally:
+        monitor.remove_listener(on_event)
+
+
 def wait_for_new_disk(
     baseline: set,
     timeout: int = 60,
     poll_interval: float = 1.0,
-    settle_delay: float = 2.0,
     cancel_check: Optional[Callable[[], bool]] = None,
     status_cb: Optional[Callable[[str], None]] = None,
 ) -> DiskInfo:
     """
-    Attend l'apparition d'un nouveau disque USB par rapport à `baseline`.
-    Retourne le DiskInfo correspondant une fois détecté (après un court
-    délai de stabilisation pour laisser udev renseigner ID_PATH/modèle/série).
+    Attend l'apparition d'un nouveau disque USB par rapport à `baseline`
+    et retourne son DiskInfo dès que son ID_PATH est connu.
+
+    Avec le moniteur udev, le retour a lieu dès le traitement de l'uevent
+    "add" ; sans lui, on sonde toutes les `poll_interval` secondes et l'on
+    relit l'inventaire jusqu'à ce que udev ait renseigné ID_PATH.
 
     Lève DetectionTimeout si rien n'apparaît dans le délai imparti, ou
     DetectionCancelled si cancel_check() retourne True entre-temps.
     """
-    deadline = time.time() + timeout
-    while time.time() < deadline:
+    deadline = time.monotonic() + timeout
+    monitor = _active_monitor()
+    if monitor is not None:
+        disk = _wait_for_add_event(monitor, baseline, deadline, cancel_check, status_cb)
+        if disk is not None:
+            return disk
+        # Moniteur arrêté en cours d'attente : on termine par sondage
+
+    while time.monotonic() < deadline:
         if cancel_check and cancel_check():
             raise DetectionCancelled()
 
-        current = snapshot_usb_devnames()
-        new_names = current - baseline
+        new_names = snapshot_usb_devnames() - baseline
         if new_names:
-            # Laisse le temps au noyau/udev de finir d'énumérer le périphérique
-            time.sleep(settle_delay)
-            disks = list_block_devices(usb_only=True)
-            for disk in disks:
+            for disk in list_block_devices(usb_only=True):
                 if disk.devname in new_names and disk.id_path:
                     return disk
-            # ID_PATH pas encore prêt : on retente au prochain tour
+            # ID_PATH pas encore publié par udev : on retente au prochain tour
         if status_cb:
             status_cb("En attente du branchement du disque de test...")
         time.sleep(poll_interval)
@@ -107,4 +203,53 @@ def run_detection_wizard(
     )
     return wait_for_new_disk(
         baseline, timeout=timeout, cancel_check=cancel_check, status_cb=status_cb
-    )
\ No newline at end of file
+    )
+
+
+def learn_port_sequence(
+    max_ports: int = 0,
+    timeout: int = 120,
+    finish_check: Optional[Callable[[], bool]] = None,
+    cancel_check: Optional[Callable[[], bool]] = None,
+    status_cb: Optional[Callable[[str], None]] = None,
+    port_cb: Optional[Callable[[int, DiskInfo], None]] = None,
+) -> List[DiskInfo]:
+    """
+    Apprentissage d'un hub complet : l'opérateur branche une clé sur chaque
+    port, dans l'ordre, SANS retirer les précédentes. Chaque nouveau disque
+    (un seul par port : un ID_PATH déjà vu est ignoré) est ajouté à la
+    liste et signalé via port_cb(index, disk), index commençant à 1.
+
+    S'arrête quand `max_ports` ports ont été relevés (0 = sans limite), quand
+    finish_check() retourne True (bouton « Terminer ») ou après `timeout`
+    secondes sans nouveau branchement ; retourne alors la liste ordonnée.
+    Lève DetectionCancelled si cancel_check() retourne True.
+    Bloquant : à appeler depuis un thread d'arrière-plan.
+    """
+    learned: List[DiskInfo] = []
+    seen_ports = set()
+    baseline = snapshot_usb_devnames()
+
+    def interrupted() -> bool:
+        return bool((cancel_check and cancel_check()) or (finish_check and finish_check()))
+
+    while not max_ports or len(learned) < max_ports:
+        if status_cb:
+            status_cb(f"Branchez une clé sur le port n°{len(learned) + 1}...")
+        try:
+            disk = wait_for_new_disk(baseline, timeout=timeout, cancel_check=interrupted)
+        except DetectionCancelled:
+            if cancel_check and cancel_check():
+                raise
+            break  # « Terminer » demandé par l'opérateur
+        except DetectionTimeout:
+            break
+        baseline.add(disk.devname)
+        port_key = usb_port_key(disk.id_path)
+        if port_key in seen_ports:
+            continue
+        seen_ports.add(port_key)
+        learned.append(disk)
+        if port_cb:
+            port_cb(len(learned), disk)
+    return learned
@@ -0,0 +1,315 @@
+"""
+production.py – Mode production : duplication en série sans opérateur.
+
+En usage normal, chaque clonage demande deux confirmations (boîte oui/non
+puis saisie de EFFACER) : l'opérateur doit rester devant l'écran et ces
+dialogues deviennent le goulot dès que l'on duplique des séries de clés.
+
+Une fois « armé » depuis l'administration, le mode production fige, pour
+chaque poste, la clé maître présente sur son port source, puis surveille
+les ports destination (uevents udev, ou sondage si netlink est
+indisponible). Chaque clé NOUVELLEMENT insérée sur un port destination
+est contrôlée (taille suffisante, ni la clé maître, ni un disque du
+système), clonée, vérifiée, puis libérée (éjectée) sans aucune boîte de
+dialogue. Les clés déjà en place au moment de l'armement sont ignorées
+jusqu'à leur retrait.
+
+La production se désarme d'elle-même une fois l'objectif atteint.
+L'indicateur suivi est le nombre de clés produites par heure.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from device_monitor import get_device_monitor
+from job_manager import STATE_SUCCESS, CloneOptions, JobManager, JobManagerError, Station, StationJob
+from log_handler import log_info, log_warning
+from utils import DiskInfo, find_disk_by_id_path, is_system_disk, release_disk, usb_port_key
+
+_POLL_INTERVAL = 2.0
+
+
+@dataclass
+class ProductionStats:
+    """Compteurs d'une série de production."""
+    target: int = 0                 # 0 = illimité
+    produced: int = 0
+    failed: int = 0
+    rejected: int = 0
+    started_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    @property
+    def remaining(self) -> Optional[int]:
+        return max(self.target - self.produced, 0) if self.target else None
+
+    @property
+    def sticks_per_hour(self) -> float:
+        elapsed = (self.finished_at or time.time()) - self.started_at
+        return self.produced * 3600 / elapsed if elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        count = f"{self.produced}/{self.target}" if self.target else str(self.produced)
+        parts = [f"{count} clé(s) produite(s)", f"{self.sticks_per_hour:.0f} clés/h"]
+        if self.failed:
+            parts.append(f"{self.failed} échec(s)")
+        if self.rejected:
+            parts.append(f"{self.rejected} refusée(s)")
+        return " · ".join(parts)
+
+
+class ProductionError(Exception):
+    """Levée quand la production ne peut pas être armée (aucune clé maître...)."""
+
+
+def _real_serial(serial: str) -> str:
+    """Numéro de série exploitable, "" s'il est absent (utils le note "N/A")."""
+    return "" if serial in ("", "N/A") else serial
+
+
+@dataclass
+class _Master:
+    """Clé maître figée à l'armement pour un poste."""
+    devname: str
+    serial: str
+    size_bytes: int
+    model: str
+
+    def is_same_disk(self, disk: DiskInfo) -> bool:
+        """Même clé : par numéro de série si les deux en ont un, sinon périphérique, taille et modèle."""
+        if _real_serial(self.serial) and _real_serial(disk.serial):
+            return disk.serial == self.serial
+        return (disk.devname == self.devname and disk.size_bytes == self.size_bytes
+                and disk.model == self.model)
+
+
+class ProductionRun:
+    """
+    Pilote une série de production au-dessus du JobManager. Les callbacks
+    `on_change` et `on_log` sont appelés depuis des threads de travail.
+    """
+
+    def __init__(
+        self,
+        jobs: JobManager,
+        on_change: Optional[Callable[[], None]] = None,
+        on_log: Optional[Callable[[str], None]] = None,
+    ) -> None:
+        self._jobs = jobs
+        self._on_change = on_change
+        self._on_log = on_log
+        self._lock = threading.Lock()
+        self._armed = False
+        self._stations: List[Station] = []
+        self._masters: Dict[str, _Master] = {}
+        # Poste -> disque destination déjà traité (ou refusé), en attente de retrait
+        self._awaiting_removal: Dict[str, str] = {}
+        self._in_flight: Dict[str, str] = {}
+        self._stats = ProductionStats()
+        self._monitor = None
+        self._stop_event = threading.Event()
+        self._poll_thread: Optional[threading.Thread] = None
+        # Abonnement permanent : un clonage lancé avant un désarmement est compté
+        jobs.add_listener(self._on_job_update)
+
+    # -- Consultation -------------------------------------------------------
+    @property
+    def armed(self) -> bool:
+        return self._armed
+
+    @property
+    def stats(self) -> ProductionStats:
+        return self._stats
+
+    # -- Armement -------------------------------------------------------------
+    def arm(self, stations: List[Station], target: int = 0) -> None:
+        """
+        Fige la clé maître de chaque poste complet et commence à surveiller
+        les ports destination. Lève ProductionError si aucun poste n'a de
+        clé maître branchée, ou si la production est déjà armée.
+        """
+        if self._armed:
+            raise ProductionError("La production est déjà armée.")
+        masters: Dict[str, _Master] = {}
+        armed_stations: List[Station] = []
+        awaiting: Dict[str, str] = {}
+        for station in stations:
+            if not station.configured:
+                continue
+            source = self._find(station.source_id_path)
+            if source is None:
+                self._log(f"{station.name} : aucune clé maître sur le port source, poste ignoré.")
+                continue
+            masters[station.name] = _Master(source.devname, source.serial, source.size_bytes, source.model)
+            armed_stations.append(station)
+            present = self._find(station.dest_id_path)
+            if present is not None:
+                awaiting[station.name] = present.devname
+        if not armed_stations:
+            raise ProductionError("Aucun poste n'a de clé maître branchée sur son port source.")
+
+        with self._lock:
+            self._stations = armed_stations
+            self._masters = masters
+            self._awaiting_removal = awaiting
+            self._in_flight = {}
+            self._stats = ProductionStats(target=max(int(target), 0))
+            self._armed = True
+        self._monitor = get_device_monitor()
+        if self._monitor is not None and self._monitor.running:
+            self._monitor.add_listener(self._on_device_event)
+        else:
+            self._monitor = None
+            self._stop_event.clear()
+            self._poll_thread = threading.Thread(target=self._poll, daemon=True, name="production-poll")
+            self._poll_thread.start()
+
+        objective = f"objectif {target} clé(s)" if target else "sans objectif"
+        names = ", ".join(s.name for s in armed_stations)
+        self._log(f"Production armée ({objective}) sur : {names}.")
+        for name in awaiting:
+            self._log(f"{name} : retirez la clé déjà présente en destination pour commencer.")
+        self._changed()
+
+    def disarm(self, reason: str = "") -> None:
+        """Arrête la surveillance ; les clonages en cours vont à leur terme."""
+        with self._lock:
+            if not self._armed:
+                return
+            self._armed = False
+            self._stats.finished_at = time.time()
+        if self._monitor is not None:
+            self._monitor.remove_listener(self._on_device_event)
+            self._monitor = None
+        self._stop_event.set()
+        self._log(f"Production désarmée{f' ({reason})' if reason else ''} : {self._stats.summary()}.")
+        log_info(f"Production terminée : {self._stats.summary()}")
+        self._changed()
+
+    # -- Détection des insertions -----------------------------------------------
+    def _find(self, id_path: Optional[str]) -> Optional[DiskInfo]:
+        if not id_path:
+            return None
+        monitor = self._monitor
+        if monitor is not None and monitor.running:
+            return monitor.find_by_id_path(id_path)
+        return find_disk_by_id_path(id_path)
+
+    def _station_for_dest(self, id_path: str) -> Optional[Station]:
+        key = usb_port_key(id_path)
+        for station in self._stations:
+            if station.dest_id_path == id_path or usb_port_key(station.dest_id_path) == key:
+                return station
+        return None
+
+    def _on_device_event(self, action: str, disk: DiskInfo) -> None:
+        station = self._station_for_dest(disk.id_path)
+        if station is None:
+            return
+        if action == "remove":
+            self._on_removed(station, disk.devname)
+        else:
+            self._consider(station, disk)
+
+    def _poll(self) -> None:
+        while not self._stop_event.wait(_POLL_INTERVAL):
+            for station in list(self._stations):
+                disk = find_disk_by_id_path(station.dest_id_path)
+                if disk is None:
+                    self._on_removed(station, None)
+                else:
+                    self._consider(station, disk)
+
+    def _on_removed(self, station: Station, devname: Optional[str]) -> None:
+        with self._lock:
+            waiting = self._awaiting_removal.get(station.name)
+            if waiting is None or (devname is not None and waiting != devname):
+                return
+            del self._awaiting_removal[station.name]
+        self._changed()
+
+    # -- Lancement automatique ----------------------------------------------------
+    def _rejection(self, station: Station, disk: DiskInfo) -> str:
+        """Motif de refus d'une clé insérée, ou "" si elle peut être clonée."""
+        master = self._masters[station.name]
+        source = self._find(station.source_id_path)
+        if source is None or not master.is_same_disk(source):
+            return "la clé maître a été retirée ou remplacée sur le port source"
+        if disk.devname == master.devname or master.is_same_disk(disk):
+            return "c'est la clé maître"
+        if is_system_disk(disk.devname):
+            return "disque du système"
+        if disk.size_bytes < master.size_bytes:
+            return f"capacité insuffisante ({disk.size_human} < {source.size_human})"
+        return ""
+
+    def _consider(self, station: Station, disk: DiskInfo) -> None:
+        with self._lock:
+            if (not self._armed
+                    or station.name in self._awaiting_removal
+                    or station.name in self._in_flight):
+                return
+            target = self._stats.target
+            if target and self._stats.produced + len(self._in_flight) >= target:
+                return
+            # Réservé tout de suite : un second événement pour la même clé est ignoré
+            self._awaiting_removal[station.name] = disk.devname
+            reason = self._rejection(station, disk)
+            if reason:
+                self._stats.rejected += 1
+            else:
+                self._in_flight[station.name] = disk.devname
+
+        if reason:
+            self._log(f"{station.name} : clé {disk.path} refusée ({reason}). Retirez-la.")
+            log_warning(f"Production : {station.name} : {disk.model} refusée ({reason})")
+            self._changed()
+            return
+
+        source = self._find(station.source_id_path)
+        options = CloneOptions.from_config()
+        options.verify = True
+        try:
+            self._jobs.start(station, source, disk, options, unattended=True)
+        except JobManagerError as e:
+            with self._lock:
+                self._in_flight.pop(station.name, None)
+                self._stats.failed += 1
+            self._log(str(e))
+        self._changed()
+
+    def _on_job_update(self, station_name: str, job: StationJob) -> None:
+        if not job.unattended or job.running:
+            return
+        with self._lock:
+            if self._in_flight.get(station_name) != job.dest.devname:
+                return
+            del self._in_flight[station_name]
+            if job.state == STATE_SUCCESS:
+                self._stats.produced += 1
+            else:
+                self._stats.failed += 1
+            target = self._stats.target
+            done = bool(target) and self._stats.produced >= target and not self._in_flight
+        if job.state == STATE_SUCCESS:
+            if release_disk(job.dest.devname):
+                self._log(f"{station_name} : clé éjectée, vous pouvez la retirer.")
+            else:
+                self._log(f"{station_name} : clé prête, vous pouvez la retirer.")
+        else:
+            self._log(f"{station_name} : échec, mettez la clé de côté.")
+        self._changed()
+        if done:
+            self.disarm("objectif atteint")
+
+    # -- Notifications ----------------------------------------------------------
+    def _log(self, message: str) -> None:
+        if self._on_log:
+            self._on_log(message)
+
+    def _changed(self) -> None:
+        if self._on_change:
+            self._on_change()
@@ -0,0 +1,141 @@
+"""
+scheduler.py – Admission des clonages selon la bande passante USB.
+
+Tous les disques branchés derrière un même hub racine (un bus, "usbN")
+se partagent le débit de ce bus : quatre clonages USB 3 derrière un seul
+contrôleur ne vont pas quatre fois plus vite, ils s'affament les uns les
+autres et finissent tous en retard. L'ordonnanceur connaît la topologie
+(UsbLinkInfo, lue dans sysfs) et n'admet un job que si chaque bus qu'il
+emprunte garde une demande totale sous sa capacité ; sinon le job attend
+en file qu'un autre se termine.
+
+  * capacité d'un bus : débit utile de la vitesse de son hub racine
+    (/sys/bus/usb/devices/usbN/speed), multiplié par la charge maximale
+    configurée (`scheduler_max_bus_load`, 0 = pas d'ordonnancement)
+  * demande d'un job : débit utile du plus lent de ses deux liens USB,
+    plafonnée par la limite de débit du job s'il en a une
+  * un bus inoccupé accepte toujours un job, même trop gourmand : la file
+    ne doit jamais bloquer indéfiniment
+
+Il fournit aussi les indicateurs affichés dans l'administration : débit
+agrégé des jobs en cours et indice d'équité de Jain.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+from utils import DiskInfo, get_root_hub_speed, practical_mb_s_for_speed, usb_practical_mb_s
+
+
+@dataclass
+class BusDemand:
+    """Débit réclamé par un job sur chacun des bus qu'il emprunte (Mo/s)."""
+    per_bus: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def buses(self) -> List[str]:
+        return sorted(self.per_bus)
+
+
+@dataclass
+class SchedulerStats:
+    """Indicateurs de la session de clonage en cours."""
+    running: int = 0
+    queued: int = 0
+    aggregate_mb_s: float = 0.0
+    fairness: Optional[float] = None          # indice de Jain, 1.0 = partage parfait
+    bus_load: Dict[str, float] = field(default_factory=dict)   # demande / capacité
+
+    def summary(self) -> str:
+        parts = [f"{self.running} en cours", f"{self.queued} en attente",
+                 f"débit agrégé {self.aggregate_mb_s:.1f} Mo/s"]
+        if self.fairness is not None:
+            parts.append(f"équité {self.fairness:.2f}")
+        for bus, load in sorted(self.bus_load.items()):
+            parts.append(f"{bus} {load * 100:.0f} %")
+        return " | ".join(parts)
+
+
+def jain_fairness(rates: Iterable[float]) -> Optional[float]:
+    """Indice d'équité de Jain (Σx)² / (n·Σx²) ; None si aucun débit mesuré."""
+    values = [r for r in rates if r >= 0]
+    square_sum = sum(r * r for r in values)
+    if not values or square_sum <= 0:
+        return None
+    return sum(values) ** 2 / (len(values) * square_sum)
+
+
+def job_demand(source: DiskInfo, dest: DiskInfo, max_rate_mb_s: float = 0.0) -> BusDemand:
+    """
+    Débit que le job va réclamer sur chaque bus : celui du plus lent des
+    deux liens (la copie ne peut pas aller plus vite). Un disque non USB
+    ou de vitesse inconnue ne réclame rien.
+    """
+    links = [d.usb for d in (source, dest) if d.usb is not None]
+    rates = [r for r in (usb_practical_mb_s(link) for link in links) if r]
+    if not rates:
+        return BusDemand()
+    rate = min(rates)
+    if max_rate_mb_s > 0:
+        rate = min(rate, max_rate_mb_s)
+    demand = BusDemand()
+    for link in links:
+        # Même bus pour la source et la destination : le débit y passe deux fois
+        demand.per_bus[link.root_hub] = demand.per_bus.get(link.root_hub, 0.0) + rate
+    return demand
+
+
+class BandwidthScheduler:
+    """
+    Décide de l'admission des jobs. Sans état propre : la demande en cours
+    est recalculée à chaque appel à partir des jobs actifs fournis par le
+    JobManager, qui reste seul maître de leur cycle de vie.
+    """
+
+    def __init__(self, max_bus_load: float = 1.0) -> None:
+        self.max_bus_load = max_bus_load
+        self._capacity_cache: Dict[str, Optional[float]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bus_load > 0
+
+    def bus_capacity(self, root_hub: str) -> Optional[float]:
+        """Débit utile (Mo/s) d'un bus, d'après la vitesse de son hub racine."""
+        if root_hub not in self._capacity_cache:
+            speed = get_root_hub_speed(root_hub)
+            self._capacity_cache[root_hub] = practical_mb_s_for_speed(speed) if speed else None
+        return self._capacity_cache[root_hub]
+
+    def load(self, demands: Iterable[BusDemand]) -> Dict[str, float]:
+        """Demande cumulée par bus (Mo/s)."""
+        total: Dict[str, float] = {}
+        for demand in demands:
+            for bus, rate in demand.per_bus.items():
+                total[bus] = total.get(bus, 0.0) + rate
+        return total
+
+    def can_admit(self, demand: BusDemand, running: Iterable[BusDemand]) -> bool:
+        """Vrai si le job tient dans la bande passante restante de chacun de ses bus."""
+        if not self.enabled:
+            return True
+        current = self.load(running)
+        for bus, rate in demand.per_bus.items():
+            used = current.get(bus, 0.0)
+            if used <= 0:
+                continue  # bus libre : on admet toujours au moins un job
+            capacity = self.bus_capacity(bus)
+            if capacity is None:
+                continue
+            if used + rate > capacity * self.max_bus_load:
+                return False
+        return True
+
+    def bus_load_ratio(self, running: Iterable[BusDemand]) -> Dict[str, float]:
+        ratios: Dict[str, float] = {}
+        for bus, rate in self.load(running).items():
+            capacity = self.bus_capacity(bus)
+            if capacity:
+                ratios[bus] = rate / capacity
+        return ratios
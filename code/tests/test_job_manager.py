@@ -0,0 +1,91 @@
+"""
+test_job_manager.py – Issue d'un job conduit par JobManager._run.
+
+Le processus de clonage est remplacé par un faux job dont execute() rend
+directement le verdict : on vérifie l'état final, les métriques et
+l'historique sans toucher à un disque.
+"""
+import asyncio
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import metrics  # noqa: E402
+from clone import JobMetrics, MemorySample  # noqa: E402
+from job_manager import (  # noqa: E402
+    STATE_ERROR,
+    STATE_SUCCESS,
+    CloneOptions,
+    JobManager,
+    Station,
+    StationJob,
+)
+from scheduler import BandwidthScheduler  # noqa: E402
+from utils import DiskInfo  # noqa: E402
+
+
+class _FakeCloneJob:
+    """Tient la place de ProcessCloneJob : execute() renvoie `result`."""
+
+    def __init__(self, result: bool) -> None:
+        self.result = result
+        self.metrics = JobMetrics()
+        self.metrics.memory_before = MemorySample(rss_bytes=1 << 20, page_cache_bytes=0, dirty_bytes=0)
+        self.paused = False
+
+    async def execute(self, source, dest, *, on_copied=None, **kwargs) -> bool:
+        if on_copied:
+            on_copied()
+        return self.result
+
+    def is_cancelled(self) -> bool:
+        return False
+
+    def set_rate_limit(self, max_rate_mb_s) -> None:
+        pass
+
+
+def _disk(devname: str) -> DiskInfo:
+    return DiskInfo(devname=devname, path=f"/dev/{devname}", size_bytes=8 << 30,
+                    model="Stick", serial=f"SN-{devname}", tran="usb",
+                    id_path=f"pci-0000:00:14.0-usb-0:{devname}")
+
+
+class RunOutcomeTest(unittest.TestCase):
+
+    def _run(self, result: bool, verify: bool) -> tuple:
+        manager = JobManager(scheduler=BandwidthScheduler(1.0))
+        job = StationJob(station=Station("Poste 1"), source=_disk("sda"), dest=_disk("sdb"),
+                         options=CloneOptions(verify=verify), job=_FakeCloneJob(result))
+        with mock.patch("job_manager.history.record") as record:
+            asyncio.run(manager._run(job))
+        return job, record.call_args[0][0]
+
+    def test_success_with_verify(self) -> None:
+        before = metrics.CLONES_FINISHED.value(result=STATE_SUCCESS)
+        job, entry = self._run(result=True, verify=True)
+        self.assertEqual(job.state, STATE_SUCCESS, job.message)
+        self.assertTrue(job.verified)
+        self.assertEqual(entry.result, STATE_SUCCESS)
+        self.assertEqual(metrics.CLONES_FINISHED.value(result=STATE_SUCCESS), before + 1)
+        self.assertTrue(any("Mémoire" in line for line in job.log_lines))
+
+    def test_success_without_verify(self) -> None:
+        job, entry = self._run(result=True, verify=False)
+        self.assertEqual(job.state, STATE_SUCCESS, job.message)
+        self.assertIsNone(job.verified)
+
+    def test_verify_mismatch(self) -> None:
+        before = metrics.VERIFY_FAILURES.value()
+        job, entry = self._run(result=False, verify=True)
+        self.assertEqual(job.state, STATE_ERROR)
+        self.assertFalse(job.verified)
+        self.assertNotIn("inattendue", job.message)
+        self.assertEqual(metrics.VERIFY_FAILURES.value(), before + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+"""
+test_orchestrator.py – API asyncio : annulation structurée et attente d'un disque.
+
+Le moteur de clonage et le moniteur udev sont remplacés par des doublures :
+aucun disque ni socket netlink n'est nécessaire.
+"""
+import asyncio
+import os
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import orchestrator  # noqa: E402
+from clone import CloneError, CloneJob  # noqa: E402
+from utils import DiskInfo  # noqa: E402
+
+
+class _BlockingJob(CloneJob):
+    """run() bloque comme dd jusqu'à l'annulation du job."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.finished = threading.Event()
+
+    def run(self, source_dev: str, dest_dev: str, **options) -> None:
+        try:
+            self._cancel_event.wait(5.0)
+            raise CloneError("Clonage annulé par l'utilisateur.")
+        finally:
+            self.finished.set()
+
+
+class _FakeMonitor:
+    """Doublure de DeviceMonitor : les événements sont émis depuis un autre thread."""
+    running = True
+
+    def __init__(self, disks=()) -> None:
+        self._disks = {d.id_path: d for d in disks}
+        self._listeners = []
+
+    def snapshot(self):
+        return dict(self._disks)
+
+    def add_listener(self, listener) -> None:
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener) -> None:
+        self._listeners.remove(listener)
+
+    def emit(self, action: str, disk: DiskInfo) -> None:
+        def run() -> None:
+            for listener in list(self._listeners):
+                listener(action, disk)
+        threading.Thread(target=run).start()
+
+
+def _disk(devname: str, port: int) -> DiskInfo:
+    return DiskInfo(devname=devname, path=f"/dev/{devname}", size_bytes=8 << 30,
+                    model="Stick", serial=f"SN-{devname}", tran="usb",
+                    id_path=f"pci-0000:00:14.0-usb-0:{port}:1.0-scsi-0:0:0:0")
+
+
+class CloneCancellationTest(unittest.TestCase):
+
+    def test_cancel_waits_for_the_engine(self) -> None:
+        job = _BlockingJob()
+
+        async def scenario() -> None:
+            task = asyncio.create_task(orchestrator.clone("sda", "sdb", job))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            self.assertTrue(job.is_cancelled())
+            self.assertTrue(job.finished.is_set())
+
+        asyncio.run(scenario())
+
+
+class WaitForDeviceTest(unittest.TestCase):
+
+    def test_returns_present_disk(self) -> None:
+        disk = _disk("sdc", 1)
+        monitor = _FakeMonitor([disk])
+        found = asyncio.run(orchestrator.wait_for_device(disk.id_path, monitor=monitor))
+        self.assertEqual(found, disk)
+        self.assertEqual(monitor._listeners, [])
+
+    def test_wakes_on_add_event(self) -> None:
+        monitor = _FakeMonitor()
+        wanted, other = _disk("sdd", 2), _disk("sde", 3)
+
+        async def scenario() -> DiskInfo:
+            waiter = asyncio.create_task(orchestrator.wait_for_device(wanted.id_path, timeout=5.0,
+                                                                      monitor=monitor))
+            await asyncio.sleep(0.05)
+            monitor.emit("add", other)
+            monitor.emit("add", wanted)
+            return await waiter
+
+        self.assertEqual(asyncio.run(scenario()), wanted)
+
+    def test_timeout(self) -> None:
+        with self.assertRaises(asyncio.TimeoutError):
+            asyncio.run(orchestrator.wait_for_device("absent", timeout=0.05, monitor=_FakeMonitor()))
+
+
+if __name__ == "__main__":
+    unittest.main()
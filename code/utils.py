@@ -7,14 +7,23 @@ la propriété udev ID_PATH, qui identifie la topologie physique du port USB
 disque différent sur le même port. C'est ce qui permet de configurer une
 bonne fois pour toutes "le port de gauche = source" et "le port de droite
 = destination" depuis l'interface d'administration.
+
+L'inventaire lit directement sysfs (/sys/block/*) et la base de données
+udev (/run/udev/data/b<maj>:<min>) en une seule passe, sans lancer de
+sous-processus ; les outils lsblk / udevadm / blockdev ne servent plus que
+de solution de repli quand la base udev est absente.
 """
 from __future__ import annotations
 
 import json
+import os
 import re
 import subprocess
+import time
 from dataclasses import dataclass
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
+
+from metrics import DEVICE_ENUMERATION_SECONDS
 
 
 # ── Modèle de données ──────────────────────────────────────────────────────
@@ -27,12 +36,36 @@ class DiskInfo:
     serial: str
     tran: str               # "usb", "sata", ...
     id_path: str            # identifiant udev stable du port physique
+    usb: Optional[UsbLinkInfo] = None   # lien USB négocié (None si non USB)
 
     @property
     def size_human(self) -> str:
         return human_size(self.size_bytes)
 
 
+@dataclass
+class UsbLinkInfo:
+    """Lien USB d'un disque, tel que négocié à l'énumération (sysfs)."""
+    speed_mbps: float       # 480 = USB 2 high-speed, 5000 = USB 3 SuperSpeed...
+    version: str            # version annoncée par le périphérique, ex: "3.20"
+    sysname: str            # nom du périphérique USB, ex: "2-1.3" (bus-chaîne de ports)
+    root_hub: str           # hub racine partagé, ex: "usb2"
+    controller: str         # contrôleur hôte, ex: "0000:00:14.0"
+
+    @property
+    def hub_chain(self) -> List[str]:
+        """Hubs traversés depuis le hub racine, ex: ["2-1"] pour "2-1.3"."""
+        bus, _, ports = self.sysname.partition("-")
+        parts = ports.split(".")
+        return [f"{bus}-{'.'.join(parts[:i])}" for i in range(1, len(parts))]
+
+    @property
+    def label(self) -> str:
+        if self.speed_mbps >= 1000:
+            return f"USB {self.version or '?'} · {self.speed_mbps / 1000:g} Gb/s"
+        return f"USB {self.version or '?'} · {self.speed_mbps:g} Mb/s"
+
+
 # ── Helpers généraux ────────────────────────────────────────────────────────
 def human_size(num_bytes: int) -> str:
     """Convertit un nombre d'octets en chaîne lisible (Go/To)."""
@@ -54,6 +87,64 @@ def _run(cmd: List[str], timeout: int = 10) -> str:
     return result.stdout
 
 
+# ── Base de données udev / sysfs ────────────────────────────────────────────
+UDEV_DATA_DIR = "/run/udev/data"
+SYS_BLOCK_DIR = "/sys/block"
+
+# Périphériques bloc qui ne sont jamais des disques physiques
+_VIRTUAL_BLOCK_PREFIXES = ("loop", "ram", "zram", "dm-", "md", "nbd", "sr")
+
+
+def read_udev_properties(devname: str) -> Optional[Dict[str, str]]:
+    """
+    Propriétés udev d'un périphérique bloc, lues dans la base udev
+    (/run/udev/data/b<maj>:<min>, lignes "E:CLE=VALEUR") — équivalent de
+    `udevadm info --query=property`, sans sous-processus. None si la base
+    n'a pas d'entrée pour ce périphérique.
+    """
+    numbers = get_dev_numbers(devname)
+    if not numbers:
+        return None
+    props: Dict[str, str] = {}
+    try:
+        with open(f"{UDEV_DATA_DIR}/b{numbers[0]}:{numbers[1]}", "r", errors="replace") as f:
+            for line in f:
+                if line.startswith("E:"):
+                    key, _, value = line[2:].rstrip("\n").partition("=")
+                    props[key] = value
+    except OSError:
+        return None
+    return props
+
+
+def _sysfs_list_block_devices(usb_only: bool) -> Optional[List[DiskInfo]]:
+    """
+    Inventaire des disques en une passe sur /sys/block et la base udev.
+    Retourne None si la base udev est indisponible (repli sur lsblk).
+    """
+    if not os.path.isdir(UDEV_DATA_DIR):
+        return None
+    try:
+        names = sorted(os.listdir(SYS_BLOCK_DIR))
+    except OSError:
+        return None
+
+    disks: List[DiskInfo] = []
+    for devname in names:
+        if devname.startswith(_VIRTUAL_BLOCK_PREFIXES):
+            continue
+        if not os.path.exists(f"{SYS_BLOCK_DIR}/{devname}/device"):
+            continue
+        props = read_udev_properties(devname) or {}
+        if props.get("ID_CDROM"):
+            continue
+        disk = disk_info_from_properties(devname, props)
+        if usb_only and disk.tran != "usb":
+            continue
+        disks.append(disk)
+    return disks
+
+
 # ── Listing des disques ─────────────────────────────────────────────────────
 def list_block_devices(usb_only: bool = True) -> List[DiskInfo]:
     """
@@ -61,7 +152,22 @@ def list_block_devices(usb_only: bool = True) -> List[DiskInfo]:
     noyau, avec leurs métadonnées. Si usb_only=True (par défaut), ne renvoie
     que les disques connectés en USB — c'est le cas d'usage de la borne :
     on ne veut jamais proposer accidentellement le disque système interne.
+
+    Lecture directe de sysfs + base udev ; repli sur lsblk/udevadm si la
+    base udev n'est pas disponible.
     """
+    start = time.monotonic()
+    try:
+        disks = _sysfs_list_block_devices(usb_only)
+        if disks is not None:
+            return disks
+        return _lsblk_list_block_devices(usb_only)
+    finally:
+        DEVICE_ENUMERATION_SECONDS.observe(time.monotonic() - start)
+
+
+def _lsblk_list_block_devices(usb_only: bool = True) -> List[DiskInfo]:
+    """Inventaire historique via `lsblk` + un `udevadm info` par disque."""
     out = _run([
         "lsblk", "-J", "-b", "-o",
         "NAME,PATH,SIZE,MODEL,SERIAL,TRAN,TYPE,RM",
@@ -95,16 +201,64 @@ def list_block_devices(usb_only: bool = True) -> List[DiskInfo]:
             serial=serial or "N/A",
             tran=tran,
             id_path=id_path,
+            usb=get_usb_link_info(devname) if tran == "usb" else None,
         ))
     return disks
 
 
+_UDEV_ESCAPE_RE = re.compile(r"\\x([0-9a-fA-F]{2})")
+
+
+def _decode_udev_string(value: str) -> str:
+    """Décode les échappements \\xNN des propriétés udev *_ENC (ex: ID_MODEL_ENC)."""
+    return _UDEV_ESCAPE_RE.sub(lambda m: chr(int(m.group(1), 16)), value)
+
+
+def disk_info_from_properties(devname: str, props: Dict[str, str]) -> DiskInfo:
+    """
+    Construit un DiskInfo à partir des propriétés udev d'un disque (reçues
+    dans un uevent ou lues dans la base udev), sans lancer de sous-processus.
+    La taille est lue dans sysfs (/sys/block/<dev>/size, en secteurs de 512 o).
+    """
+    devname = devname.lstrip("/").removeprefix("dev/")
+    try:
+        with open(f"/sys/block/{devname}/size", "r") as f:
+            size_bytes = int(f.read().strip()) * 512
+    except (OSError, ValueError):
+        size_bytes = 0
+    if props.get("ID_MODEL_ENC"):
+        model = _decode_udev_string(props["ID_MODEL_ENC"]).strip()
+    else:
+        model = props.get("ID_MODEL", "").replace("_", " ").strip()
+    if not model:
+        try:
+            with open(f"/sys/block/{devname}/device/model", "r") as f:
+                model = f.read().strip()
+        except OSError:
+            pass
+    serial = (props.get("ID_SERIAL_SHORT") or "").strip()
+    tran = (props.get("ID_BUS") or "").lower()
+    return DiskInfo(
+        devname=devname,
+        path=f"/dev/{devname}",
+        size_bytes=size_bytes,
+        model=model or "Inconnu",
+        serial=serial or "N/A",
+        tran=tran,
+        id_path=props.get("ID_PATH", ""),
+        usb=get_usb_link_info(devname) if tran == "usb" else None,
+    )
+
+
 def get_id_path(devname: str) -> Optional[str]:
     """
     Retourne la propriété udev ID_PATH du périphérique (identifiant stable
     du port physique), ou None si indisponible.
     """
     devname = devname.lstrip("/").removeprefix("dev/")
+    props = read_udev_properties(devname)
+    if props is not None:
+        return props.get("ID_PATH") or None
     out = _run(["udevadm", "info", "--query=property", f"--name=/dev/{devname}"])
     for line in out.splitlines():
         if line.startswith("ID_PATH="):
@@ -112,14 +266,244 @@ def get_id_path(devname: str) -> Optional[str]:
     return None
 
 
+# ── Topologie USB (sysfs) ──────────────────────────────────────────────────
+# Débit utile réaliste d'un disque selon la vitesse négociée du lien (Mo/s),
+# protocole USB Mass Storage compris : bien en dessous du débit brut.
+_USB_PRACTICAL_MB_S = (
+    (20000, 1500.0),
+    (10000, 800.0),
+    (5000, 400.0),
+    (480, 35.0),
+    (12, 1.0),
+    (0, 0.15),
+)
+
+
+def get_usb_link_info(devname: str) -> Optional[UsbLinkInfo]:
+    """
+    Remonte l'arborescence sysfs du disque jusqu'au périphérique USB qui le
+    porte et lit sa vitesse négociée (`speed`), sa version (`version`), son
+    hub racine (`usb<busnum>`) et le contrôleur hôte qui le pilote.
+    """
+    devname = devname.lstrip("/").removeprefix("dev/")
+    try:
+        path = os.path.realpath(f"/sys/block/{devname}/device")
+    except OSError:
+        return None
+    while path and path != "/":
+        if os.path.isfile(os.path.join(path, "speed")) and os.path.isfile(os.path.join(path, "busnum")):
+            break
+        path = os.path.dirname(path)
+    else:
+        return None
+    try:
+        with open(os.path.join(path, "speed"), "r") as f:
+            speed = float(f.read().strip())
+        with open(os.path.join(path, "busnum"), "r") as f:
+            busnum = int(f.read().strip())
+        version = ""
+        if os.path.isfile(os.path.join(path, "version")):
+            with open(os.path.join(path, "version"), "r") as f:
+                version = f.read().strip()
+    except (OSError, ValueError):
+        return None
+
+    # Le hub racine "usbN" est un ancêtre direct ; son parent est le contrôleur.
+    root_path = path
+    while root_path != "/" and not os.path.basename(root_path).startswith("usb"):
+        root_path = os.path.dirname(root_path)
+    return UsbLinkInfo(
+        speed_mbps=speed,
+        version=version,
+        sysname=os.path.basename(path),
+        root_hub=f"usb{busnum}",
+        controller=os.path.basename(os.path.dirname(root_path)) if root_path != "/" else "",
+    )
+
+
+def practical_mb_s_for_speed(speed_mbps: float) -> float:
+    """Débit utile plafond (Mo/s) d'un lien USB négocié à `speed_mbps`."""
+    for min_speed, mb_s in _USB_PRACTICAL_MB_S:
+        if speed_mbps >= min_speed:
+            return mb_s
+    return _USB_PRACTICAL_MB_S[-1][1]
+
+
+def usb_practical_mb_s(link: Optional[UsbLinkInfo]) -> Optional[float]:
+    """Débit utile plafond d'un lien USB (Mo/s), None si inconnu."""
+    if link is None:
+        return None
+    return practical_mb_s_for_speed(link.speed_mbps)
+
+
+def get_root_hub_speed(root_hub: str) -> Optional[float]:
+    """Vitesse (Mbit/s) d'un hub racine ("usb2") : débit maximal de son bus."""
+    try:
+        with open(f"/sys/bus/usb/devices/{root_hub}/speed", "r") as f:
+            return float(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+
+def shares_usb_bandwidth(a: Optional[UsbLinkInfo], b: Optional[UsbLinkInfo]) -> bool:
+    """Vrai si les deux disques se partagent la bande passante d'un même hub racine."""
+    return a is not None and b is not None and a.root_hub == b.root_hub
+
+
+def usb_link_warnings(source: DiskInfo, dest: DiskInfo) -> List[str]:
+    """Avertissements liés au câblage USB d'une paire source/destination."""
+    warnings: List[str] = []
+    for role, disk in (("source", source), ("destination", dest)):
+        if disk.usb is not None and disk.usb.speed_mbps <= 480:
+            warnings.append(
+                f"Le disque {role} est connecté en USB 2 ({disk.usb.speed_mbps:g} Mb/s) : "
+                "clonage ralenti (port, câble ou clé USB 2 ?)"
+            )
+    if shares_usb_bandwidth(source.usb, dest.usb):
+        shared_hubs = set(source.usb.hub_chain) & set(dest.usb.hub_chain)
+        where = f"du hub {sorted(shared_hubs)[-1]}" if shared_hubs else f"du hub racine {source.usb.root_hub}"
+        warnings.append(f"Source et destination partagent la bande passante {where}.")
+    return warnings
+
+
+def estimate_clone_seconds(source: DiskInfo, dest: DiskInfo) -> Optional[float]:
+    """
+    Durée minimale estimée d'un clonage, imposée par les liens USB : le plus
+    lent des deux liens, divisé par deux s'ils partagent le même hub racine
+    (lecture et écriture circulent alors sur le même bus).
+    """
+    rates = [r for r in (usb_practical_mb_s(source.usb), usb_practical_mb_s(dest.usb)) if r]
+    if not rates or source.size_bytes <= 0:
+        return None
+    rate = min(rates)
+    if shares_usb_bandwidth(source.usb, dest.usb):
+        rate /= 2
+    return source.size_bytes / (1024 * 1024) / rate
+
+
 def find_disk_by_id_path(id_path: str, usb_only: bool = True) -> Optional[DiskInfo]:
-    """Retourne le DiskInfo actuellement branché sur le port identifié par id_path."""
+    """
+    Retourne le DiskInfo actuellement branché sur le port identifié par
+    id_path. À défaut de correspondance exacte, accepte le disque branché
+    sur le même port physique (même usb_port_key) : c'est le cas des ports
+    découverts par la topologie sysfs, dont l'ID_PATH est prédit. S'il y en
+    a plusieurs (lecteur de cartes à plusieurs LUN), rien n'est retourné :
+    on ne devine pas lequel cloner.
+    """
     if not id_path:
         return None
-    for disk in list_block_devices(usb_only=usb_only):
+    disks = list_block_devices(usb_only=usb_only)
+    for disk in disks:
         if disk.id_path == id_path:
             return disk
-    return None
+    port_key = usb_port_key(id_path)
+    same_port = [d for d in disks if d.id_path and usb_port_key(d.id_path) == port_key]
+    return same_port[0] if len(same_port) == 1 else None
+
+
+# ── Topologie des hubs USB ──────────────────────────────────────────────────
+SYS_USB_DEVICES_DIR = "/sys/bus/usb/devices"
+
+# "pci-0000:00:14.0-usb-0:1.3:1.0-scsi-0:0:0:0" -> "pci-0000:00:14.0-usb-0:1.3"
+_USB_PORT_KEY_RE = re.compile(r"^(.*?-usb(?:v\d)?-\d+:[\d.]+)(?::|$)")
+_USB_HUB_CLASS = "09"
+
+
+@dataclass
+class UsbPort:
+    """Port aval d'un hub USB, découvert dans sysfs (sans disque branché)."""
+    id_path: str        # ID_PATH prédit d'un disque de stockage branché ici
+    chain: str          # chaîne de ports depuis le hub racine, ex: "1.3"
+    hub: str            # périphérique hub qui porte ce port, ex: "1-1" ou "usb1"
+    connect_type: str   # "hotplug", "unknown"... (sysfs connect_type)
+    occupied: bool      # un périphérique est actuellement branché
+
+    @property
+    def port_key(self) -> str:
+        return usb_port_key(self.id_path)
+
+
+def usb_port_key(id_path: str) -> str:
+    """
+    Partie d'un ID_PATH qui désigne le port physique (contrôleur + chaîne de
+    ports), sans l'interface ni la cible SCSI qui dépendent du disque.
+    """
+    m = _USB_PORT_KEY_RE.match(id_path or "")
+    return m.group(1) if m else (id_path or "")
+
+
+def _read_sysfs_attr(path: str) -> str:
+    try:
+        with open(path, "r") as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+def _controller_path_prefix(bus: str) -> str:
+    """Préfixe ID_PATH du contrôleur hôte d'un bus USB ("pci-<adresse>" ...)."""
+    controller = os.path.dirname(os.path.realpath(f"{SYS_USB_DEVICES_DIR}/usb{bus}"))
+    subsystem = os.path.basename(os.path.realpath(os.path.join(controller, "subsystem")))
+    name = os.path.basename(controller)
+    return f"{subsystem}-{name}" if subsystem in ("pci", "platform") else f"platform-{name}"
+
+
+def _port_natural_key(chain: str) -> List[int]:
+    return [int(part) for part in chain.split(".") if part.isdigit()]
+
+
+def discover_usb_ports() -> List[UsbPort]:
+    """
+    Énumère les ports aval de tous les hubs USB à partir de sysfs
+    (/sys/bus/usb/devices/*/*-port*), sans qu'aucune clé ne soit branchée.
+    Les ports reliés à un autre hub, câblés en interne ("hardwired") ou
+    inutilisés sont ignorés ; les ports USB 2 / USB 3 jumeaux d'un même
+    connecteur physique ne sont listés qu'une fois (même ID_PATH).
+    Triés par contrôleur puis par chaîne de ports.
+    """
+    ports: Dict[str, UsbPort] = {}
+    try:
+        entries = sorted(os.listdir(SYS_USB_DEVICES_DIR))
+    except OSError:
+        return []
+    for entry in entries:
+        # Les ports sont portés par l'interface du hub : "1-1:1.0/1-1-port3",
+        # "1-0:1.0/usb1-port2" pour le hub racine.
+        if ":" not in entry:
+            continue
+        iface_dir = os.path.join(SYS_USB_DEVICES_DIR, entry)
+        try:
+            children = os.listdir(iface_dir)
+        except OSError:
+            continue
+        for child in children:
+            m = re.match(r"^(usb(\d+)|(\d+)-([\d.]+))-port(\d+)$", child)
+            if not m:
+                continue
+            if m.group(2):
+                bus, chain = m.group(2), m.group(5)
+            else:
+                bus, chain = m.group(3), f"{m.group(4)}.{m.group(5)}"
+            port_dir = os.path.join(iface_dir, child)
+            connect_type = _read_sysfs_attr(os.path.join(port_dir, "connect_type"))
+            if connect_type in ("hardwired", "not used"):
+                continue
+            device_dir = os.path.join(SYS_USB_DEVICES_DIR, f"{bus}-{chain}")
+            occupied = os.path.isdir(device_dir)
+            if occupied and _read_sysfs_attr(os.path.join(device_dir, "bDeviceClass")) == _USB_HUB_CLASS:
+                continue  # hub en cascade : ce sont ses propres ports qui comptent
+            id_path = f"{_controller_path_prefix(bus)}-usb-0:{chain}:1.0-scsi-0:0:0:0"
+            port = UsbPort(
+                id_path=id_path,
+                chain=chain,
+                hub=m.group(1),
+                connect_type=connect_type or "unknown",
+                occupied=occupied,
+            )
+            known = ports.get(id_path)
+            if known is None or (occupied and not known.occupied):
+                ports[id_path] = port
+    return sorted(ports.values(), key=lambda p: (p.id_path.split("-usb-")[0], _port_natural_key(p.chain)))
 
 
 def get_base_disk(devpath: str) -> str:
@@ -134,6 +518,15 @@ def get_base_disk(devpath: str) -> str:
 def list_partitions(devname: str) -> List[str]:
     """Retourne les chemins /dev/... de toutes les partitions d'un disque."""
     devname = devname.lstrip("/").removeprefix("dev/")
+    sys_dir = f"{SYS_BLOCK_DIR}/{devname}"
+    if os.path.isdir(sys_dir):
+        try:
+            return [
+                f"/dev/{name}" for name in sorted(os.listdir(sys_dir))
+                if name.startswith(devname) and os.path.isfile(f"{sys_dir}/{name}/partition")
+            ]
+        except OSError:
+            pass
     out = _run(["lsblk", "-ln", "-o", "NAME", f"/dev/{devname}"])
     names = [n for n in out.splitlines() if n.strip()]
     return [f"/dev/{n}" for n in names if n != devname]
@@ -153,9 +546,89 @@ def unmount_all_partitions(devname: str, log_func=None) -> None:
                 log_func(f"Impossible de démonter {part} : {e}")
 
 
+# Points de montage désignant le disque système (ou le support du système live)
+_SYSTEM_MOUNTPOINTS = (
+    "/", "/boot", "/boot/efi", "/usr", "/var",
+    "/run/live/medium", "/lib/live/mount/medium", "/cdrom",
+)
+
+
+def _parent_disks(name: str) -> set:
+    """
+    Disque(s) physique(s) portant un périphérique bloc : le disque parent
+    d'une partition, ou, pour un volume dm/LVM/md, les disques de ses
+    esclaves (récursivement).
+    """
+    sys_path = os.path.realpath(f"/sys/class/block/{name}")
+    if os.path.isfile(os.path.join(sys_path, "partition")):
+        return {os.path.basename(os.path.dirname(sys_path))}
+    try:
+        slaves = os.listdir(os.path.join(sys_path, "slaves"))
+    except OSError:
+        slaves = []
+    if not slaves:
+        return {name}
+    disks: set = set()
+    for slave in slaves:
+        disks |= _parent_disks(slave)
+    return disks
+
+
+def system_disks() -> set:
+    """Noms des disques hébergeant le système (racine, /boot, support live, swap)."""
+    sources = []
+    try:
+        with open("/proc/self/mounts", "r") as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) >= 2 and fields[1] in _SYSTEM_MOUNTPOINTS:
+                    sources.append(fields[0])
+    except OSError:
+        pass
+    try:
+        with open("/proc/swaps", "r") as f:
+            sources += [line.split()[0] for line in f.readlines()[1:] if line.strip()]
+    except OSError:
+        pass
+    disks: set = set()
+    for source in sources:
+        if source.startswith("/dev/"):
+            disks |= _parent_disks(os.path.basename(os.path.realpath(source)))
+    return disks
+
+
+def is_system_disk(devname: str) -> bool:
+    return devname.lstrip("/").removeprefix("dev/") in system_disks()
+
+
+def release_disk(devname: str) -> bool:
+    """
+    Retire proprement un disque USB du système (équivalent d'« éjecter ») en
+    écrivant dans /sys/block/<dev>/device/delete : les données sont déjà
+    sur le support, la clé peut être débranchée. Retourne False si le
+    périphérique ne le permet pas (ex : disque non SCSI/USB).
+    """
+    devname = devname.lstrip("/").removeprefix("dev/")
+    try:
+        with open(f"/sys/block/{devname}/device/delete", "w") as f:
+            f.write("1")
+        return True
+    except OSError:
+        return False
+
+
 def get_disk_size(devname: str) -> int:
-    """Taille en octets d'un disque via blockdev --getsize64."""
+    """
+    Taille en octets d'un disque (ou d'une partition), lue dans sysfs
+    (/sys/class/block/<dev>/size, toujours en secteurs de 512 o) ;
+    repli sur blockdev --getsize64.
+    """
     devname = devname.lstrip("/").removeprefix("dev/")
+    try:
+        with open(f"/sys/class/block/{devname}/size", "r") as f:
+            return int(f.read().strip()) * 512
+    except (OSError, ValueError):
+        pass
     out = _run(["blockdev", "--getsize64", f"/dev/{devname}"])
     try:
         return int(out.strip())
@@ -165,4 +638,138 @@ def get_disk_size(devname: str) -> int:
 
 def snapshot_usb_devnames() -> set:
     """Ensemble des noms de périphériques (sda, sdb, ...) USB actuellement branchés."""
-    return {d.devname for d in list_block_devices(usb_only=True)}
\ No newline at end of file
+    return {d.devname for d in list_block_devices(usb_only=True)}
+
+
+# ── Cache d'écriture du noyau (page cache / BDI) ───────────────────────────
+def get_dev_numbers(devname: str) -> Optional[Tuple[int, int]]:
+    """Numéros (majeur, mineur) d'un disque, lus dans /sys/block/<dev>/dev."""
+    devname = devname.lstrip("/").removeprefix("dev/")
+    try:
+        with open(f"/sys/block/{devname}/dev", "r") as f:
+            major, minor = f.read().strip().split(":")
+        return int(major), int(minor)
+    except (OSError, ValueError):
+        return None
+
+
+def read_meminfo() -> Dict[str, int]:
+    """Contenu de /proc/meminfo, converti en octets (ex: {"Dirty": 1234, ...})."""
+    info: Dict[str, int] = {}
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                fields = rest.split()
+                if not fields:
+                    continue
+                value = int(fields[0])
+                if len(fields) > 1 and fields[1] == "kB":
+                    value *= 1024
+                info[key.strip()] = value
+    except (OSError, ValueError):
+        pass
+    return info
+
+
+def get_pending_writeback_bytes(devname: str) -> Tuple[int, bool]:
+    """
+    Volume de données encore en attente d'écriture vers le disque
+    (pages sales + pages en cours d'écriture).
+
+    Utilise les compteurs propres au périphérique (debugfs,
+    /sys/kernel/debug/bdi/<maj:min>/stats) quand ils sont disponibles ;
+    sinon se rabat sur les compteurs globaux Dirty/Writeback de
+    /proc/meminfo. Retourne (octets, compteur_par_périphérique).
+    """
+    numbers = get_dev_numbers(devname)
+    if numbers:
+        stats_path = f"/sys/kernel/debug/bdi/{numbers[0]}:{numbers[1]}/stats"
+        try:
+            total = 0
+            with open(stats_path, "r") as f:
+                for line in f:
+                    key, _, rest = line.partition(":")
+                    if key.strip() in ("BdiWriteback", "BdiReclaimable"):
+                        total += int(rest.split()[0]) * 1024
+            return total, True
+        except (OSError, ValueError, IndexError):
+            pass
+    meminfo = read_meminfo()
+    return meminfo.get("Dirty", 0) + meminfo.get("Writeback", 0), False
+
+
+def set_bdi_max_ratio(devname: str, ratio: int) -> Optional[int]:
+    """
+    Plafonne la part du cache d'écriture que le disque peut occuper
+    (/sys/class/bdi/<maj:min>/max_ratio, en % de la limite globale).
+    Retourne l'ancienne valeur (pour la restaurer ensuite), ou None si le
+    réglage n'a pas pu être appliqué.
+    """
+    numbers = get_dev_numbers(devname)
+    if not numbers:
+        return None
+    path = f"/sys/class/bdi/{numbers[0]}:{numbers[1]}/max_ratio"
+    try:
+        with open(path, "r") as f:
+            previous = int(f.read().strip())
+        with open(path, "w") as f:
+            f.write(str(int(ratio)))
+        return previous
+    except (OSError, ValueError):
+        return None
+
+
+def read_process_rss(pid: object = "self") -> int:
+    """Mémoire résidente (VmRSS, en octets) d'un processus, 0 si inconnue."""
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return 0
+
+
+def get_process_file_offset(pid: int, path: str) -> Optional[int]:
+    """
+    Position courante (en octets) du processus `pid` dans le fichier `path`,
+    lue dans /proc/<pid>/fdinfo. Permet de suivre l'avancement d'un outil
+    externe (ex: cmp) qui ne rapporte rien lui-même.
+    """
+    fd_dir = f"/proc/{pid}/fd"
+    try:
+        fds = os.listdir(fd_dir)
+    except OSError:
+        return None
+    for fd in fds:
+        try:
+            if os.readlink(os.path.join(fd_dir, fd)) != path:
+                continue
+            with open(f"/proc/{pid}/fdinfo/{fd}", "r") as f:
+                for line in f:
+                    if line.startswith("pos:"):
+                        return int(line.split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+    return None
+
+
+def drop_cached_range(path: str, length: int = 0) -> None:
+    """
+    Demande au noyau d'évincer du cache les pages déjà traitées d'un
+    périphérique (posix_fadvise DONTNEED sur [0, length), 0 = tout).
+    Les pages encore sales ne sont pas concernées : elles le seront une
+    fois écrites.
+    """
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.posix_fadvise(fd, 0, length, os.POSIX_FADV_DONTNEED)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
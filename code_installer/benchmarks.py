@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+benchmarks.py – Mesures de performance des briques de la borne.
+
+Chaque mesure compare l'implémentation actuelle à l'ancienne (ou à une
+variante) sur la machine où la borne tourne, pour vérifier qu'une
+optimisation apporte bien ce qu'elle promet sur le matériel réel.
+
+Usage :
+    sudo python3 benchmarks.py enumeration [--iterations 50]
+    python3 benchmarks.py progress [--iterations 10000]
+    python3 benchmarks.py pdf [--size-mb 100]
+"""
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import os
+import resource
+import statistics
+import tempfile
+import time
+from typing import Callable, Dict, Iterator, List
+
+import pdf_writer
+import utils
+from clone import CloneProgress
+from clone_worker import SharedProgress
+from iostats import DeviceIoStats
+
+
+def _time_calls(func: Callable[[], object], iterations: int) -> Dict[str, float]:
+    """Durées (ms) de `iterations` appels : moyenne, médiane, max."""
+    durations: List[float] = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        durations.append((time.perf_counter() - start) * 1000)
+    return {
+        "mean_ms": statistics.mean(durations),
+        "median_ms": statistics.median(durations),
+        "max_ms": max(durations),
+    }
+
+
+def bench_enumeration(iterations: int = 50, usb_only: bool = False) -> Dict[str, Dict[str, float]]:
+    """
+    Inventaire des disques : lecture directe sysfs + base udev contre
+    l'ancienne méthode lsblk + un `udevadm info` par disque.
+    """
+    results: Dict[str, Dict[str, float]] = {}
+    if utils._sysfs_list_block_devices(usb_only) is not None:
+        results["sysfs"] = _time_calls(lambda: utils._sysfs_list_block_devices(usb_only), iterations)
+    try:
+        utils._lsblk_list_block_devices(usb_only)
+    except OSError:
+        pass  # lsblk / udevadm absents : seule la lecture directe est mesurée
+    else:
+        results["lsblk"] = _time_calls(lambda: utils._lsblk_list_block_devices(usb_only), iterations)
+    return results
+
+
+def bench_progress(iterations: int = 10000) -> Dict[str, Dict[str, float]]:
+    """
+    Publication + lecture d'un avancement : bloc de mémoire partagée
+    (clone_worker.SharedProgress) contre un aller-retour sur un Pipe.
+    """
+    io = {role: DeviceIoStats(name, 40.0, 40.0, 80.0, 80.0, 512.0, 1.5, 12.0, 90.0, 2)
+          for role, name in (("source", "sda"), ("dest", "sdb"))}
+    progress = CloneProgress(copied_bytes=1 << 30, total_bytes=1 << 34, percent=6.25,
+                             speed_mb_s=40.0, eta_seconds=380.0, elapsed_seconds=25.0, io=io)
+    results: Dict[str, Dict[str, float]] = {}
+    shared = SharedProgress()
+    try:
+        def shared_round() -> None:
+            shared.write(progress)
+            shared.read({"source": "sda", "dest": "sdb"})
+        results["shm"] = _time_calls(shared_round, iterations)
+    finally:
+        shared.close()
+    reader, writer = multiprocessing.Pipe(duplex=False)
+
+    def pipe_round() -> None:
+        writer.send(progress)
+        reader.recv()
+    results["pipe"] = _time_calls(pipe_round, iterations)
+    reader.close()
+    writer.close()
+    return results
+
+
+def _synthetic_log(path: str, size_mb: int) -> int:
+    """Écrit un journal factice de `size_mb` Mo au format de log_handler ; retourne le nombre de lignes."""
+    messages = (
+        "INFO - Clonage - source: usb-Kingston_DataTraveler_3.0-0:0 | destination: "
+        "usb-SanDisk_Ultra-0:0 | taille: 14.9 Go",
+        "INFO - Avancement Poste 2 : 37.4 % a 38.2 Mo/s",
+        "WARNING - Disque /dev/sdc debranche pendant l'inventaire",
+        "INFO - Verification post-clonage REUSSIE : /dev/sdb -> /dev/sdc",
+    )
+    target = size_mb * 1024 * 1024
+    written = lines = 0
+    with open(path, "w") as f:
+        while written < target:
+            line = f"2026-01-15 10:{lines // 60 % 60:02d}:{lines % 60:02d},000 - {messages[lines % 4]} #{lines}\n"
+            f.write(line)
+            written += len(line)
+            lines += 1
+    return lines
+
+
+def bench_pdf(size_mb: int = 100) -> Dict[str, Dict[str, float]]:
+    """
+    Rapport PDF consolidé d'un journal factice de `size_mb` Mo, flux de
+    contenu bruts puis compressés (FlateDecode, en ligne puis en pool de
+    threads) : durée, taille produite et pic de mémoire du processus.
+    """
+    results: Dict[str, Dict[str, float]] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        log_path = os.path.join(tmp, "disk_clone.log")
+        pdf_path = os.path.join(tmp, "report.pdf")
+        _synthetic_log(log_path, size_mb)
+        input_size = os.path.getsize(log_path)
+        level = pdf_writer.compression_level(input_size)
+
+        def read_lines() -> Iterator[str]:
+            with open(log_path) as f:
+                for line in f:
+                    yield line.rstrip("\n")
+
+        variants = [("brut", None, 0), (f"flate-{level}", level, 0)]
+        if pdf_writer._COMPRESS_WORKERS:   # machine à un seul coeur : pas de pool
+            variants.append((f"flate-{level}-x{pdf_writer._COMPRESS_WORKERS}", level,
+                             pdf_writer._COMPRESS_WORKERS))
+        for name, compress_level, workers in variants:
+            rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            start = time.perf_counter()
+            with open(pdf_path, "wb") as f:
+                report = pdf_writer.TextReport(f, "Logs complets - Clonage de disques", ("Banc d'essai",),
+                                               "Lignes totales : ", compress_level, workers)
+                for line in read_lines():
+                    report.add_line(line)
+                lines, pages = report.close()
+            duration = time.perf_counter() - start
+            rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            results[name] = {
+                "input_mb": input_size / 1e6,
+                "output_mb": os.path.getsize(pdf_path) / 1e6,
+                "lines": lines,
+                "pages": pages,
+                "seconds": duration,
+                "peak_rss_growth_mb": (rss_after - rss_before) / 1024,   # ru_maxrss en Kio
+            }
+    return results
+
+
+def _print_results(title: str, results: Dict[str, Dict[str, float]]) -> None:
+    print(title)
+    if not results:
+        print("  (aucune méthode disponible sur cette machine)")
+    for name, r in results.items():
+        print(f"  {name:<10} moy. {r['mean_ms']:8.2f} ms  méd. {r['median_ms']:8.2f} ms  "
+              f"max {r['max_ms']:8.2f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Mesures de performance de la borne de clonage.")
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    p_enum = sub.add_parser("enumeration", help="Inventaire des disques (sysfs vs lsblk/udevadm)")
+    p_enum.add_argument("--iterations", type=int, default=50)
+    p_enum.add_argument("--usb-only", action="store_true")
+
+    p_prog = sub.add_parser("progress", help="Avancement : mémoire partagée vs Pipe")
+    p_prog.add_argument("--iterations", type=int, default=10000)
+
+    p_pdf = sub.add_parser("pdf", help="Rapport PDF consolidé d'un journal factice")
+    p_pdf.add_argument("--size-mb", type=int, default=100)
+
+    args = parser.parse_args()
+    if args.bench == "enumeration":
+        _print_results(
+            f"Inventaire des disques ({args.iterations} itérations)",
+            bench_enumeration(args.iterations, args.usb_only),
+        )
+    elif args.bench == "progress":
+        _print_results(
+            f"Publication de l'avancement ({args.iterations} itérations)",
+            bench_progress(args.iterations),
+        )
+    elif args.bench == "pdf":
+        results = bench_pdf(args.size_mb)
+        first = next(iter(results.values()))
+        print(f"Rapport PDF d'un journal de {first['input_mb']:.0f} Mo "
+              f"({first['lines']} lignes, {first['pages']} pages)")
+        for name, r in results.items():
+            print(f"  {name:<12} {r['seconds']:6.1f} s ({r['input_mb'] / r['seconds']:5.1f} Mo/s)  "
+                  f"PDF {r['output_mb']:6.1f} Mo  pic mémoire +{r['peak_rss_growth_mb']:.1f} Mo")
+
+
+if __name__ == "__main__":
+    main()
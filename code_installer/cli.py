@@ -0,0 +1,373 @@
+"""
+cli.py – Mode sans interface graphique : sous-commandes de main.py.
+
+    main.py list   [--all]
+    main.py clone  (--station NOM | --source-port ID_PATH | --source DEV)
+                   (--dest-port ID_PATH | --dest DEV) --yes [options]
+    main.py daemon [--target N]
+
+Rien ici n'importe Tkinter : ces commandes tournent sur une machine sans
+serveur X et démarrent bien plus vite que l'interface.
+
+Sortie : un objet JSON par ligne sur stdout (NDJSON), toujours avec un
+champ "event" ("disk", "station", "start", "log", "progress", "result",
+"job", "production") et un horodatage "time". L'écho console du journal
+part sur stderr pour ne pas se mêler au flux.
+
+Codes de sortie : voir EXIT_* ci-dessous.
+"""
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import config_manager
+import history
+from clone import (
+    CACHE_MODES,
+    CloneError,
+    CloneJob,
+    CloneProgress,
+    PreflightError,
+    SizeMismatchError,
+    verify_clone,
+)
+from control_server import start_control_server
+from job_manager import CloneOptions, JobManager, StationJob, load_stations
+from log_handler import (
+    log_clone_completed,
+    log_clone_failed,
+    log_clone_operation,
+    log_clone_process_stopped,
+    log_verification_result,
+    set_console_stream,
+)
+from metrics import start_textfile_exporter
+from production import ProductionError, ProductionRun
+from utils import DiskInfo, find_disk_by_id_path, get_disk_size, is_system_disk, list_block_devices
+
+EXIT_OK = 0
+EXIT_FAILED = 1             # clonage en échec (dd, écriture finale...)
+EXIT_USAGE = 2              # arguments invalides, confirmation --yes absente
+EXIT_VERIFY_FAILED = 3      # clonage terminé mais disques différents
+EXIT_DEVICE = 4             # disque introuvable, trop petit ou refusé
+EXIT_NOT_ROOT = 5
+EXIT_CANCELLED = 130        # interrompu (Ctrl+C, SIGTERM)
+
+# Statut du résultat -> résultat dans l'historique (mêmes valeurs que les états des jobs)
+_HISTORY_RESULTS = {"verify_failed": "error"}
+
+
+class CliError(Exception):
+    """Erreur rapportée à l'utilisateur avec un code de sortie précis."""
+
+    def __init__(self, message: str, exit_code: int) -> None:
+        super().__init__(message)
+        self.exit_code = exit_code
+
+
+# ── Flux NDJSON ─────────────────────────────────────────────────────────────
+_emit_lock = threading.Lock()
+
+
+def _json_default(value: Any) -> Any:
+    if dataclasses.is_dataclass(value):
+        return dataclasses.asdict(value)
+    return str(value)
+
+
+def emit(event: str, **fields: Any) -> None:
+    """Écrit un événement sur stdout (une ligne JSON, vidée aussitôt)."""
+    line = json.dumps({"event": event, "time": round(time.time(), 3), **fields},
+                      ensure_ascii=False, default=_json_default)
+    with _emit_lock:
+        sys.stdout.write(line + "\n")
+        sys.stdout.flush()
+
+
+def _on_stop_signals(handler) -> None:
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: handler())
+
+
+# ── list ────────────────────────────────────────────────────────────────────
+def cmd_list(args: argparse.Namespace) -> int:
+    disks = list_block_devices(usb_only=not args.all)
+    for disk in disks:
+        emit("disk", disk=disk, size_human=disk.size_human, system=is_system_disk(disk.devname))
+    for station in load_stations():
+        source = find_disk_by_id_path(station.source_id_path) if station.source_id_path else None
+        dest = find_disk_by_id_path(station.dest_id_path) if station.dest_id_path else None
+        emit("station", station=station, configured=station.configured,
+             source=source.devname if source else None, dest=dest.devname if dest else None)
+    return EXIT_OK
+
+
+# ── clone ───────────────────────────────────────────────────────────────────
+def _resolve_disk(role: str, device: Optional[str], port: Optional[str]) -> DiskInfo:
+    """Disque désigné par un nom de périphérique ou par le port (ID_PATH) où il est branché."""
+    if port:
+        disk = find_disk_by_id_path(port)
+        if disk is None:
+            raise CliError(f"Aucun disque branché sur le port {role} ({port}).", EXIT_DEVICE)
+        return disk
+    name = (device or "").split("/")[-1]
+    for disk in list_block_devices(usb_only=False):
+        if disk.devname == name:
+            return disk
+    # Périphérique hors inventaire (loop, nbd... pour les bancs d'essai)
+    size = get_disk_size(name) if name and os.path.exists(f"/sys/block/{name}") else 0
+    if size <= 0:
+        raise CliError(f"Disque {role} introuvable : {device}.", EXIT_DEVICE)
+    return DiskInfo(name, f"/dev/{name}", size, name, "", "", "")
+
+
+class _PhaseTimer:
+    """Durée de chaque phase et octets copiés, relevés au fil des avancements (historique)."""
+
+    def __init__(self) -> None:
+        self.durations: Dict[str, float] = {}
+        self.copied_bytes = 0
+        self._phase = ""
+        self._since = 0.0
+
+    def update(self, progress: CloneProgress) -> None:
+        if progress.phase != self._phase:
+            self.stop()
+            self._phase, self._since = progress.phase, time.time()
+        if progress.phase == "copy":
+            self.copied_bytes = progress.copied_bytes
+
+    def stop(self) -> None:
+        if self._phase:
+            elapsed = time.time() - self._since
+            self.durations[self._phase] = self.durations.get(self._phase, 0.0) + elapsed
+            self._phase = ""
+
+
+def _clone_options(args: argparse.Namespace) -> CloneOptions:
+    options = CloneOptions.from_config()
+    if args.block_size:
+        options.block_size = args.block_size
+    if args.cache_mode:
+        options.cache_mode = args.cache_mode
+    if args.verify is not None:
+        options.verify = args.verify
+    if args.preflight is not None:
+        options.preflight = args.preflight
+    if args.ionice is not None:
+        options.io_priority = args.ionice
+    if args.max_rate is not None:
+        options.max_rate_mb_s = args.max_rate
+    return options
+
+
+def cmd_clone(args: argparse.Namespace) -> int:
+    source_port, dest_port = args.source_port, args.dest_port
+    if args.station:
+        station = next((s for s in load_stations() if s.name == args.station), None)
+        if station is None or not station.configured:
+            raise CliError(f"Poste inconnu ou incomplet : {args.station}.", EXIT_USAGE)
+        source_port, dest_port = station.source_id_path, station.dest_id_path
+    if not (source_port or args.source) or not (dest_port or args.dest):
+        raise CliError("Indiquez la source et la destination (--station, --*-port ou --source/--dest).",
+                       EXIT_USAGE)
+
+    source = _resolve_disk("source", args.source, source_port)
+    dest = _resolve_disk("destination", args.dest, dest_port)
+    if source.devname == dest.devname:
+        raise CliError("La source et la destination sont le même disque.", EXIT_DEVICE)
+    if is_system_disk(dest.devname):
+        raise CliError(f"{dest.path} porte le système : clonage refusé.", EXIT_DEVICE)
+    if not args.yes:
+        raise CliError(f"Toutes les données de {dest.path} seront effacées : "
+                       "ajoutez --yes pour confirmer.", EXIT_USAGE)
+
+    options = _clone_options(args)
+    emit("start", source=source, dest=dest, options=options)
+    job = CloneJob()
+    _on_stop_signals(job.cancel)
+    src_id, dst_id = f"[cli] {source.model}", f"[cli] {dest.model}"
+    log = lambda message: emit("log", message=message)
+    timer = _PhaseTimer()
+
+    def progress(p: CloneProgress) -> None:
+        timer.update(p)
+        emit("progress", **dataclasses.asdict(p))
+
+    def finish(status: str, exit_code: int, message: str, verified: Optional[bool] = None) -> int:
+        timer.stop()
+        copy_done = status in ("success", "verify_failed")
+        history.record(history.clone_record(
+            args.station or "cli", source, dest, _HISTORY_RESULTS.get(status, status),
+            started_at=start,
+            finished_at=time.time(),
+            bytes_written=source.size_bytes if copy_done else timer.copied_bytes,
+            phase_seconds=timer.durations,
+            job_metrics=job.metrics,
+            block_size=options.block_size,
+            cache_mode=options.cache_mode,
+            verify=options.verify,
+            verified=verified,
+            message=message,
+        ))
+        return _result(status, exit_code, message, job, start, verified)
+
+    start = time.time()
+    verified: Optional[bool] = None
+    log_clone_operation(src_id, dst_id, source.size_bytes)
+    try:
+        job.run(
+            source.devname, dest.devname,
+            block_size=options.block_size,
+            progress_callback=progress,
+            log_func=log,
+            bdi_max_ratio=options.bdi_max_ratio,
+            cache_mode=options.cache_mode,
+            preflight=options.preflight,
+            min_write_mb_s=options.min_write_mb_s,
+            io_priority=options.io_priority,
+            max_rate_mb_s=options.max_rate_mb_s,
+        )
+        log_clone_completed(src_id, dst_id, time.time() - start)
+        if options.verify:
+            verified = verify_clone(
+                source.devname, dest.devname, progress_callback=progress, log_func=log,
+                cancel_job=job, cache_mode=options.cache_mode, metrics=job.metrics,
+                io_priority=options.io_priority,
+            )
+            log_verification_result(src_id, dst_id, verified)
+    except (SizeMismatchError, PreflightError) as e:
+        log_clone_failed(src_id, dst_id, str(e))
+        return finish("error", EXIT_DEVICE, str(e))
+    except CloneError as e:
+        if job.is_cancelled():
+            log_clone_process_stopped()
+            return finish("cancelled", EXIT_CANCELLED, str(e))
+        log_clone_failed(src_id, dst_id, str(e))
+        return finish("error", EXIT_FAILED, str(e))
+
+    if verified is False:
+        return finish("verify_failed", EXIT_VERIFY_FAILED,
+                      "La vérification a échoué : les disques ne sont pas identiques.", verified)
+    return finish("success", EXIT_OK, "", verified)
+
+
+def _result(status: str, exit_code: int, message: str, job: CloneJob, start: float,
+            verified: Optional[bool] = None) -> int:
+    emit("result", status=status, exit_code=exit_code, message=message, verified=verified,
+         elapsed_seconds=round(time.time() - start, 3), metrics=job.metrics)
+    return exit_code
+
+
+# ── daemon ──────────────────────────────────────────────────────────────────
+def cmd_daemon(args: argparse.Namespace) -> int:
+    """
+    Production sans écran : arme le mode production sur tous les postes
+    configurés et clone chaque clé insérée en destination, jusqu'à
+    l'objectif ou jusqu'à SIGINT / SIGTERM. L'API de contrôle
+    (control_server.py) et l'export des métriques tournent pendant ce temps.
+    """
+    stations = [s for s in load_stations() if s.configured]
+    if not stations:
+        raise CliError("Aucun poste configuré (ports source et destination).", EXIT_USAGE)
+
+    stop = threading.Event()
+
+    def on_job(station_name: str, job: StationJob) -> None:
+        emit("job", station=station_name, state=job.state, dest=job.dest.devname,
+             progress=job.progress, message=job.message)
+
+    jobs = JobManager(on_update=on_job,
+                      on_log=lambda station, message: emit("log", station=station, message=message))
+    production: Optional[ProductionRun] = None
+
+    def on_change() -> None:
+        if production is None:
+            return
+        emit("production", armed=production.armed, stats=production.stats,
+             summary=production.stats.summary())
+        if not production.armed:
+            stop.set()
+
+    production = ProductionRun(jobs, on_change=on_change,
+                               on_log=lambda message: emit("log", message=message))
+    target = args.target if args.target is not None else config_manager.get_production_target_count()
+    try:
+        production.arm(stations, target)
+    except ProductionError as e:
+        raise CliError(str(e), EXIT_DEVICE)
+
+    control = start_control_server(jobs, production)
+    exporter = start_textfile_exporter()
+    _on_stop_signals(stop.set)
+    while not stop.wait(0.5):
+        pass
+    interrupted = production.armed
+    production.disarm("arrêt du démon")
+    if control is not None:
+        control.stop()
+    if exporter is not None:
+        exporter.stop()
+    if interrupted:
+        jobs.cancel_all()
+    while jobs.any_running():
+        time.sleep(0.2)
+    if interrupted:
+        return EXIT_CANCELLED
+    return EXIT_FAILED if production.stats.failed else EXIT_OK
+
+
+# ── Analyse des arguments ───────────────────────────────────────────────────
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="main.py",
+        description="Cloneur de disques USB. Sans sous-commande : interface graphique.",
+    )
+    sub = parser.add_subparsers(dest="command", metavar="COMMANDE")
+    sub.add_parser("gui", help="interface graphique (par défaut)")
+
+    p_list = sub.add_parser("list", help="disques branchés et postes configurés (NDJSON)")
+    p_list.add_argument("--all", action="store_true", help="inclure les disques non USB")
+
+    p_clone = sub.add_parser("clone", help="cloner un disque sans interface (NDJSON)")
+    p_clone.add_argument("--station", help="poste configuré (ses ports source et destination)")
+    p_clone.add_argument("--source-port", metavar="ID_PATH", help="port source (ID_PATH udev)")
+    p_clone.add_argument("--dest-port", metavar="ID_PATH", help="port destination (ID_PATH udev)")
+    p_clone.add_argument("--source", metavar="DEV", help="disque source, ex: sdb ou /dev/sdb")
+    p_clone.add_argument("--dest", metavar="DEV", help="disque destination, ex: sdc ou /dev/sdc")
+    p_clone.add_argument("--yes", action="store_true", help="confirme l'effacement de la destination")
+    p_clone.add_argument("--block-size", help="taille de bloc dd (défaut : configuration)")
+    p_clone.add_argument("--cache-mode", choices=CACHE_MODES)
+    p_clone.add_argument("--verify", action=argparse.BooleanOptionalAction, default=None)
+    p_clone.add_argument("--preflight", action=argparse.BooleanOptionalAction, default=None)
+    p_clone.add_argument("--ionice", type=int, choices=range(8), metavar="0-7")
+    p_clone.add_argument("--max-rate", type=float, metavar="MO_S", help="plafond de débit (0 = aucun)")
+
+    p_daemon = sub.add_parser("daemon", help="production sans écran sur les postes configurés (NDJSON)")
+    p_daemon.add_argument("--target", type=int, help="nombre de clés à produire (0 = illimité)")
+    return parser
+
+
+_HANDLERS = {"list": cmd_list, "clone": cmd_clone, "daemon": cmd_daemon}
+
+
+def run(args: argparse.Namespace) -> int:
+    """Exécute une sous-commande sans interface ; retourne le code de sortie."""
+    set_console_stream(sys.stderr)
+    if args.command != "list" and os.geteuid() != 0:
+        emit("result", status="error", exit_code=EXIT_NOT_ROOT,
+             message="Ce programme doit être exécuté en tant que root (accès direct aux disques).")
+        return EXIT_NOT_ROOT
+    try:
+        return _HANDLERS[args.command](args)
+    except CliError as e:
+        emit("result", status="error", exit_code=e.exit_code, message=str(e))
+        return e.exit_code
@@ -6,22 +6,82 @@ boucle read()/write() en Python pur (conv=noerror,sync permet de sauter les
 secteurs défectueux du disque source sans interrompre tout le clonage).
 `status=progress` fait écrire à dd, sur stderr, une ligne d'avancement
 régulière que l'on parse pour calculer pourcentage / vitesse / ETA.
+
+Une fois dd terminé, seules les données du disque de destination sont
+vidées du cache d'écriture (fsync + BLKFLSBUF sur le périphérique), avec
+une phase "flush" dont l'avancement est suivi via les compteurs
+Dirty/Writeback du noyau : pas de `sync` global qui bloquerait aussi les
+autres systèmes de fichiers.
+
+Pour ne pas évincer du cache le reste du système (interface Tk comprise)
+sur les bornes peu dotées en mémoire, la copie et la vérification
+contournent ou nettoient le page cache au fil de l'eau (O_DIRECT ou
+posix_fadvise DONTNEED sur les plages déjà traitées). La mémoire (RSS et
+cache) est relevée avant, pendant et après chaque opération (JobMetrics).
+
+Pendant la copie et la vérification, un IoStatsSampler lit
+/sys/block/<dev>/stat des deux disques : débits, IOPS, latence et file
+d'attente réels sont joints à chaque CloneProgress (champ `io`) et
+résumés dans les JobMetrics.
+
+Quand plusieurs clonages partagent un même bus USB, chaque job peut être
+lancé avec une priorité d'E/S (ionice, classe best-effort) et un plafond
+de débit : dd n'en ayant pas, on le suspend (SIGSTOP) le temps nécessaire
+pour que le débit moyen revienne sous le plafond, puis on le relance
+(SIGCONT). Le plafond peut être modifié en cours de job (set_rate_limit).
+Le même mécanisme sert à la mise en pause (pause / resume) de la copie et
+de la vérification.
 """
 from __future__ import annotations
 
+import fcntl
+import os
 import re
+import shutil
+import signal
 import subprocess
 import threading
 import time
-from dataclasses import dataclass
-from typing import Callable, Optional
-
-from utils import get_disk_size, unmount_all_partitions
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from iostats import DeviceIoStats, IoStatsSampler, IoStatsSummary
+from preflight import PreflightResult, probe_destination
+from utils import (
+    drop_cached_range,
+    get_disk_size,
+    get_pending_writeback_bytes,
+    get_process_file_offset,
+    human_size,
+    read_meminfo,
+    read_process_rss,
+    set_bdi_max_ratio,
+    unmount_all_partitions,
+)
 
 # Ligne typique produite par dd avec status=progress, ex:
 # "123456789 bytes (123 MB, 118 MiB) copied, 4 s, 30.9 MB/s"
 _DD_PROGRESS_RE = re.compile(r"^(\d+)\s+bytes")
 
+# Classe d'ordonnancement E/S "best-effort" d'ionice : niveaux 0 (haut) à 7 (bas)
+_IONICE_BEST_EFFORT = "2"
+
+# ioctl BLKFLSBUF (linux/fs.h) : vide puis invalide le cache du périphérique
+_BLKFLSBUF = 0x1261
+_FLUSH_POLL_INTERVAL = 0.5
+
+# Modes d'accès au page cache pendant la copie (option "cache_mode") :
+#   direct   : O_DIRECT en lecture et écriture, le cache n'est pas utilisé
+#   nocache  : dd passe par le cache mais l'évince au fur et à mesure
+#              (posix_fadvise DONTNEED sur les plages traitées)
+#   buffered : comportement historique (défaut), tout passe par le cache
+CACHE_MODES = ("buffered", "nocache", "direct")
+_DD_CACHE_FLAGS: Dict[str, List[str]] = {
+    "direct": ["iflag=direct", "oflag=direct"],
+    "nocache": ["iflag=nocache", "oflag=nocache"],
+    "buffered": [],
+}
+
 
 class CloneError(Exception):
     """Erreur bloquante survenue pendant le clonage."""
@@ -31,6 +91,10 @@ class SizeMismatchError(CloneError):
     """Le disque de destination est plus petit que le disque source."""
 
 
+class PreflightError(CloneError):
+    """Le test préalable a rejeté la destination (fausse capacité, trop lente)."""
+
+
 @dataclass
 class CloneProgress:
     copied_bytes: int
@@ -39,6 +103,70 @@ class CloneProgress:
     speed_mb_s: float
     eta_seconds: float
     elapsed_seconds: float
+    phase: str = "copy"     # "preflight", "copy", "flush" ou "verify"
+    io: Optional[Dict[str, DeviceIoStats]] = None   # par rôle : "source", "dest"
+
+
+@dataclass
+class MemorySample:
+    rss_bytes: int            # processus de l'application + outil externe (dd/cmp)
+    page_cache_bytes: int     # "Cached" de /proc/meminfo
+    dirty_bytes: int          # "Dirty" + "Writeback"
+
+
+def sample_memory(*pids: int) -> MemorySample:
+    meminfo = read_meminfo()
+    return MemorySample(
+        rss_bytes=read_process_rss() + sum(read_process_rss(pid) for pid in pids),
+        page_cache_bytes=meminfo.get("Cached", 0),
+        dirty_bytes=meminfo.get("Dirty", 0) + meminfo.get("Writeback", 0),
+    )
+
+
+@dataclass
+class JobMetrics:
+    """Mesures relevées pendant un clonage (et sa vérification éventuelle)."""
+    memory_before: Optional[MemorySample] = None
+    memory_peak: Optional[MemorySample] = None
+    memory_after: Optional[MemorySample] = None
+    # Statistiques d'E/S des périphériques, par phase ("copy", "verify")
+    io_by_phase: Dict[str, Dict[str, IoStatsSummary]] = field(default_factory=dict)
+    preflight: Optional[PreflightResult] = None
+
+    def record_memory(self, sample: MemorySample) -> None:
+        peak = self.memory_peak
+        if peak is None:
+            self.memory_peak = sample
+            return
+        self.memory_peak = MemorySample(
+            rss_bytes=max(peak.rss_bytes, sample.rss_bytes),
+            page_cache_bytes=max(peak.page_cache_bytes, sample.page_cache_bytes),
+            dirty_bytes=max(peak.dirty_bytes, sample.dirty_bytes),
+        )
+
+    def memory_summary(self) -> str:
+        parts = []
+        for label, sample in (("avant", self.memory_before),
+                              ("pic", self.memory_peak),
+                              ("après", self.memory_after)):
+            if sample is not None:
+                parts.append(
+                    f"{label} : RSS {human_size(sample.rss_bytes)}, "
+                    f"cache {human_size(sample.page_cache_bytes)}"
+                )
+        return "Mémoire — " + " | ".join(parts) if parts else ""
+
+
+def ionice_prefix(io_priority: Optional[int]) -> List[str]:
+    """
+    Préfixe de commande plaçant le processus dans la classe E/S best-effort
+    au niveau `io_priority` (0 à 7). Sans effet si None ou si ionice est
+    absent ; la priorité n'est honorée que par les ordonnanceurs BFQ/CFQ.
+    """
+    if io_priority is None or not shutil.which("ionice"):
+        return []
+    level = min(max(int(io_priority), 0), 7)
+    return ["ionice", "-c", _IONICE_BEST_EFFORT, "-n", str(level)]
 
 
 class CloneJob:
@@ -51,6 +179,13 @@ class CloneJob:
         self._cancel_event = threading.Event()
         self._process: Optional[subprocess.Popen] = None
         self._lock = threading.Lock()
+        self.metrics = JobMetrics()
+        self._sampler: Optional[IoStatsSampler] = None
+        self._max_rate_mb_s = 0.0
+        # Origine (instant, octets copiés) de la fenêtre de mesure du plafond
+        self._rate_epoch: Optional[tuple] = None
+        self._resume_event = threading.Event()
+        self._resume_event.set()
 
     def cancel(self) -> None:
         self._cancel_event.set()
@@ -61,6 +196,45 @@ class CloneJob:
     def is_cancelled(self) -> bool:
         return self._cancel_event.is_set()
 
+    def set_rate_limit(self, max_rate_mb_s: Optional[float]) -> None:
+        """Plafonne (ou libère, si 0/None) le débit de copie, y compris en cours de job."""
+        self._max_rate_mb_s = max(float(max_rate_mb_s or 0.0), 0.0)
+        self._rate_epoch = None
+
+    @property
+    def rate_limit(self) -> float:
+        return self._max_rate_mb_s
+
+    def pause(self) -> None:
+        """Suspend dd (ou cmp) à sa prochaine ligne d'avancement, jusqu'à resume()."""
+        self._resume_event.clear()
+
+    def resume(self) -> None:
+        self._resume_event.set()
+
+    @property
+    def paused(self) -> bool:
+        return not self._resume_event.is_set()
+
+    def wait_while_paused(self, process: subprocess.Popen) -> None:
+        """Garde `process` arrêté (SIGSTOP) tant que le job est en pause et non annulé."""
+        if not self.paused:
+            return
+        try:
+            os.kill(process.pid, signal.SIGSTOP)
+        except OSError:
+            return
+        try:
+            while not self.is_cancelled() and not self._resume_event.wait(0.2):
+                pass
+        finally:
+            try:
+                os.kill(process.pid, signal.SIGCONT)
+            except OSError:
+                pass
+        # La durée de la pause ne doit pas compter comme un retard à rattraper
+        self._rate_epoch = None
+
     def run(
         self,
         source_dev: str,
@@ -68,13 +242,36 @@ class CloneJob:
         block_size: str = "4M",
         progress_callback: Optional[Callable[[CloneProgress], None]] = None,
         log_func: Optional[Callable[[str], None]] = None,
+        bdi_max_ratio: Optional[int] = None,
+        cache_mode: str = "buffered",
+        preflight: bool = False,
+        min_write_mb_s: float = 0.0,
+        io_priority: Optional[int] = None,
+        max_rate_mb_s: Optional[float] = None,
     ) -> None:
         """
         Effectue le clonage bit-à-bit de source_dev vers dest_dev.
         `source_dev`/`dest_dev` sont des noms courts ("sda") ou des chemins
         complets ("/dev/sda") — les deux formats sont acceptés.
 
-        Lève CloneError (ou SizeMismatchError) en cas de problème.
+        `bdi_max_ratio` (optionnel) plafonne la part du cache d'écriture
+        allouée au disque de destination pendant la copie, pour que
+        l'avancement affiché suive les données réellement écrites plutôt
+        que celles simplement placées en cache.
+
+        `cache_mode` choisit la façon dont dd utilise le page cache (voir
+        CACHE_MODES) ; "direct" et "nocache" gardent la mémoire du système
+        stable, mais "direct" exige une taille de bloc multiple de celle des
+        secteurs et une destination qui accepte O_DIRECT.
+
+        `preflight` lance d'abord un test rapide de la destination (voir
+        preflight.py) : fausse capacité, ou débit d'écriture inférieur à
+        `min_write_mb_s`, font échouer le job avant la copie.
+
+        `io_priority` (0 à 7) lance dd sous ionice en classe best-effort ;
+        `max_rate_mb_s` plafonne le débit de copie (voir set_rate_limit).
+
+        Lève CloneError (ou SizeMismatchError, PreflightError) en cas de problème.
         """
         source_name = source_dev.split("/")[-1]
         dest_name = dest_dev.split("/")[-1]
@@ -85,6 +282,12 @@ class CloneJob:
             if log_func:
                 log_func(msg)
 
+        if cache_mode not in CACHE_MODES:
+            raise CloneError(f"Mode de cache inconnu : {cache_mode}")
+        if max_rate_mb_s is not None:
+            self.set_rate_limit(max_rate_mb_s)
+        self.metrics.memory_before = sample_memory()
+
         log(f"Vérification des tailles ({source_path} -> {dest_path})...")
         size_src = get_disk_size(source_name)
         size_dst = get_disk_size(dest_name)
@@ -103,15 +306,83 @@ class CloneJob:
         unmount_all_partitions(source_name, log_func=log)
         unmount_all_partitions(dest_name, log_func=log)
 
-        log(f"Démarrage du clonage : {source_path} -> {dest_path} ({size_src} octets, bloc {block_size})")
+        if preflight:
+            self._run_preflight(dest_name, size_dst, min_write_mb_s, progress_callback, log)
+
+        previous_ratio: Optional[int] = None
+        if bdi_max_ratio:
+            previous_ratio = set_bdi_max_ratio(dest_name, bdi_max_ratio)
+            if previous_ratio is None:
+                log("Plafond du cache d'écriture non appliqué (max_ratio indisponible).")
+            else:
+                log(f"Cache d'écriture de {dest_path} plafonné à {bdi_max_ratio} %.")
+        self._sampler = IoStatsSampler({"source": source_name, "dest": dest_name}).start()
+        try:
+            self._copy(source_path, dest_path, size_src, block_size, cache_mode,
+                       io_priority, progress_callback, log)
+            self._flush_device(dest_path, progress_callback, log)
+        finally:
+            if previous_ratio is not None:
+                set_bdi_max_ratio(dest_name, previous_ratio)
+            self._sampler.stop()
+            self.metrics.io_by_phase["copy"] = self._sampler.summary()
+            self._sampler = None
+        self.metrics.memory_after = sample_memory()
+        log("Clonage terminé avec succès.")
+
+    def _run_preflight(
+        self,
+        dest_name: str,
+        size_dst: int,
+        min_write_mb_s: float,
+        progress_callback: Optional[Callable[[CloneProgress], None]],
+        log: Callable[[str], None],
+    ) -> None:
+        if progress_callback:
+            progress_callback(CloneProgress(
+                copied_bytes=0, total_bytes=size_dst, percent=-1.0,
+                speed_mb_s=0.0, eta_seconds=0.0, elapsed_seconds=0.0,
+                phase="preflight",
+            ))
+        try:
+            result = probe_destination(
+                dest_name, size_dst, min_write_mb_s=min_write_mb_s,
+                log_func=log, cancel_check=self.is_cancelled,
+            )
+        except OSError as e:
+            raise CloneError(f"Test préalable de la destination impossible : {e}")
+        self.metrics.preflight = result
+        if result.cancelled or self.is_cancelled():
+            raise CloneError("Clonage annulé par l'utilisateur.")
+        if not result.ok:
+            raise PreflightError(result.reason())
+        log(f"Test préalable réussi ({result.checked_offsets} positions, {result.write_mb_s:.1f} Mo/s).")
+
+    def _copy(
+        self,
+        source_path: str,
+        dest_path: str,
+        size_src: int,
+        block_size: str,
+        cache_mode: str,
+        io_priority: Optional[int],
+        progress_callback: Optional[Callable[[CloneProgress], None]],
+        log: Callable[[str], None],
+    ) -> None:
+        log(
+            f"Démarrage du clonage : {source_path} -> {dest_path} "
+            f"({size_src} octets, bloc {block_size}, cache {cache_mode})"
+        )
 
         cmd = [
+            *ionice_prefix(io_priority),
             "dd",
             f"if={source_path}",
             f"of={dest_path}",
             f"bs={block_size}",
             "conv=noerror,sync",
             "status=progress",
+            *_DD_CACHE_FLAGS[cache_mode],
         ]
 
         with self._lock:
@@ -124,7 +395,9 @@ class CloneJob:
             )
         process = self._process
         start_time = time.time()
-        last_copied = 0
+        if self._max_rate_mb_s:
+            log(f"Débit de copie plafonné à {self._max_rate_mb_s:g} Mo/s.")
+            self._rate_epoch = (start_time, 0)
 
         # dd écrit ses lignes de progression avec un retour chariot '\r' et
         # non un saut de ligne : il faut donc lire caractère par caractère
@@ -157,7 +430,7 @@ class CloneJob:
                     continue
 
                 copied = int(m.group(1))
-                last_copied = copied
+                self.metrics.record_memory(sample_memory(process.pid))
                 elapsed = max(time.time() - start_time, 0.001)
                 percent = min(100.0, (copied / size_src) * 100)
                 speed_mb_s = (copied / (1024 * 1024)) / elapsed
@@ -172,7 +445,11 @@ class CloneJob:
                         speed_mb_s=speed_mb_s,
                         eta_seconds=eta,
                         elapsed_seconds=elapsed,
+                        io=self._io_snapshot(),
                     ))
+                # Avancement publié d'abord : la pause / le plafond suspendent dd ensuite
+                self.wait_while_paused(process)
+                self._throttle(process, copied)
 
         return_code = process.wait()
         with self._lock:
@@ -197,9 +474,111 @@ class CloneJob:
                 elapsed_seconds=elapsed,
             ))
 
-        log("Synchronisation finale des données sur le disque (sync)...")
-        subprocess.run(["sync"], check=False)
-        log("Clonage terminé avec succès.")
+    def _throttle(self, process: subprocess.Popen, copied: int) -> None:
+        """
+        Applique le plafond de débit : si dd est en avance sur le débit
+        autorisé depuis le début de la fenêtre de mesure, on le suspend
+        (SIGSTOP) le temps de revenir au plafond, puis SIGCONT.
+        """
+        rate = self._max_rate_mb_s
+        if rate <= 0:
+            return
+        now = time.time()
+        if self._rate_epoch is None:
+            self._rate_epoch = (now, copied)
+            return
+        epoch_time, epoch_bytes = self._rate_epoch
+        ahead = (copied - epoch_bytes) / (rate * 1024 * 1024) - (now - epoch_time)
+        if ahead <= 0.05:
+            return
+        try:
+            os.kill(process.pid, signal.SIGSTOP)
+        except OSError:
+            return
+        try:
+            deadline = now + ahead
+            while not self.is_cancelled() and time.time() < deadline:
+                time.sleep(min(0.1, max(deadline - time.time(), 0.0)))
+        finally:
+            try:
+                os.kill(process.pid, signal.SIGCONT)
+            except OSError:
+                pass
+
+    def _io_snapshot(self) -> Optional[Dict[str, DeviceIoStats]]:
+        return self._sampler.latest() if self._sampler else None
+
+    def _flush_device(
+        self,
+        dest_path: str,
+        progress_callback: Optional[Callable[[CloneProgress], None]],
+        log: Callable[[str], None],
+    ) -> None:
+        """
+        Vide le cache d'écriture du seul disque de destination (fsync sur le
+        périphérique puis BLKFLSBUF), en remontant l'avancement à partir des
+        compteurs Dirty/Writeback. fsync() n'étant pas interruptible, il est
+        exécuté dans un thread pendant que l'on échantillonne les compteurs.
+        """
+        dest_name = dest_path.split("/")[-1]
+        initial, per_device = get_pending_writeback_bytes(dest_name)
+        log(
+            "Écriture des données en attente sur le disque de destination "
+            f"({initial // (1024 * 1024)} Mo en cache"
+            f"{'' if per_device else ', compteur global'})..."
+        )
+
+        try:
+            fd = os.open(dest_path, os.O_RDONLY)
+        except OSError as e:
+            raise CloneError(f"Impossible d'ouvrir {dest_path} pour le vidage du cache : {e}")
+
+        errors: list = []
+
+        def _fsync() -> None:
+            try:
+                os.fsync(fd)
+            except OSError as e:
+                errors.append(e)
+
+        start = time.time()
+        flusher = threading.Thread(target=_fsync, daemon=True)
+        flusher.start()
+        try:
+            while flusher.is_alive():
+                flusher.join(_FLUSH_POLL_INTERVAL)
+                if progress_callback and initial > 0:
+                    pending, _ = get_pending_writeback_bytes(dest_name)
+                    flushed = max(initial - pending, 0)
+                    elapsed = max(time.time() - start, 0.001)
+                    speed_mb_s = (flushed / (1024 * 1024)) / elapsed
+                    progress_callback(CloneProgress(
+                        copied_bytes=flushed,
+                        total_bytes=initial,
+                        percent=min(100.0, flushed / initial * 100),
+                        speed_mb_s=speed_mb_s,
+                        eta_seconds=(min(pending, initial) / (1024 * 1024)) / speed_mb_s if speed_mb_s > 0 else 0.0,
+                        elapsed_seconds=elapsed,
+                        phase="flush",
+                        io=self._io_snapshot(),
+                    ))
+            if errors:
+                raise CloneError(f"Échec de l'écriture finale sur {dest_path} : {errors[0]}")
+            try:
+                fcntl.ioctl(fd, _BLKFLSBUF)
+            except OSError:
+                pass  # fsync a déjà garanti l'écriture ; l'invalidation est un bonus
+        finally:
+            os.close(fd)
+
+        if progress_callback:
+            elapsed = max(time.time() - start, 0.001)
+            progress_callback(CloneProgress(
+                copied_bytes=initial, total_bytes=initial, percent=100.0,
+                speed_mb_s=(initial / (1024 * 1024)) / elapsed,
+                eta_seconds=0.0, elapsed_seconds=elapsed, phase="flush",
+            ))
+        log(f"Données écrites sur {dest_path} en {time.time() - start:.1f} s.")
 
 
 def verify_clone(
@@ -208,6 +587,9 @@ def verify_clone(
     progress_callback: Optional[Callable[[CloneProgress], None]] = None,
     log_func: Optional[Callable[[str], None]] = None,
     cancel_job: Optional[CloneJob] = None,
+    cache_mode: str = "buffered",
+    metrics: Optional[JobMetrics] = None,
+    io_priority: Optional[int] = None,
 ) -> bool:
     """
     Vérifie l'identité bit-à-bit des deux disques sur la taille du disque
@@ -215,6 +597,10 @@ def verify_clone(
 
     Optionnel : appelé après CloneJob.run() si l'utilisateur a activé la
     vérification post-clonage dans les paramètres.
+
+    Sauf en mode "buffered", les plages déjà comparées sont évincées du
+    cache au fur et à mesure (cmp ne sait pas le faire lui-même) : la
+    position de cmp, lue dans /proc/<pid>/fdinfo, sert aussi d'avancement.
     """
     source_name = source_dev.split("/")[-1]
     dest_name = dest_dev.split("/")[-1]
@@ -229,31 +615,80 @@ def verify_clone(
     if size_src <= 0:
         raise CloneError(f"Impossible de lire la taille du disque source {source_path}.")
 
+    drop_cache = cache_mode != "buffered"
     log("Vérification post-clonage en cours (comparaison bit-à-bit)...")
     process = subprocess.Popen(
-        ["cmp", "-s", source_path, dest_path],
+        [*ionice_prefix(io_priority), "cmp", "-s", source_path, dest_path],
         stdout=subprocess.DEVNULL,
         stderr=subprocess.DEVNULL,
     )
+    sampler = IoStatsSampler({"source": source_name, "dest": dest_name}).start()
+    try:
+        identical = _wait_for_cmp(
+            process, source_path, dest_path, size_src, drop_cache,
+            sampler, progress_callback, cancel_job, metrics,
+        )
+    finally:
+        sampler.stop()
+        if metrics:
+            metrics.io_by_phase["verify"] = sampler.summary()
+
+    if drop_cache:
+        drop_cached_range(source_path)
+        drop_cached_range(dest_path)
+    if metrics:
+        metrics.memory_after = sample_memory()
+
+    if identical:
+        log("Vérification réussie : les disques sont identiques.")
+    else:
+        log("ÉCHEC de la vérification : les disques diffèrent.")
+    return identical
+
+
+def _wait_for_cmp(
+    process: subprocess.Popen,
+    source_path: str,
+    dest_path: str,
+    size_src: int,
+    drop_cache: bool,
+    sampler: IoStatsSampler,
+    progress_callback: Optional[Callable[[CloneProgress], None]],
+    cancel_job: Optional[CloneJob],
+    metrics: Optional[JobMetrics],
+) -> bool:
     start = time.time()
     while process.poll() is None:
+        if cancel_job:
+            cancel_job.wait_while_paused(process)
         if cancel_job and cancel_job.is_cancelled():
             process.terminate()
             raise CloneError("Vérification annulée par l'utilisateur.")
         elapsed = time.time() - start
+        position = get_process_file_offset(process.pid, source_path)
+        if drop_cache and position:
+            drop_cached_range(source_path, position)
+            drop_cached_range(dest_path, position)
+        if metrics:
+            metrics.record_memory(sample_memory(process.pid))
         if progress_callback:
-            # cmp ne donne pas d'avancement fin ; on communique juste que la
-            # vérification est en cours (le GUI peut afficher un indicateur
-            # indéterminé pendant cette phase).
-            progress_callback(CloneProgress(
-                copied_bytes=0, total_bytes=size_src, percent=-1.0,
-                speed_mb_s=0.0, eta_seconds=0.0, elapsed_seconds=elapsed,
-            ))
+            # Sans position lisible, on communique juste que la vérification
+            # est en cours (le GUI affiche alors un indicateur indéterminé).
+            if position is None:
+                progress_callback(CloneProgress(
+                    copied_bytes=0, total_bytes=size_src, percent=-1.0,
+                    speed_mb_s=0.0, eta_seconds=0.0, elapsed_seconds=elapsed,
+                    phase="verify", io=sampler.latest(),
+                ))
+            else:
+                speed_mb_s = (position / (1024 * 1024)) / max(elapsed, 0.001)
+                remaining = max(size_src - position, 0) / (1024 * 1024)
+                progress_callback(CloneProgress(
+                    copied_bytes=position, total_bytes=size_src,
+                    percent=min(100.0, position / size_src * 100),
+                    speed_mb_s=speed_mb_s,
+                    eta_seconds=remaining / speed_mb_s if speed_mb_s > 0 else 0.0,
+                    elapsed_seconds=elapsed, phase="verify", io=sampler.latest(),
+                ))
         time.sleep(0.5)
-
-    identical = process.returncode == 0
-    if identical:
-        log("Vérification réussie : les disques sont identiques.")
-    else:
-        log("ÉCHEC de la vérification : les disques diffèrent.")
-    return identical
\ No newline at end of file
+    return process.returncode == 0
@@ -0,0 +1,413 @@
+"""
+clone_worker.py – Moteur de clonage dans un processus dédié, un par job.
+
+Le CloneJob (lecture de la sortie de dd, échantillonnage des E/S, éviction
+du cache, vérification) tournait dans un thread du processus Tk et se
+disputait le GIL avec l'interface. Chaque job s'exécute désormais dans son
+propre processus (multiprocessing, méthode "spawn" : rien de l'état Tk
+n'est hérité) :
+
+  * l'avancement est écrit par le processus de travail dans un bloc
+    multiprocessing.shared_memory de taille fixe, protégé par un compteur
+    de séquence (seqlock) : le processus principal le lit sans aller-retour
+    de messages ni verrou ;
+  * les commandes (annulation, pause, reprise, plafond de débit) partent
+    sur un Pipe ; le journal, le passage à la vérification et le résultat
+    final (métriques comprises) reviennent par le même Pipe ;
+  * un plantage du processus de travail est rapporté comme une erreur de
+    clonage ordinaire : l'interface de la borne n'est jamais emportée.
+
+Côté processus principal, execute() est une coroutine : les Pipes et les
+sentinelles de tous les processus de travail sont surveillés par une même
+boucle asyncio (orchestrator.AsyncBridge), sans thread par job.
+
+Si la mémoire partagée est indisponible (pas de /dev/shm), le job s'exécute
+comme avant dans un thread du processus courant.
+"""
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import signal
+import struct
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, Optional
+
+from clone import CloneError, CloneJob, CloneProgress, JobMetrics, SizeMismatchError, verify_clone
+from iostats import DeviceIoStats
+
+PHASES = ("", "preflight", "copy", "flush", "verify")
+_IO_ROLES = ("source", "dest")
+_IO_FIELDS = ("read_mb_s", "write_mb_s", "read_iops", "write_iops", "avg_request_kb",
+              "queue_depth", "await_ms", "utilization_percent")
+
+# seq, phase, copied, total, percent, speed, eta, elapsed,
+# puis pour chaque rôle : présent, 8 mesures, in_flight
+_SEQ = struct.Struct("<Q")
+_HEADER_BODY = struct.Struct("<B7xQQdddd")
+_HEADER = struct.Struct("<Q" + _HEADER_BODY.format[1:])
+_IO_BLOCK = struct.Struct("<B7x" + "d" * len(_IO_FIELDS) + "q")
+_PROGRESS_SIZE = _HEADER.size + _IO_BLOCK.size * len(_IO_ROLES)
+
+_POLL_INTERVAL = 0.25
+# Délai laissé au processus pour s'arrêter proprement après une annulation
+_CANCEL_GRACE = 10.0
+
+_CONTEXT = multiprocessing.get_context("spawn")
+
+
+class SharedProgress:
+    """
+    Dernier CloneProgress d'un job, en mémoire partagée. Un seul écrivain
+    (le processus de travail) ; les lecteurs relisent tant que le compteur
+    de séquence est impair ou a changé pendant la lecture.
+    """
+
+    def __init__(self, name: Optional[str] = None) -> None:
+        if name is None:
+            self._shm = shared_memory.SharedMemory(create=True, size=_PROGRESS_SIZE)
+            self._shm.buf[:_PROGRESS_SIZE] = bytes(_PROGRESS_SIZE)
+            self._owner = True
+        else:
+            # Le processus de travail partage le resource_tracker du parent :
+            # seul le créateur supprime le bloc (close(), plus bas).
+            self._shm = shared_memory.SharedMemory(name=name)
+            self._owner = False
+        self._seq = 0
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def write(self, progress: CloneProgress) -> None:
+        buf = self._shm.buf
+        self._seq += 1
+        # Séquence impaire d'abord : tant qu'elle n'est pas remplacée par la
+        # paire suivante, les lecteurs savent que le contenu est en cours d'écriture.
+        _SEQ.pack_into(buf, 0, self._seq * 2 - 1)
+        _HEADER_BODY.pack_into(
+            buf, _SEQ.size,
+            PHASES.index(progress.phase) if progress.phase in PHASES else 0,
+            progress.copied_bytes, progress.total_bytes, progress.percent,
+            progress.speed_mb_s, progress.eta_seconds, progress.elapsed_seconds,
+        )
+        offset = _HEADER.size
+        for role in _IO_ROLES:
+            stats = (progress.io or {}).get(role)
+            if stats is None:
+                _IO_BLOCK.pack_into(buf, offset, 0, *([0.0] * len(_IO_FIELDS)), 0)
+            else:
+                _IO_BLOCK.pack_into(buf, offset, 1, *(getattr(stats, f) for f in _IO_FIELDS),
+                                    stats.in_flight)
+            offset += _IO_BLOCK.size
+        _SEQ.pack_into(buf, 0, self._seq * 2)
+
+    def read(self, devnames: Optional[Dict[str, str]] = None) -> Optional[tuple]:
+        """
+        Retourne (séquence, CloneProgress), ou None si rien n'a encore été
+        écrit. `devnames` ({"source": "sda", ...}) renseigne les DeviceIoStats.
+        """
+        buf = self._shm.buf
+        while True:
+            (seq,) = _SEQ.unpack_from(buf, 0)
+            if seq == 0:
+                return None
+            if seq % 2:
+                time.sleep(0)
+                continue
+            header = _HEADER.unpack_from(buf, 0)
+            blocks = [_IO_BLOCK.unpack_from(buf, _HEADER.size + i * _IO_BLOCK.size)
+                      for i in range(len(_IO_ROLES))]
+            (check,) = _SEQ.unpack_from(buf, 0)
+            if check == seq:
+                break
+        _seq, phase, copied, total, percent, speed, eta, elapsed = header
+        io: Dict[str, DeviceIoStats] = {}
+        for role, block in zip(_IO_ROLES, blocks):
+            if block[0]:
+                values = dict(zip(_IO_FIELDS, block[1:-1]))
+                io[role] = DeviceIoStats(devname=(devnames or {}).get(role, ""),
+                                         in_flight=block[-1], **values)
+        progress = CloneProgress(
+            copied_bytes=copied, total_bytes=total, percent=percent,
+            speed_mb_s=speed, eta_seconds=eta, elapsed_seconds=elapsed,
+            phase=PHASES[phase] or "copy", io=io or None,
+        )
+        return seq, progress
+
+    def close(self) -> None:
+        self._shm.close()
+        if self._owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def _apply_command(job: CloneJob, command: str, *args: Any) -> None:
+    if command == "cancel":
+        job.cancel()
+    elif command == "pause":
+        job.pause()
+    elif command == "resume":
+        job.resume()
+    elif command == "rate":
+        job.set_rate_limit(args[0])
+
+
+def _worker_main(conn, shm_name: str, source_dev: str, dest_dev: str,
+                 run_options: Dict[str, Any], verify: bool) -> None:
+    """Point d'entrée du processus de travail."""
+    progress = SharedProgress(shm_name)
+    job = CloneJob()
+    send_lock = threading.Lock()
+
+    def send(*message: Any) -> None:
+        with send_lock:
+            try:
+                conn.send(message)
+            except (OSError, EOFError):
+                pass
+
+    def listen() -> None:
+        while True:
+            try:
+                command = conn.recv()
+            except (OSError, EOFError):
+                job.cancel()  # processus principal disparu : on arrête dd
+                return
+            _apply_command(job, *command)
+
+    # SIGTERM (fermeture de la borne) : on arrête dd avant de mourir
+    signal.signal(signal.SIGTERM, lambda signum, frame: job.cancel())
+    threading.Thread(target=listen, daemon=True).start()
+    log = lambda message: send("log", message)
+    try:
+        job.run(source_dev, dest_dev, progress_callback=progress.write, log_func=log, **run_options)
+        send("copied")
+        verified = None
+        if verify:
+            verified = verify_clone(
+                source_dev, dest_dev, progress_callback=progress.write, log_func=log,
+                cancel_job=job, cache_mode=run_options.get("cache_mode", "buffered"),
+                metrics=job.metrics, io_priority=run_options.get("io_priority"),
+            )
+        send("done", verified, job.metrics)
+    except SizeMismatchError as e:
+        send("error", "size", str(e), job.is_cancelled(), job.metrics)
+    except CloneError as e:
+        send("error", "clone", str(e), job.is_cancelled(), job.metrics)
+    except Exception as e:  # rapporté au processus principal plutôt que perdu
+        send("error", "unexpected", f"{type(e).__name__}: {e}", job.is_cancelled(), job.metrics)
+    finally:
+        progress.close()
+        conn.close()
+
+
+class ProcessCloneJob:
+    """
+    Pendant, côté processus principal, d'un CloneJob exécuté dans un
+    processus dédié : même interface de pilotage (cancel, pause, resume,
+    set_rate_limit, metrics) et une coroutine execute() qui enchaîne
+    clonage et vérification.
+    """
+
+    def __init__(self) -> None:
+        self.metrics = JobMetrics()
+        self._cancelled = threading.Event()
+        self._paused = False
+        self._max_rate_mb_s = 0.0
+        self._lock = threading.Lock()
+        self._conn = None
+        self._local: Optional[CloneJob] = None
+
+    # -- Commandes (depuis n'importe quel thread) -----------------------------
+    def _send(self, *command: Any) -> None:
+        with self._lock:
+            if self._conn is not None:
+                try:
+                    self._conn.send(command)
+                except (OSError, EOFError, ValueError):
+                    pass
+            elif self._local is not None:
+                _apply_command(self._local, *command)
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+        self._send("cancel")
+
+    def is_cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def pause(self) -> None:
+        self._paused = True
+        self._send("pause")
+
+    def resume(self) -> None:
+        self._paused = False
+        self._send("resume")
+
+    @property
+    def paused(self) -> bool:
+        return self._paused
+
+    def set_rate_limit(self, max_rate_mb_s: Optional[float]) -> None:
+        self._max_rate_mb_s = max(float(max_rate_mb_s or 0.0), 0.0)
+        self._send("rate", self._max_rate_mb_s)
+
+    # -- Exécution --------------------------------------------------------------
+    async def execute(
+        self,
+        source_dev: str,
+        dest_dev: str,
+        verify: bool = False,
+        progress_callback: Optional[Callable[[CloneProgress], None]] = None,
+        log_func: Optional[Callable[[str], None]] = None,
+        on_copied: Optional[Callable[[], None]] = None,
+        **run_options: Any,
+    ) -> Optional[bool]:
+        """
+        Clone (puis vérifie si `verify`) dans un processus dédié et attend
+        la fin. Retourne le résultat de la vérification (None si
+        non demandée) ; lève CloneError / SizeMismatchError comme CloneJob.
+        `run_options` : paramètres nommés de CloneJob.run().
+        """
+        log = log_func or (lambda message: None)
+        run_options["max_rate_mb_s"] = self._max_rate_mb_s
+        try:
+            progress = SharedProgress()
+        except OSError as e:
+            log(f"Mémoire partagée indisponible ({e}) : clonage dans le processus principal.")
+            return await asyncio.to_thread(self._execute_locally, source_dev, dest_dev, verify,
+                                           progress_callback, log, on_copied, run_options)
+
+        parent_conn, child_conn = _CONTEXT.Pipe()
+        process = _CONTEXT.Process(
+            target=_worker_main, name=f"clone-{dest_dev}", daemon=True,
+            args=(child_conn, progress.name, source_dev, dest_dev, run_options, verify),
+        )
+        try:
+            # start() attend la création du processus : hors de la boucle
+            await asyncio.to_thread(process.start)
+            child_conn.close()
+            with self._lock:
+                self._conn = parent_conn
+            # Commandes arrivées pendant le démarrage
+            if self._cancelled.is_set():
+                self._send("cancel")
+            if self._paused:
+                self._send("pause")
+            return await self._supervise(process, parent_conn, progress, source_dev, dest_dev,
+                                         progress_callback, log, on_copied)
+        finally:
+            with self._lock:
+                self._conn = None
+            parent_conn.close()
+            if process.is_alive():
+                # Tâche annulée ou erreur : SIGTERM annule dd dans le processus
+                process.terminate()
+            await asyncio.to_thread(process.join, _CANCEL_GRACE)
+            if process.is_alive():
+                process.kill()
+            progress.close()
+
+    async def _supervise(self, process, conn, progress: SharedProgress, source_dev: str,
+                         dest_dev: str, progress_callback, log, on_copied) -> Optional[bool]:
+        devnames = {"source": source_dev.split("/")[-1], "dest": dest_dev.split("/")[-1]}
+        last_seq = 0
+        cancel_deadline: Optional[float] = None
+        # Réveil dès qu'un message arrive ou que le processus se termine
+        loop = asyncio.get_running_loop()
+        readable = asyncio.Event()
+        watched = (conn.fileno(), process.sentinel)
+        for fd in watched:
+            loop.add_reader(fd, readable.set)
+        try:
+            while True:
+                snapshot = progress.read(devnames)
+                if snapshot is not None and snapshot[0] != last_seq:
+                    last_seq = snapshot[0]
+                    if progress_callback:
+                        progress_callback(snapshot[1])
+
+                if self._cancelled.is_set() and cancel_deadline is None:
+                    cancel_deadline = time.monotonic() + _CANCEL_GRACE
+                if cancel_deadline is not None and time.monotonic() > cancel_deadline:
+                    process.terminate()
+                    raise CloneError("Clonage annulé par l'utilisateur (processus arrêté de force).")
+
+                try:
+                    await asyncio.wait_for(readable.wait(), _POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    continue
+                readable.clear()
+                while True:
+                    try:
+                        if not conn.poll():
+                            break
+                        kind, *payload = conn.recv()
+                    except (OSError, EOFError):
+                        break
+                    result = self._handle_message(kind, payload, on_copied, log)
+                    if kind == "done":
+                        # Dernier avancement écrit juste avant la fin
+                        snapshot = progress.read(devnames)
+                        if snapshot is not None and snapshot[0] != last_seq and progress_callback:
+                            progress_callback(snapshot[1])
+                        return result
+                if not process.is_alive():
+                    raise CloneError(
+                        f"Le processus de clonage s'est arrêté inopinément (code {process.exitcode})."
+                    )
+        finally:
+            for fd in watched:
+                loop.remove_reader(fd)
+
+    def _handle_message(self, kind: str, payload: list, on_copied, log) -> Optional[bool]:
+        """Traite un message du processus de travail ; lève l'erreur qu'il rapporte."""
+        if kind == "log":
+            log(payload[0])
+        elif kind == "copied":
+            if on_copied:
+                on_copied()
+        elif kind == "done":
+            verified, self.metrics = payload
+            return verified
+        elif kind == "error":
+            error_kind, message, cancelled, self.metrics = payload
+            if cancelled:
+                self._cancelled.set()
+            if error_kind == "size":
+                raise SizeMismatchError(message)
+            if error_kind == "clone":
+                raise CloneError(message)
+            raise RuntimeError(message)
+        return None
+
+    def _execute_locally(self, source_dev, dest_dev, verify, progress_callback, log,
+                         on_copied, run_options) -> Optional[bool]:
+        job = CloneJob()
+        with self._lock:
+            self._local = job
+        self.metrics = job.metrics
+        if self._cancelled.is_set():
+            job.cancel()
+        if self._paused:
+            job.pause()
+        try:
+            job.run(source_dev, dest_dev, progress_callback=progress_callback,
+                    log_func=log, **run_options)
+            if on_copied:
+                on_copied()
+            if not verify:
+                return None
+            return verify_clone(
+                source_dev, dest_dev, progress_callback=progress_callback, log_func=log,
+                cancel_job=job, cache_mode=run_options.get("cache_mode", "buffered"),
+                metrics=job.metrics, io_priority=run_options.get("io_priority"),
+            )
+        finally:
+            with self._lock:
+                self._local = None
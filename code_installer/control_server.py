@@ -0,0 +1,329 @@
+"""
+control_server.py – API locale de pilotage et de supervision (socket Unix).
+
+Pour savoir ce que fait une borne, il fallait être devant. Le serveur de
+contrôle écoute sur une socket Unix (root uniquement, 0600) et parle un
+petit protocole JSON, une requête puis une réponse par ligne :
+
+    {"id": 1, "cmd": "devices"}        disques USB branchés
+    {"id": 2, "cmd": "stations"}       postes configurés et disques présents
+    {"id": 3, "cmd": "jobs"}           état de chaque poste
+    {"id": 4, "cmd": "production"}     état du mode production
+    {"id": 5, "cmd": "start", "station": "Poste 1", "confirm": true}
+    {"id": 6, "cmd": "cancel" | "pause" | "resume", "station": "Poste 1"}
+    {"id": 7, "cmd": "subscribe"}      puis lignes {"event": "job", ...}
+    {"id": 8, "cmd": "unsubscribe"}
+
+Réponse : {"id": ..., "ok": true, "result": ...} ou {"id": ..., "ok":
+false, "error": "..."}. `start` efface la destination : "confirm": true
+est obligatoire, comme la saisie de EFFACER dans l'interface.
+
+Tous les clients sont servis par la boucle asyncio partagée
+(orchestrator.AsyncBridge). Côté clonage, une mise à jour de job ne coûte
+qu'un instantané et un call_soon_threadsafe ; chaque abonné ne garde que
+le DERNIER état de chaque poste en attente d'envoi : un client lent reçoit
+moins de mises à jour, mais ne freine ni les jobs ni les autres clients.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import dataclasses
+import json
+import os
+from typing import Any, Dict, List, Optional, Set
+
+import config_manager
+from job_manager import CloneOptions, JobManager, JobManagerError, StationJob, load_stations
+from log_handler import log_info, log_warning
+from orchestrator import AsyncBridge, get_bridge
+from utils import find_disk_by_id_path, is_system_disk, list_block_devices
+
+DEFAULT_SOCKET_PATH = "/run/disk_cloner/control.sock"
+_SOCKET_MODE = 0o600
+_MAX_LINE = 64 * 1024
+_START_TIMEOUT = 5.0
+_FLUSH_TIMEOUT = 1.0
+
+
+def _json_default(value: Any) -> Any:
+    if dataclasses.is_dataclass(value):
+        return dataclasses.asdict(value)
+    return str(value)
+
+
+def _encode(message: Dict[str, Any]) -> bytes:
+    return (json.dumps(message, ensure_ascii=False, default=_json_default) + "\n").encode()
+
+
+def job_snapshot(job: StationJob) -> Dict[str, Any]:
+    """État sérialisable d'un job, tel que diffusé aux clients."""
+    return {
+        "station": job.station.name,
+        "state": job.state,
+        "source": job.source.devname,
+        "dest": job.dest.devname,
+        "paused": job.paused,
+        "unattended": job.unattended,
+        "progress": dataclasses.asdict(job.progress) if job.progress else None,
+        "message": job.message,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+
+class ControlError(Exception):
+    """Requête refusée ; le message est renvoyé tel quel au client."""
+
+
+class _Client:
+    """Connexion d'un client : réponses à envoyer et états de jobs en attente."""
+
+    def __init__(self) -> None:
+        self.subscribed = False
+        self.replies: List[bytes] = []
+        self.pending: Dict[str, Dict[str, Any]] = {}    # poste -> dernier état
+        self.wakeup = asyncio.Event()
+
+
+class ControlServer:
+    """
+    Serveur de contrôle adossé à un JobManager (et, s'il y en a un, au mode
+    production). start() / stop() s'appellent depuis n'importe quel thread.
+    """
+
+    def __init__(
+        self,
+        jobs: JobManager,
+        production=None,
+        path: str = DEFAULT_SOCKET_PATH,
+        bridge: Optional[AsyncBridge] = None,
+    ) -> None:
+        self._jobs = jobs
+        self._production = production
+        self._path = path
+        self._bridge = bridge
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._clients: Set[_Client] = set()
+        self._writers: Set[asyncio.StreamWriter] = set()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def running(self) -> bool:
+        return self._server is not None
+
+    # -- Cycle de vie -------------------------------------------------------
+    def start(self) -> bool:
+        """Ouvre la socket ; retourne False (et journalise) en cas d'échec."""
+        if self._server is not None:
+            return True
+        if self._bridge is None:
+            self._bridge = get_bridge()
+        try:
+            self._bridge.submit(self._open()).result(_START_TIMEOUT)
+        except OSError as e:
+            log_warning(f"API de contrôle indisponible ({self._path}) : {e}")
+            return False
+        self._jobs.add_listener(self._on_job_update)
+        log_info(f"API de contrôle à l'écoute sur {self._path}")
+        return True
+
+    def stop(self) -> None:
+        if self._server is None or self._bridge is None:
+            return
+        self._jobs.remove_listener(self._on_job_update)
+        self._bridge.submit(self._close()).result(_START_TIMEOUT)
+
+    async def _open(self) -> None:
+        os.makedirs(os.path.dirname(self._path), mode=0o750, exist_ok=True)
+        if os.path.exists(self._path):
+            os.unlink(self._path)   # socket laissée par une instance précédente
+        self._loop = asyncio.get_running_loop()
+        self._server = await asyncio.start_unix_server(self._serve_client, path=self._path,
+                                                       limit=_MAX_LINE)
+        os.chmod(self._path, _SOCKET_MODE)
+
+    async def _close(self) -> None:
+        server, self._server = self._server, None
+        if server is None:
+            return
+        server.close()
+        for writer in list(self._writers):
+            writer.close()
+        await server.wait_closed()
+        try:
+            os.unlink(self._path)
+        except OSError:
+            pass
+
+    # -- Diffusion des états de jobs --------------------------------------------
+    def _on_job_update(self, station_name: str, job: StationJob) -> None:
+        # Appelé sur le chemin du clonage : rien de bloquant ici
+        if not self._clients or self._loop is None:
+            return
+        snapshot = job_snapshot(job)
+        try:
+            self._loop.call_soon_threadsafe(self._publish, station_name, snapshot)
+        except RuntimeError:
+            pass  # boucle arrêtée
+
+    def _publish(self, station_name: str, snapshot: Dict[str, Any]) -> None:
+        for client in self._clients:
+            if client.subscribed:
+                client.pending[station_name] = snapshot
+                client.wakeup.set()
+
+    # -- Connexions -------------------------------------------------------------
+    async def _serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        client = _Client()
+        self._clients.add(client)
+        self._writers.add(writer)
+        pump = asyncio.create_task(self._pump(client, writer))
+        try:
+            while not pump.done():
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    client.replies.append(_encode({"ok": False, "error": "Requête trop longue."}))
+                    client.wakeup.set()
+                    break
+                except ConnectionError:
+                    break
+                if not line:
+                    break
+                if line.strip():
+                    client.replies.append(_encode(await self._reply(client, line)))
+                    client.wakeup.set()
+        finally:
+            self._clients.discard(client)
+            pump.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await pump
+            # Dernières réponses (ex : requête trop longue) avant la fermeture
+            for data in client.replies:
+                writer.write(data)
+            with contextlib.suppress(ConnectionError, asyncio.TimeoutError):
+                await asyncio.wait_for(writer.drain(), _FLUSH_TIMEOUT)
+            self._writers.discard(writer)
+            writer.close()
+
+    async def _pump(self, client: _Client, writer: asyncio.StreamWriter) -> None:
+        """Seul écrivain de la connexion : réponses d'abord, puis états coalescés."""
+        try:
+            while True:
+                await client.wakeup.wait()
+                client.wakeup.clear()
+                replies, client.replies = client.replies, []
+                pending, client.pending = client.pending, {}
+                for data in replies:
+                    writer.write(data)
+                for snapshot in pending.values():
+                    writer.write(_encode({"event": "job", **snapshot}))
+                await writer.drain()
+        except ConnectionError:
+            pass
+
+    async def _reply(self, client: _Client, line: bytes) -> Dict[str, Any]:
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ControlError("La requête doit être un objet JSON.")
+            request_id = request.get("id")
+            result = await self._dispatch(client, request)
+        except json.JSONDecodeError:
+            return {"id": None, "ok": False, "error": "JSON invalide."}
+        except (ControlError, JobManagerError) as e:
+            return {"id": request_id, "ok": False, "error": str(e)}
+        except Exception as e:  # une requête défaillante ne doit pas couper le serveur
+            log_warning(f"API de contrôle : erreur sur {line[:200]!r} : {e}")
+            return {"id": request_id, "ok": False, "error": f"Erreur interne : {e}"}
+        return {"id": request_id, "ok": True, "result": result}
+
+    # -- Commandes ----------------------------------------------------------------
+    async def _dispatch(self, client: _Client, request: Dict[str, Any]) -> Any:
+        command = request.get("cmd")
+        if command == "devices":
+            disks = await asyncio.to_thread(list_block_devices, True)
+            return [dataclasses.asdict(d) for d in disks]
+        if command == "stations":
+            return await asyncio.to_thread(self._stations)
+        if command == "jobs":
+            return [job_snapshot(job) for job in self._jobs.jobs()]
+        if command == "production":
+            if self._production is None:
+                return None
+            stats = self._production.stats
+            return {"armed": self._production.armed, "stats": dataclasses.asdict(stats),
+                    "summary": stats.summary()}
+        if command == "start":
+            return job_snapshot(await self._start(request))
+        if command in ("cancel", "pause", "resume"):
+            station = self._station_name(request)
+            return getattr(self._jobs, command)(station)
+        if command == "subscribe":
+            client.subscribed = True
+            for job in self._jobs.jobs():
+                client.pending[job.station.name] = job_snapshot(job)
+            return True
+        if command == "unsubscribe":
+            client.subscribed = False
+            client.pending.clear()
+            return True
+        raise ControlError(f"Commande inconnue : {command!r}.")
+
+    @staticmethod
+    def _station_name(request: Dict[str, Any]) -> str:
+        name = request.get("station")
+        if not isinstance(name, str) or not name:
+            raise ControlError("Paramètre \"station\" manquant.")
+        return name
+
+    @staticmethod
+    def _stations() -> List[Dict[str, Any]]:
+        result = []
+        for station in load_stations():
+            source = find_disk_by_id_path(station.source_id_path) if station.source_id_path else None
+            dest = find_disk_by_id_path(station.dest_id_path) if station.dest_id_path else None
+            result.append({**dataclasses.asdict(station), "configured": station.configured,
+                           "source": dataclasses.asdict(source) if source else None,
+                           "dest": dataclasses.asdict(dest) if dest else None})
+        return result
+
+    async def _start(self, request: Dict[str, Any]) -> StationJob:
+        name = self._station_name(request)
+        if request.get("confirm") is not True:
+            raise ControlError("Le clonage efface la destination : \"confirm\": true est requis.")
+        station = next((s for s in load_stations() if s.name == name), None)
+        if station is None or not station.configured:
+            raise ControlError(f"Poste inconnu ou incomplet : {name}.")
+        source, dest = await asyncio.gather(
+            asyncio.to_thread(find_disk_by_id_path, station.source_id_path),
+            asyncio.to_thread(find_disk_by_id_path, station.dest_id_path),
+        )
+        if source is None or dest is None:
+            raise ControlError(f"{name} : disque absent sur le port "
+                               f"{'source' if source is None else 'destination'}.")
+        if dest.size_bytes < source.size_bytes:
+            raise ControlError(f"{name} : la destination ({dest.size_human}) est plus petite "
+                               f"que la source ({source.size_human}).")
+        if is_system_disk(dest.devname):
+            raise ControlError(f"{name} : {dest.path} porte le système, clonage refusé.")
+        options = CloneOptions.from_config()
+        if isinstance(request.get("verify"), bool):
+            options.verify = request["verify"]
+        log_info(f"API de contrôle : démarrage du clonage de {name}")
+        return self._jobs.start(station, source, dest, options)
+
+
+def start_control_server(jobs: JobManager, production=None) -> Optional[ControlServer]:
+    """Démarre l'API sur la socket configurée ; None si désactivée ou indisponible."""
+    path = config_manager.get_control_socket_path()
+    if not path:
+        return None
+    server = ControlServer(jobs, production, path)
+    return server if server.start() else None
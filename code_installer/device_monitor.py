@@ -0,0 +1,254 @@
+"""
+device_monitor.py – Suivi des disques par événements udev (netlink).
+
+Plutôt que de relancer `lsblk` + `udevadm info` toutes les 2 secondes, on
+écoute les uevents diffusés par udev sur une socket AF_NETLINK /
+NETLINK_KOBJECT_UEVENT (bibliothèque standard uniquement). Chaque message
+du groupe "udev" arrive APRÈS le traitement des règles : il porte donc
+déjà ID_PATH, ID_MODEL, ID_SERIAL... On maintient ainsi en mémoire un
+index `id_path -> DiskInfo`, mis à jour uniquement sur add/remove/change,
+et l'on prévient les abonnés (GUI, assistant de détection) en quelques
+dizaines de millisecondes.
+
+Si la socket ne peut pas être ouverte (noyau/conteneur sans netlink), le
+moniteur ne démarre pas et les appelants reviennent au sondage périodique.
+"""
+from __future__ import annotations
+
+import errno
+import select
+import socket
+import struct
+import threading
+from typing import Callable, Dict, List, Optional
+
+from utils import DiskInfo, disk_info_from_properties, list_block_devices, usb_port_key
+
+NETLINK_KOBJECT_UEVENT = 15
+# Groupes multicast : 1 = événements bruts du noyau, 2 = événements udev
+# (après application des règles, enrichis des propriétés ID_*).
+UDEV_MONITOR_GROUP = 2
+
+_LIBUDEV_PREFIX = b"libudev\0"
+_LIBUDEV_MAGIC = 0xFEEDCAFE
+_RECV_BUFFER = 1024 * 1024
+_POLL_TIMEOUT = 0.5
+
+# Abonné : callback(action, disk), action parmi "add", "change", "remove"
+DeviceListener = Callable[[str, DiskInfo], None]
+
+
+def parse_uevent(data: bytes) -> Optional[Dict[str, str]]:
+    """
+    Décode un message uevent en dictionnaire de propriétés. Gère le format
+    libudev (en-tête binaire + propriétés) et le format brut du noyau
+    ("action@devpath" suivi des propriétés), séparés par des octets nuls.
+    """
+    if data.startswith(_LIBUDEV_PREFIX):
+        if len(data) < 24:
+            return None
+        (magic,) = struct.unpack_from("!I", data, 8)
+        if magic != _LIBUDEV_MAGIC:
+            return None
+        _header_size, props_off, props_len = struct.unpack_from("=III", data, 12)
+        payload = data[props_off:props_off + props_len]
+    elif b"@" in data.split(b"\0", 1)[0]:
+        payload = data.split(b"\0", 1)[1] if b"\0" in data else b""
+    else:
+        return None
+
+    props: Dict[str, str] = {}
+    for item in payload.split(b"\0"):
+        key, sep, value = item.partition(b"=")
+        if sep:
+            props[key.decode("utf-8", "replace")] = value.decode("utf-8", "replace")
+    return props or None
+
+
+def open_uevent_socket(group: int = UDEV_MONITOR_GROUP) -> socket.socket:
+    """Ouvre et lie une socket netlink abonnée au groupe uevent demandé."""
+    sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, NETLINK_KOBJECT_UEVENT)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_PASSCRED, 1)
+        try:
+            # SO_RCVBUFFORCE (root) : évite de perdre des événements en rafale
+            sock.setsockopt(socket.SOL_SOCKET, 33, _RECV_BUFFER)
+        except OSError:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, _RECV_BUFFER)
+        sock.bind((0, group))
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def recv_uevent(sock: socket.socket) -> Optional[Dict[str, str]]:
+    """
+    Lit un message sur la socket et le décode. Les messages qui ne viennent
+    pas de root (udevd / noyau) sont ignorés, comme le fait libudev.
+    """
+    data, ancdata, _flags, _addr = sock.recvmsg(_RECV_BUFFER, socket.CMSG_SPACE(12))
+    for level, kind, cdata in ancdata:
+        if level == socket.SOL_SOCKET and kind == socket.SCM_CREDENTIALS and len(cdata) >= 12:
+            _pid, uid, _gid = struct.unpack("iII", cdata[:12])
+            if uid != 0:
+                return None
+    return parse_uevent(data)
+
+
+def is_disk_event(props: Dict[str, str]) -> bool:
+    return props.get("SUBSYSTEM") == "block" and props.get("DEVTYPE") == "disk"
+
+
+class DeviceMonitor:
+    """
+    Index `id_path -> DiskInfo` des disques branchés, tenu à jour par les
+    uevents udev depuis un thread d'arrière-plan.
+    """
+
+    def __init__(self, usb_only: bool = True) -> None:
+        self._usb_only = usb_only
+        self._sock: Optional[socket.socket] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._by_id_path: Dict[str, DiskInfo] = {}
+        self._listeners: List[DeviceListener] = []
+
+    # -- Cycle de vie -------------------------------------------------------
+    def start(self) -> bool:
+        """Démarre l'écoute ; retourne False si netlink est indisponible."""
+        if self._thread is not None:
+            return True
+        try:
+            self._sock = open_uevent_socket()
+        except OSError:
+            return False
+        # Socket ouverte AVANT l'inventaire initial : aucun événement perdu
+        self.resync()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(_POLL_TIMEOUT * 2)
+        if self._sock:
+            self._sock.close()
+            self._sock = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def resync(self) -> None:
+        """Reconstruit l'index complet (démarrage, ou événements perdus)."""
+        disks = list_block_devices(usb_only=self._usb_only)
+        with self._lock:
+            self._by_id_path = {d.id_path: d for d in disks if d.id_path}
+
+    # -- Consultation -------------------------------------------------------
+    def snapshot(self) -> Dict[str, DiskInfo]:
+        with self._lock:
+            return dict(self._by_id_path)
+
+    def find_by_id_path(self, id_path: str) -> Optional[DiskInfo]:
+        if not id_path:
+            return None
+        with self._lock:
+            disk = self._by_id_path.get(id_path)
+            if disk is None:
+                # ID_PATH prédit (topologie sysfs) : correspondance par port,
+                # si un seul disque l'occupe (pas de choix entre plusieurs LUN)
+                port_key = usb_port_key(id_path)
+                same_port = [d for k, d in self._by_id_path.items() if usb_port_key(k) == port_key]
+                disk = same_port[0] if len(same_port) == 1 else None
+            return disk
+
+    def add_listener(self, listener: DeviceListener) -> None:
+        with self._lock:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: DeviceListener) -> None:
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    # -- Boucle d'écoute ------------------------------------------------------
+    def _run(self) -> None:
+        assert self._sock is not None
+        while not self._stop_event.is_set():
+            try:
+                ready, _, _ = select.select([self._sock], [], [], _POLL_TIMEOUT)
+                if not ready:
+                    continue
+                props = recv_uevent(self._sock)
+            except OSError as e:
+                if e.errno == errno.ENOBUFS:
+                    # File de réception saturée : des événements ont été perdus
+                    self.resync()
+                    continue
+                # Socket inutilisable : `running` repasse à False et les
+                # appelants reviennent au sondage périodique.
+                break
+            if props and is_disk_event(props):
+                self._handle_event(props)
+
+    def _handle_event(self, props: Dict[str, str]) -> None:
+        action = props.get("ACTION", "")
+        devname = props.get("DEVNAME", "").split("/")[-1]
+        if not devname:
+            return
+
+        if action == "remove":
+            with self._lock:
+                removed = [d for d in self._by_id_path.values() if d.devname == devname]
+                for disk in removed:
+                    del self._by_id_path[disk.id_path]
+            for disk in removed:
+                self._notify("remove", disk)
+            return
+
+        if action not in ("add", "change"):
+            return
+        disk = disk_info_from_properties(devname, props)
+        if self._usb_only and disk.tran != "usb":
+            return
+        if not disk.id_path:
+            return
+        with self._lock:
+            stale = [k for k, d in self._by_id_path.items()
+                     if d.devname == devname and k != disk.id_path]
+            for key in stale:
+                del self._by_id_path[key]
+            self._by_id_path[disk.id_path] = disk
+        self._notify(action, disk)
+
+    def _notify(self, action: str, disk: DiskInfo) -> None:
+        with self._lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(action, disk)
+            except Exception:
+                pass  # un abonné défaillant ne doit pas arrêter le moniteur
+
+
+_shared_monitor: Optional[DeviceMonitor] = None
+_shared_lock = threading.Lock()
+
+
+def get_device_monitor() -> Optional[DeviceMonitor]:
+    """
+    Moniteur partagé par toute l'application (GUI, assistant de ports...),
+    démarré à la première demande. Retourne None si netlink est indisponible.
+    """
+    global _shared_monitor
+    with _shared_lock:
+        if _shared_monitor is None:
+            monitor = DeviceMonitor(usb_only=True)
+            if not monitor.start():
+                return None
+            _shared_monitor = monitor
+        return _shared_monitor
@@ -3,109 +3,493 @@ log_handler.py - Journalisation avec rotation par volumetrie (cloneur de disque)
 
 Rotation : des que disk_clone.log depasse MAX_LOG_SIZE, il est renomme
            disk_clone.log.YYYYMMDD_HHMMSS et un nouveau fichier demarre.
-           Les MAX_ROTATED_FILES plus anciens rotated sont supprimes.
+           La taille est suivie par un compteur d'octets a chaque lot
+           ecrit (aucun stat). Le fichier tourne est compresse en gzip
+           par un thread d'arriere-plan ; seuls les MAX_ROTATED_FILES plus
+           recents sont conserves. Les lectures (PDF) decompressent a la
+           volee.
+
+PDF      : le rapport consolide assemble un fragment (pages pre-rendues,
+           pdf_writer.render_fragment) par journal. Un journal tourne ne
+           change plus : son fragment, range dans pdf/cache/ et identifie
+           par nom, taille et mtime, n'est calcule qu'une fois. Seul le
+           journal courant est remis en page a chaque export ; les
+           fragments manquants sont rendus en parallele. Le rapport
+           d'historique interroge la base des clonages (history.py).
+
+Ecriture : les threads appelants (clonage, interface) ne font que deposer
+           l'enregistrement dans une file bornee (QueueHandler) ; un thread
+           unique "log-writer" ecrit par lots dans le fichier et sur la
+           console, et se charge aussi de la rotation. Il est demarre par
+           start(), appele par le point d'entree (main.py) : un processus
+           fils qui reimporte ce module (spawn) n'ecrit que sur stderr. Un /var/log lent ou
+           plein ne bloque donc jamais un clonage : si la file deborde,
+           l'enregistrement est perdu et compte (get_dropped_count()).
+
+Session  : les _SESSION_RING_SIZE entrees les plus recentes de la session
+           restent en memoire ; les plus anciennes sont deversees dans un
+           fichier propre a la session (session/), relu en flux pour le PDF.
 
 Structure :
   /var/log/disk_cloner/disk_clone.log          <- journal courant
-  /var/log/disk_cloner/disk_clone.log.*        <- journaux tournes
+  /var/log/disk_cloner/disk_clone.log.*.gz     <- journaux tournes
+  /var/log/disk_cloner/session/                <- debordement de la session
   /var/log/disk_cloner/pdf/                    <- rapports PDF
+  /var/log/disk_cloner/pdf/cache/              <- fragments des journaux
 """
+import atexit
+import collections
 import glob
+import gzip
 import logging
+import logging.handlers
+import multiprocessing
 import os
+import queue
+import shutil
 import sys
-import textwrap
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from datetime import datetime
-from typing import List
+from typing import IO, Iterator, List, Optional, Set, Tuple
+
+import history
+import metrics
+import pdf_writer
+from utils import human_size
 
 # -- Constantes ---------------------------------------------------------------
 LOG_DIR          = "/var/log/disk_cloner"
 LOG_FILE         = os.path.join(LOG_DIR, "disk_clone.log")
 PDF_DIR          = os.path.join(LOG_DIR, "pdf")
+SESSION_DIR      = os.path.join(LOG_DIR, "session")
+FRAGMENT_DIR     = os.path.join(PDF_DIR, "cache")
 MAX_LOG_SIZE     = 10 * 1024 * 1024   # 10 Mo
-MAX_ROTATED_FILES = 10
+MAX_ROTATED_FILES = 30                # compresses : ~10 fois moins de place
+
+_QUEUE_SIZE      = 10000   # enregistrements en attente d'ecriture
+_BATCH_MAX       = 500     # enregistrements ecrits par lot
+_FLUSH_TIMEOUT   = 5.0
+_SESSION_RING_SIZE = 5000  # entrees de session gardees en memoire
+_RENDER_WORKERS  = max(0, (os.cpu_count() or 1) - 1)   # + le thread appelant
+_FORMATTER       = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
 
 # -- Etat de session ------------------------------------------------------------
-_session_logs: List[str] = []
 _session_active: bool    = False
 
 
+class _SessionLog:
+    """
+    Entrees de la session courante : anneau borne en memoire, les plus
+    anciennes etant deversees dans un fichier en ajout seul. Alimente par
+    le thread d'ecriture uniquement ; lu depuis n'importe quel thread.
+    """
+
+    def __init__(self) -> None:
+        self._lock    = threading.Lock()
+        self._ring: "collections.deque[str]" = collections.deque()
+        self._spill: Optional[IO[str]] = None
+        self._spill_path = ""
+        self._spilled = 0
+        self.active   = False
+
+    def start(self) -> None:
+        """Nouvelle session : oublie la precedente et son fichier de debordement."""
+        with self._lock:
+            self._close_spill()
+            for old in glob.glob(os.path.join(SESSION_DIR, "session_*.log")):
+                try:
+                    os.remove(old)
+                except OSError:
+                    pass
+            self._ring.clear()
+            self._spilled = 0
+            ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+            self._spill_path = os.path.join(SESSION_DIR, f"session_{ts}.log")
+            self.active = True
+
+    def stop(self) -> None:
+        self.active = False
+        self.flush()
+
+    def append(self, entry: str) -> None:
+        with self._lock:
+            self._ring.append(entry)
+            while len(self._ring) > _SESSION_RING_SIZE:
+                self._spill_one(self._ring.popleft())
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._spill is not None:
+                try:
+                    self._spill.flush()
+                except OSError:
+                    pass
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._spilled + len(self._ring)
+
+    def snapshot(self) -> Tuple[int, Iterator[str]]:
+        """
+        (nombre d'entrees, iterateur) sur un etat coherent de la session :
+        le fichier de debordement est relu en flux jusqu'a sa taille au
+        moment de l'appel, puis vient une copie de l'anneau (bornee).
+        """
+        with self._lock:
+            spill, spill_size = None, 0
+            if self._spill is not None:
+                try:
+                    self._spill.flush()
+                    spill_size = self._spill.tell()
+                    spill = open(self._spill_path, "rb")
+                except OSError:
+                    spill = None
+            ring  = list(self._ring)
+            count = self._spilled + len(ring)
+
+        def entries() -> Iterator[str]:
+            if spill is not None:
+                remaining = spill_size
+                with spill:
+                    for raw in spill:
+                        remaining -= len(raw)
+                        if remaining < 0:
+                            break
+                        yield raw.decode("utf-8", "replace").rstrip("\n")
+            yield from ring
+        return count, entries()
+
+    def _spill_one(self, entry: str) -> None:
+        if self._spill is None:
+            try:
+                os.makedirs(SESSION_DIR, mode=0o750, exist_ok=True)
+                self._spill = open(self._spill_path, "a", encoding="utf-8")
+            except OSError as e:
+                print(f"[log_handler] Debordement de session impossible : {e}", file=sys.stderr)
+                return
+        try:
+            self._spill.write(entry.replace("\n", " ") + "\n")
+            self._spilled += 1
+        except OSError:
+            pass
+
+    def _close_spill(self) -> None:
+        if self._spill is not None:
+            try:
+                self._spill.close()
+            except OSError:
+                pass
+            self._spill = None
+
+
 # -- Handler de capture de session ---------------------------------------------
 class SessionCapturingHandler(logging.Handler):
-    """Capture tous les messages de log pendant la session courante."""
+    """Capture tous les messages de log pendant la session courante (thread d'ecriture)."""
     def emit(self, record: logging.LogRecord) -> None:
-        global _session_logs, _session_active
-        if _session_active:
+        if _session.active:
             ts  = datetime.fromtimestamp(record.created).strftime("%Y-%m-%d %H:%M:%S")
             msg = f"[{ts}] {record.levelname}: {record.getMessage()}"
-            _session_logs.append(msg)
+            _session.append(msg)
 
 
 # -- Rotation des logs ----------------------------------------------------------
-def _rotate_if_needed() -> None:
-    """Rotate le fichier de log courant si sa taille depasse MAX_LOG_SIZE."""
-    if not os.path.isfile(LOG_FILE):
-        return
-    if os.path.getsize(LOG_FILE) < MAX_LOG_SIZE:
-        return
+def _rotated_files() -> List[str]:
+    """Journaux tournes (compresses ou non), du plus ancien au plus recent."""
+    return sorted(f for f in glob.glob(f"{LOG_FILE}.*") if not f.endswith(".tmp"))
+
 
+def _rotate() -> None:
+    """Renomme le journal courant et confie la compression au thread dedie."""
     ts      = datetime.now().strftime("%Y%m%d_%H%M%S")
     rotated = f"{LOG_FILE}.{ts}"
+    n = 1
+    while os.path.exists(rotated) or os.path.exists(f"{rotated}.gz"):
+        rotated = f"{LOG_FILE}.{ts}_{n:03d}"
+        n += 1
     try:
         os.rename(LOG_FILE, rotated)
     except OSError as e:
         print(f"[log_handler] Impossible de pivoter le log : {e}", file=sys.stderr)
         return
-
-    pattern  = f"{LOG_FILE}.*"
-    existing = sorted(glob.glob(pattern))
-    while len(existing) > MAX_ROTATED_FILES:
-        oldest = existing.pop(0)
+    _compressor.submit(rotated)
+
+
+class _Compressor(threading.Thread):
+    """Compresse en gzip les journaux tournes puis applique MAX_ROTATED_FILES."""
+
+    def __init__(self) -> None:
+        super().__init__(daemon=True, name="log-compressor")
+        self._queue: "queue.Queue" = queue.Queue()
+
+    def submit(self, path: str) -> None:
+        self._queue.put(path)
+
+    def run(self) -> None:
+        # Reliquats d'un arret brutal : compression interrompue ou jamais faite
+        for tmp in glob.glob(f"{LOG_FILE}.*.gz.tmp"):
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+        for path in _rotated_files():
+            if not path.endswith(".gz"):
+                self._compress(path)
+        self._prune()
+        while True:
+            self._compress(self._queue.get())
+            self._prune()
+
+    @staticmethod
+    def _compress(path: str) -> None:
+        tmp = f"{path}.gz.tmp"
         try:
-            os.remove(oldest)
-        except OSError:
-            pass
-
-
-def _setup_file_handler() -> None:
-    """(Re)cree le FileHandler apres rotation ou au demarrage."""
-    global _file_handler
-
-    try:
-        if _file_handler:
-            _logger.removeHandler(_file_handler)
-            _file_handler.close()
-    except NameError:
-        pass
-
-    try:
-        handler = logging.FileHandler(LOG_FILE)
-        handler.setLevel(logging.INFO)
-        handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
-        _logger.addHandler(handler)
-        _file_handler = handler
-    except (PermissionError, OSError) as e:
-        print(f"[log_handler] Impossible d'ouvrir le fichier de log : {e}", file=sys.stderr)
+            with open(path, "rb") as src, gzip.open(tmp, "wb") as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+            os.replace(tmp, f"{path}.gz")
+            os.remove(path)
+        except OSError as e:
+            # Fichier purge entre-temps, disque plein... : on garde l'original
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            if os.path.exists(path):
+                print(f"[log_handler] Compression de {path} impossible : {e}", file=sys.stderr)
+
+    @staticmethod
+    def _prune() -> None:
+        existing = _rotated_files()
+        while len(existing) > MAX_ROTATED_FILES:
+            oldest = existing.pop(0)
+            try:
+                os.remove(oldest)
+            except OSError:
+                pass
+
+
+# -- File d'attente et thread d'ecriture -----------------------------------------
+_STOP = object()
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler qui ne bloque jamais : file pleine -> enregistrement perdu et compte."""
+
+    def __init__(self, log_queue: "queue.Queue") -> None:
+        super().__init__(log_queue)
+        self._lock_dropped = threading.Lock()
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock_dropped:
+                self.dropped += 1
+            metrics.LOG_RECORDS_DROPPED.inc()
+
+
+class _LogWriter(threading.Thread):
+    """
+    Consommateur unique de la file. Elements acceptes :
+      LogRecord -> fichier + console ; str -> fichier seul (bandeaux de session) ;
+      callable  -> execute sur ce thread (reouverture, purge, flush...) ; _STOP.
+    """
+
+    def __init__(self, log_queue: "queue.Queue", handler: _DroppingQueueHandler) -> None:
+        super().__init__(daemon=True, name="log-writer")
+        self._queue    = log_queue
+        self._handler  = handler
+        self._file     = None
+        self._size     = 0          # octets dans le journal courant
+        self._console  = sys.stdout
+        self._reported = 0
+
+    # Commandes (executees sur le thread d'ecriture)
+    def reopen(self) -> None:
+        """Ferme le fichier, le fait pivoter si besoin et le rouvre."""
+        self._close_file()
+        try:
+            self._file = open(LOG_FILE, "ab")
+            self._size = self._file.tell()
+        except OSError as e:
+            print(f"[log_handler] Impossible d'ouvrir le fichier de log : {e}", file=sys.stderr)
+            return
+        if self._size >= MAX_LOG_SIZE:
+            self._rotate_file()
+
+    def _rotate_file(self) -> None:
+        self._close_file()
+        _rotate()
+        try:
+            self._file = open(LOG_FILE, "ab")
+            self._size = self._file.tell()
+        except OSError as e:
+            print(f"[log_handler] Impossible d'ouvrir le fichier de log : {e}", file=sys.stderr)
+
+    def purge(self) -> None:
+        self._close_file()
+        for f in get_all_log_files() + glob.glob(os.path.join(FRAGMENT_DIR, "*.frag")):
+            try:
+                os.remove(f)
+            except OSError as e:
+                _logger.error(f"Impossible de supprimer {f} : {e}")
+        self.reopen()
+
+    def set_console(self, stream) -> None:
+        self._console = stream
+
+    def _close_file(self) -> None:
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None
+
+    # Boucle principale
+    def run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            try:
+                while len(batch) < _BATCH_MAX:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            if not self._process(batch):
+                self._close_file()
+                return
+
+    def _process(self, batch: list) -> bool:
+        file_lines: List[str]    = []
+        console_lines: List[str] = []
+        for item in batch:
+            if isinstance(item, logging.LogRecord):
+                try:
+                    line = _FORMATTER.format(item) + "\n"
+                except Exception:
+                    line = f"{item.levelname} - {item.msg!r}\n"
+                file_lines.append(line)
+                console_lines.append(line)
+                _session_handler.handle(item)
+            elif isinstance(item, str):
+                file_lines.append(item)
+            else:
+                # Une commande voit tout ce qui la precede deja ecrit
+                self._write(file_lines, console_lines)
+                file_lines, console_lines = [], []
+                if item is _STOP:
+                    return False
+                try:
+                    item()
+                except Exception as e:
+                    print(f"[log_handler] Erreur du thread d'ecriture : {e}", file=sys.stderr)
+        dropped = self._handler.dropped
+        if dropped != self._reported:
+            record = logging.makeLogRecord({
+                "name": _logger.name, "levelno": logging.WARNING, "levelname": "WARNING",
+                "msg": f"{dropped - self._reported} message(s) de journal perdu(s) (file pleine)",
+            })
+            line = _FORMATTER.format(record) + "\n"
+            file_lines.append(line)
+            console_lines.append(line)
+            self._reported = dropped
+        self._write(file_lines, console_lines)
+        _session.flush()
+        return True
+
+    def _write(self, file_lines: List[str], console_lines: List[str]) -> None:
+        if file_lines and self._file is not None:
+            data = "".join(file_lines).encode("utf-8", "replace")
+            try:
+                self._file.write(data)
+                self._file.flush()
+            except OSError as e:
+                print(f"[log_handler] Ecriture du journal impossible : {e}", file=sys.stderr)
+            else:
+                self._size += len(data)
+                if self._size >= MAX_LOG_SIZE:
+                    self._rotate_file()
+        if console_lines and self._console is not None:
+            try:
+                self._console.write("".join(console_lines))
+                self._console.flush()
+            except (OSError, ValueError):
+                pass
+
+
+def _submit(item) -> None:
+    """
+    Depose une commande ou un bandeau : bloquant, ces appels ne sont jamais
+    perdus. Sans thread d'ecriture (processus fils, arret), ils sont ignores.
+    """
+    if _writer.is_alive():
+        _log_queue.put(item)
+
+
+def flush(timeout: float = _FLUSH_TIMEOUT) -> bool:
+    """Attend que tout ce qui a ete journalise jusqu'ici soit ecrit. False si delai depasse."""
+    if not _writer.is_alive():
+        return False
+    done = threading.Event()
+    _submit(done.set)
+    return done.wait(timeout)
+
+
+def get_dropped_count() -> int:
+    """Nombre d'enregistrements perdus faute de place dans la file depuis le demarrage."""
+    return _queue_handler.dropped
+
+
+def _shutdown() -> None:
+    if _writer.is_alive():
+        _submit(_STOP)
+        _writer.join(_FLUSH_TIMEOUT)
 
 
 # -- Initialisation du logger ---------------------------------------------------
-os.makedirs(LOG_DIR, mode=0o750, exist_ok=True)
-os.makedirs(PDF_DIR, mode=0o750, exist_ok=True)
-
 _logger = logging.getLogger("disk_cloner")
 _logger.setLevel(logging.INFO)
 _logger.propagate = False
 
-_console_handler = logging.StreamHandler(sys.stdout)
-_console_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
-_logger.addHandler(_console_handler)
+_log_queue: "queue.Queue" = queue.Queue(_QUEUE_SIZE)
+_queue_handler = _DroppingQueueHandler(_log_queue)
+# Jusqu'a start() : stderr seul
+_stderr_handler = logging.StreamHandler(sys.stderr)
+_stderr_handler.setFormatter(_FORMATTER)
+_logger.addHandler(_stderr_handler)
 
+_session = _SessionLog()
 _session_handler = SessionCapturingHandler()
-_logger.addHandler(_session_handler)
 
-_file_handler = None
-_rotate_if_needed()
-_setup_file_handler()
+_compressor = _Compressor()
+
+_writer = _LogWriter(_log_queue, _queue_handler)
+_start_lock = threading.Lock()
+
+
+def start() -> None:
+    """
+    Demarre la journalisation dans les fichiers (thread d'ecriture, rotation).
+    Appele une fois par le point d'entree : les processus fils lances en
+    spawn (workers de clonage, rendu des fragments PDF) reimportent ce module
+    et ne doivent pas avoir leur propre ecrivain, qui ferait pivoter
+    disk_clone.log avec son propre compteur d'octets, ni leur propre
+    compresseur, dont le balayage initial recompresserait en concurrence
+    les memes journaux tournes.
+    """
+    with _start_lock:
+        if _writer.ident is not None:
+            return
+        os.makedirs(LOG_DIR, mode=0o750, exist_ok=True)
+        os.makedirs(PDF_DIR, mode=0o750, exist_ok=True)
+        os.makedirs(SESSION_DIR, mode=0o750, exist_ok=True)
+        _logger.removeHandler(_stderr_handler)
+        _logger.addHandler(_queue_handler)
+        _compressor.start()   # avant le writer : une rotation lui soumet des fichiers
+        _writer.start()
+        _submit(_writer.reopen)
+        atexit.register(_shutdown)
 
 
 # -- API de journalisation -------------------------------------------------------
@@ -144,20 +528,14 @@ def log_verification_result(source_id: str, dest_id: str, success: bool) -> None
 
 
 def session_start() -> None:
-    global _session_logs, _session_active
-    _session_logs   = []
+    global _session_active
     _session_active = True
 
-    _rotate_if_needed()
-    _setup_file_handler()
-
     sep = "=" * 80
     ts  = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    try:
-        with open(LOG_FILE, "a") as f:
-            f.write(f"\n{sep}\nSESSION START: {ts}\n{sep}\n")
-    except OSError as e:
-        _logger.error(f"Impossible d'ecrire le debut de session : {e}")
+    _submit(_session.start)
+    _submit(_writer.reopen)
+    _submit(f"\n{sep}\nSESSION START: {ts}\n{sep}\n")
 
     log_info(f"Nouvelle session demarree a {ts}")
 
@@ -167,13 +545,10 @@ def session_end() -> None:
     ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     log_info(f"Session terminee a {ts}")
     _session_active = False
+    _submit(_session.stop)
 
     sep = "=" * 80
-    try:
-        with open(LOG_FILE, "a") as f:
-            f.write(f"\n{sep}\nSESSION END: {ts}\n{sep}\n\n")
-    except OSError as e:
-        _logger.error(f"Impossible d'ecrire la fin de session : {e}")
+    _submit(f"\n{sep}\nSESSION END: {ts}\n{sep}\n\n")
 
 
 def log_application_exit(exit_method: str = "Bouton Quitter") -> None:
@@ -181,12 +556,24 @@ def log_application_exit(exit_method: str = "Bouton Quitter") -> None:
     session_end()
 
 
+def set_console_stream(stream) -> None:
+    """Redirige l'echo console du journal (mode CLI : stdout reste reserve au JSON)."""
+    _submit(lambda: _writer.set_console(stream))
+
+
 def log_clone_process_stopped() -> None:
     log_info("Processus de clonage arrete par l'utilisateur.")
 
 
 def get_current_session_logs() -> List[str]:
-    return _session_logs.copy()
+    flush()
+    return list(_session.snapshot()[1])
+
+
+def iter_session_logs() -> Tuple[int, Iterator[str]]:
+    """(nombre d'entrees, iterateur) sur la session courante, sans tout copier en memoire."""
+    flush()
+    return _session.snapshot()
 
 
 def is_session_active() -> bool:
@@ -198,27 +585,26 @@ def get_all_log_files() -> List[str]:
     files = []
     if os.path.isfile(LOG_FILE):
         files.append(LOG_FILE)
-    rotated = sorted(glob.glob(f"{LOG_FILE}.*"), reverse=True)
-    files.extend(rotated)
+    files.extend(reversed(_rotated_files()))
     return files
 
 
 def purge_logs() -> None:
     """Supprime tous les fichiers de log (courant + tournes). Reserve a l'admin."""
-    for f in get_all_log_files():
-        try:
-            os.remove(f)
-        except OSError as e:
-            _logger.error(f"Impossible de supprimer {f} : {e}")
-    _setup_file_handler()
+    _submit(_writer.purge)
+    flush()
     log_info("Logs purges par l'administrateur.")
 
 
 # -- Generation PDF ---------------------------------------------------------------
-def generate_session_pdf(output_path: str = None) -> str:
+def generate_session_pdf(
+    output_path: str = None,
+    progress: Optional[pdf_writer.ProgressCallback] = None,
+    cancel_check: Optional[pdf_writer.CancelCheck] = None,
+) -> str:
     """Genere un PDF du rapport de session courante. Retourne le chemin du PDF."""
-    session_logs = get_current_session_logs()
-    if not session_logs:
+    count, session_logs = iter_session_logs()
+    if not count:
         raise ValueError("Aucun log de session disponible.")
 
     if output_path is None:
@@ -227,31 +613,130 @@ def generate_session_pdf(output_path: str = None) -> str:
         output_path  = os.path.join(PDF_DIR, pdf_filename)
 
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    _create_simple_pdf(
+    pdf_writer.write_text_report(
         output_path,
         "Rapport de session - Clonage de disques",
         session_logs,
-        f"Genere le : {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
-        f"Entrees de log : {len(session_logs)}",
+        (f"Genere le : {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+         f"Entrees de log : {count}"),
+        size_hint=count * 80,
+        progress=progress,
+        cancel_check=cancel_check,
     )
     log_info(f"PDF de session genere : {output_path}")
     return output_path
 
 
-def generate_log_file_pdf(output_path: str = None) -> str:
-    """Genere un PDF consolide de tous les logs (courant + tournes). Retourne le chemin du PDF."""
-    all_lines: List[str] = []
-    for log_file in get_all_log_files():
+def _text_size(log_files: List[str]) -> int:
+    """Volume de texte estime des journaux (un .gz de log fait ~1/10 de l'original)."""
+    total = 0
+    for log_file in log_files:
         try:
-            with open(log_file, "r", errors="replace") as f:
-                all_lines.append(f"{'='*60}")
-                all_lines.append(f"Fichier : {os.path.basename(log_file)}")
-                all_lines.append(f"{'='*60}")
-                all_lines.extend(f.read().splitlines())
-        except OSError as e:
-            all_lines.append(f"[Erreur lecture {log_file} : {e}]")
+            total += os.path.getsize(log_file) * (10 if log_file.endswith(".gz") else 1)
+        except OSError:
+            pass
+    return total
 
-    if not all_lines:
+
+def _fragment_path(log_file: str) -> str:
+    return os.path.join(FRAGMENT_DIR, f"{os.path.basename(log_file)}.frag")
+
+
+def _current_fragment_index(log_file: str, fragment: str) -> Optional[dict]:
+    """Index du fragment s'il correspond encore au journal (nom, taille, mtime), sinon None."""
+    index = pdf_writer.read_fragment_index(fragment)
+    if index is None:
+        return None
+    try:
+        st = os.stat(log_file)
+    except OSError:
+        return None
+    if index.get("key") != [os.path.basename(log_file), st.st_size, st.st_mtime_ns]:
+        return None
+    return index
+
+
+def _fragment_job(log_file: str, fragment: str) -> Tuple[str, str, int]:
+    """Arguments de pdf_writer.render_fragment (picklables : executes dans un processus fils)."""
+    return log_file, fragment, pdf_writer.compression_level(_text_size([log_file]))
+
+
+def _log_fragments(
+    log_files: List[str],
+    progress: Optional[pdf_writer.ProgressCallback] = None,
+    cancel_check: Optional[pdf_writer.CancelCheck] = None,
+) -> List[Tuple[str, str]]:
+    """
+    (libelle, fragment) de chaque journal, dans l'ordre de `log_files`.
+    Les fragments absents ou perimes sont rendus : le premier sur le
+    thread appelant, les autres dans un pool de processus (mise en page
+    en Python pur : les threads se partageraient le GIL). `progress`
+    recoit le cumul des lignes et pages, fragments en cache compris.
+    """
+    os.makedirs(FRAGMENT_DIR, mode=0o750, exist_ok=True)
+    sections = [(os.path.basename(f), _fragment_path(f)) for f in log_files]
+    missing  = []
+    done     = [0, 0]   # lignes, pages des fragments termines
+    for f, (_, frag) in zip(log_files, sections):
+        index = _current_fragment_index(f, frag)
+        if index is None:
+            missing.append(_fragment_job(f, frag))
+        else:
+            done[0] += index["lines"]
+            done[1] += len(index["lengths"])
+
+    def add(index: dict) -> None:
+        done[0] += index["lines"]
+        done[1] += len(index["lengths"])
+        if progress is not None:
+            progress(*done)
+
+    def local_progress(lines: int, pages: int) -> None:
+        if progress is not None:
+            progress(done[0] + lines, done[1] + pages)
+
+    if len(missing) > 1 and _RENDER_WORKERS:
+        first, rest = missing[0], missing[1:]
+        context = multiprocessing.get_context("spawn")
+        pool = ProcessPoolExecutor(min(_RENDER_WORKERS, len(rest)), mp_context=context)
+        try:
+            pending = {pool.submit(pdf_writer.render_fragment, *job) for job in rest}
+            add(pdf_writer.render_fragment(*first, local_progress, cancel_check))
+            while pending:
+                if cancel_check is not None and cancel_check():
+                    raise pdf_writer.ReportCancelled()
+                finished, pending = wait(pending, timeout=0.25, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    add(future.result())
+        finally:
+            # Annulation : les fragments deja lances se terminent (un journal chacun)
+            pool.shutdown(wait=True, cancel_futures=True)
+    else:
+        for job in missing:
+            add(pdf_writer.render_fragment(*job, local_progress, cancel_check))
+    _prune_fragments({frag for _, frag in sections})
+    return sections
+
+
+def _prune_fragments(keep: Set[str]) -> None:
+    """Supprime les fragments des journaux disparus (purges, ou tournes puis compresses)."""
+    for fragment in glob.glob(os.path.join(FRAGMENT_DIR, "*.frag")):
+        if fragment not in keep:
+            try:
+                os.remove(fragment)
+            except OSError:
+                pass
+
+
+def generate_log_file_pdf(
+    output_path: str = None,
+    progress: Optional[pdf_writer.ProgressCallback] = None,
+    cancel_check: Optional[pdf_writer.CancelCheck] = None,
+) -> str:
+    """Genere un PDF consolide de tous les logs (courant + tournes). Retourne le chemin du PDF."""
+    flush()
+    log_files = get_all_log_files()
+    if not log_files:
         raise ValueError("Aucun log disponible.")
 
     if output_path is None:
@@ -260,129 +745,143 @@ def generate_log_file_pdf(output_path: str = None) -> str:
         output_path  = os.path.join(PDF_DIR, pdf_filename)
 
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    _create_simple_pdf(
+    pdf_writer.write_fragmented_report(
         output_path,
         "Logs complets - Clonage de disques",
-        all_lines,
-        f"Genere le : {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
-        f"Fichiers sources : {len(get_all_log_files())}",
-        f"Lignes totales : {len(all_lines)}",
+        (f"Genere le : {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+         f"Fichiers sources : {len(log_files)}"),
+        _log_fragments(log_files, progress, cancel_check),
+        cancel_check,
     )
     log_info(f"PDF logs complets genere : {output_path}")
     return output_path
 
 
-# -- Construction PDF bas niveau (stdlib uniquement) -----------------------------
-def _escape_pdf_string(text: str) -> str:
-    if text is None:
-        return ""
-    text = str(text)
-    text = text.replace("\\", "\\\\")
-    text = text.replace("(", "\\(")
-    text = text.replace(")", "\\)")
-    text = text.replace("\r", " ").replace("\n", " ").replace("\t", " ")
-    return "".join(c if 32 <= ord(c) <= 126 else " " for c in text)
+def _history_lines() -> Iterator[str]:
+    """Statistiques par modele de cle et par cle maitre, puis un clonage par ligne."""
+    def speed(group: history.GroupStats) -> str:
+        return f", copie {group.avg_copy_mb_s:.1f} Mo/s en moyenne" if group.avg_copy_mb_s else ""
+
+    yield "Par modele de cle (destination) :"
+    for group in history.stats_by_dest_model():
+        yield f"  {group.label or '?'} : {group.count} clonage(s), {group.success} reussi(s){speed(group)}"
+    yield ""
+    yield "Par cle maitre (numero de serie source) :"
+    for group in history.stats_by_master():
+        yield f"  {group.key or '?'} ({group.label or '?'}) : {group.count} clonage(s), {group.success} reussi(s)"
+    yield ""
+    yield "Detail des clonages :"
+    for entry in history.iter_records():
+        yield history.format_record(entry)
+
+
+def generate_history_pdf(
+    output_path: str = None,
+    progress: Optional[pdf_writer.ProgressCallback] = None,
+    cancel_check: Optional[pdf_writer.CancelCheck] = None,
+) -> str:
+    """Genere un PDF de l'historique des clonages (base sqlite). Retourne le chemin du PDF."""
+    history.flush()
+    summary = history.summarize()
+    if not summary.total:
+        raise ValueError("Aucun clonage dans l'historique.")
 
+    if output_path is None:
+        ts           = datetime.now().strftime("%Y%m%d_%H%M%S")
+        pdf_filename = f"historique_{ts}.pdf"
+        output_path  = os.path.join(PDF_DIR, pdf_filename)
 
-def _create_simple_pdf(pdf_path: str, title: str, lines: List[str], *info_lines: str) -> None:
-    LINES_PER_PAGE = 55
-    wrapped: List[str] = []
-    for i, line in enumerate(lines, 1):
-        prefix = f"{i:4d}: "
-        avail  = 90 - len(prefix)
-        for j, part in enumerate(textwrap.wrap(line or " ", avail, break_long_words=True) or [" "]):
-            wrapped.append(f"{prefix if j == 0 else '      '}{part}")
+    month = history.summarize(since=history.month_start())
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    pdf_writer.write_text_report(
+        output_path,
+        "Historique des clonages",
+        _history_lines(),
+        (f"Genere le : {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+         f"Clonages : {summary.total} (reussis {summary.success}, echecs {summary.error}, "
+         f"annules {summary.cancelled}), {human_size(summary.bytes_written)} ecrits",
+         f"Ce mois-ci : {month.total} clonage(s), {month.success} reussi(s)"),
+        size_hint=summary.total * 200,
+        progress=progress,
+        cancel_check=cancel_check,
+    )
+    log_info(f"PDF historique genere : {output_path}")
+    return output_path
 
-    pages = [wrapped[i: i + LINES_PER_PAGE] for i in range(0, max(1, len(wrapped)), LINES_PER_PAGE)]
 
-    objects: List[str] = []
+# -- Export PDF en arriere-plan ------------------------------------------------------
+_EXPORT_LABELS = {"session": "session courante", "full": "logs complets", "history": "historique"}
 
-    def add(obj: str) -> int:
-        objects.append(obj)
-        return len(objects)
 
-    catalog_id  = add("")
-    pages_id    = add("")
-    font_id     = add(
-        "3 0 obj\n<< /Type /Font /Subtype /Type1 /BaseFont /Courier >>\nendobj"
-    )
+class PdfExport:
+    """
+    Generation d'un rapport PDF ("session", "full" ou "history") sur un thread
+    d'arriere-plan. L'interface lit lines / pages / running ; a la fin,
+    path est renseigne, ou error, ou cancelled.
+    """
 
-    page_ids: List[int] = []
-    stream_ids: List[int] = []
-
-    for p_idx, page_lines in enumerate(pages):
-        is_first = (p_idx == 0)
-        page_num = p_idx + 1
-
-        content_lines: List[str] = ["BT", "/F1 8 Tf"]
-        if is_first:
-            content_lines += [
-                "50 750 Td", "/F1 14 Tf",
-                f"({_escape_pdf_string(title)}) Tj",
-                "/F1 9 Tf",
-            ]
-            for il in info_lines:
-                content_lines += ["0 -14 Td", f"({_escape_pdf_string(il)}) Tj"]
-            content_lines += ["0 -18 Td", "/F1 8 Tf"]
-        else:
-            content_lines += [
-                "50 750 Td", "/F1 11 Tf",
-                f"({_escape_pdf_string(f'{title} - page {page_num}')}) Tj",
-                "0 -20 Td", "/F1 8 Tf",
-            ]
-
-        for cl in page_lines:
-            content_lines += ["0 -11 Td", f"({_escape_pdf_string(cl)}) Tj"]
-
-        content_lines += ["50 25 Td", "/F1 7 Tf",
-                          f"(Page {page_num}/{len(pages)}) Tj", "ET"]
-        stream_body = "\n".join(content_lines)
-
-        sid = add(
-            f"{len(objects)+1} 0 obj\n<< /Length {len(stream_body)} >>\n"
-            f"stream\n{stream_body}\nendstream\nendobj"
-        )
-        stream_ids.append(sid)
-
-        pid = add(
-            f"{len(objects)+1} 0 obj\n"
-            f"<< /Type /Page /Parent {pages_id} 0 R "
-            f"/MediaBox [0 0 612 792] "
-            f"/Contents {sid} 0 R "
-            f"/Resources << /Font << /F1 {font_id} 0 R >> >> >>\n"
-            f"endobj"
-        )
-        page_ids.append(pid)
-
-    objects[catalog_id - 1] = (
-        f"1 0 obj\n<< /Type /Catalog /Pages {pages_id} 0 R >>\nendobj"
-    )
-    kids = " ".join(f"{pid} 0 R" for pid in page_ids)
-    objects[pages_id - 1] = (
-        f"2 0 obj\n<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>\nendobj"
-    )
+    def __init__(self, kind: str) -> None:
+        if kind not in _EXPORT_LABELS:
+            raise ValueError(f"Type d'export PDF inconnu : {kind}")
+        self.kind      = kind
+        self.lines     = 0
+        self.pages     = 0
+        self.path: Optional[str] = None
+        self.error: Optional[Exception] = None
+        self.cancelled = False
+        self._cancel   = threading.Event()
+        self._thread   = threading.Thread(target=self._run, daemon=True, name=f"pdf-export-{kind}")
 
-    numbered: List[str] = []
-    for i, obj in enumerate(objects, 1):
-        if not obj.startswith(f"{i} 0 obj"):
-            obj = f"{i} 0 obj\n" + obj.split(" 0 obj\n", 1)[-1]
-        numbered.append(obj)
-
-    body  = "%PDF-1.4\n"
-    offsets: List[int] = []
-    for obj in numbered:
-        offsets.append(len(body))
-        body += obj + "\n"
-
-    xref_offset = len(body)
-    xref  = f"xref\n0 {len(numbered)+1}\n0000000000 65535 f \n"
-    for off in offsets:
-        xref += f"{off:010d} 00000 n \n"
-
-    trailer = (
-        f"trailer\n<< /Size {len(numbered)+1} /Root 1 0 R >>\n"
-        f"startxref\n{xref_offset}\n%%EOF\n"
-    )
+    @property
+    def label(self) -> str:
+        return _EXPORT_LABELS[self.kind]
+
+    @property
+    def running(self) -> bool:
+        return self._thread.is_alive()
 
-    with open(pdf_path, "w", errors="replace") as f:
-        f.write(body + xref + trailer)
\ No newline at end of file
+    def start(self) -> None:
+        self._thread.start()
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    def _progress(self, lines: int, pages: int) -> None:
+        self.lines, self.pages = lines, pages
+
+    def _run(self) -> None:
+        generate = {"session": generate_session_pdf, "full": generate_log_file_pdf,
+                    "history": generate_history_pdf}[self.kind]
+        try:
+            self.path = generate(progress=self._progress, cancel_check=self._cancel.is_set)
+        except pdf_writer.ReportCancelled:
+            self.cancelled = True
+            log_info(f"Export PDF ({self.label}) annule.")
+        except ValueError as e:
+            self.error = e
+        except Exception as e:
+            self.error = e
+            log_error(f"Erreur generation PDF ({self.label}) : {e}")
+
+
+_export_lock = threading.Lock()
+_current_export: Optional[PdfExport] = None
+
+
+def start_pdf_export(kind: str) -> Tuple[PdfExport, bool]:
+    """
+    Lance un export PDF en arriere-plan. Si un export est deja en cours
+    (quel qu'il soit), le retourne sans en lancer un second : (export, False).
+    """
+    global _current_export
+    with _export_lock:
+        if _current_export is not None and _current_export.running:
+            return _current_export, False
+        _current_export = PdfExport(kind)
+        _current_export.start()
+        return _current_export, True
+
+
+def current_pdf_export() -> Optional[PdfExport]:
+    """Dernier export lance (en cours ou termine), None si aucun."""
+    return _current_export
@@ -0,0 +1,241 @@
+"""
+metrics.py – Compteurs et histogrammes exportés pour Prometheus.
+
+L'application tient en mémoire quelques métriques (clonages lancés et
+terminés par résultat, octets copiés, durée de chaque phase, débit,
+échecs de vérification, latence de l'inventaire des disques) et réécrit
+périodiquement, de façon atomique (fichier temporaire + rename), un
+fichier au format texte de Prometheus. Le collecteur « textfile » de
+node_exporter, sur la même machine, le publie ensuite.
+
+Les mises à jour n'ont lieu qu'aux événements de job (démarrage, fin,
+changement de phase), jamais par bloc copié : une addition sous un verrou,
+rien de mesurable sur le chemin de la copie. Le module ne dépend que de
+la configuration, pour pouvoir être importé partout, utils.py compris.
+"""
+from __future__ import annotations
+
+import bisect
+import math
+import os
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import config_manager
+
+_WRITE_INTERVAL = 15.0
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels_text(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} : étiquettes attendues {self.label_names}, reçues {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.label_names)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Compteur croissant, éventuellement décliné par étiquettes."""
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()) -> None:
+        super().__init__(name, help_text, label_names)
+        self._values: Dict[LabelValues, float] = {} if label_names else {(): 0.0}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return super().render() + [
+            f"{self.name}{_labels_text(self.label_names, key)} {_format_value(v)}" for key, v in values
+        ]
+
+
+class Histogram(_Metric):
+    """Histogramme à seaux fixes (bornes supérieures croissantes, +Inf implicite)."""
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float],
+                 label_names: Sequence[str] = ()) -> None:
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(sorted(buckets))
+        # Par jeu d'étiquettes : [effectif par seau (+Inf compris), somme]
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return sum(series[0]) if series else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = sorted((k, (list(c), s[0])) for k, (c, s) in self._series.items())
+        lines = super().render()
+        for key, (counts, total) in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels_text(self.label_names, key, le)} {cumulative}")
+            labels = _labels_text(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Ensemble ordonné des métriques exportées."""
+
+    def __init__(self) -> None:
+        self._metrics: List[_Metric] = []
+
+    def counter(self, name: str, help_text: str, label_names: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, help_text, label_names)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help_text: str, buckets: Sequence[float],
+                  label_names: Sequence[str] = ()) -> Histogram:
+        metric = Histogram(name, help_text, buckets, label_names)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Exposition au format texte de Prometheus (0.0.4)."""
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: str) -> None:
+        """Réécrit `path` atomiquement : node_exporter ne lit jamais un fichier à moitié écrit."""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.render())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+
+
+REGISTRY = MetricsRegistry()
+
+CLONES_STARTED = REGISTRY.counter(
+    "disk_cloner_clones_started_total", "Clonages lancés.")
+CLONES_FINISHED = REGISTRY.counter(
+    "disk_cloner_clones_finished_total", "Clonages terminés, par résultat.", ("result",))
+BYTES_COPIED = REGISTRY.counter(
+    "disk_cloner_bytes_copied_total", "Octets copiés par les clonages réussis.")
+VERIFY_FAILURES = REGISTRY.counter(
+    "disk_cloner_verify_failures_total", "Vérifications post-clonage en échec (disques différents).")
+PHASE_SECONDS = REGISTRY.histogram(
+    "disk_cloner_phase_duration_seconds", "Durée des phases d'un clonage.",
+    (5, 15, 30, 60, 120, 300, 600, 1200, 1800, 3600, 7200), ("phase",))
+THROUGHPUT_MB_S = REGISTRY.histogram(
+    "disk_cloner_copy_throughput_mb_s", "Débit moyen de la phase de copie (Mo/s).",
+    (1, 2, 5, 10, 20, 40, 60, 80, 100, 150, 200, 300, 400))
+DEVICE_ENUMERATION_SECONDS = REGISTRY.histogram(
+    "disk_cloner_device_enumeration_seconds", "Durée d'un inventaire des disques.",
+    (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5))
+LOG_RECORDS_DROPPED = REGISTRY.counter(
+    "disk_cloner_log_records_dropped_total", "Messages de journal perdus (file d'écriture pleine).")
+HISTORY_WRITE_ERRORS = REGISTRY.counter(
+    "disk_cloner_history_write_errors_total", "Clonages non enregistrés dans l'historique (erreur sqlite).")
+
+
+class TextfileExporter:
+    """Thread réécrivant le fichier textfile toutes les `interval` secondes."""
+
+    def __init__(self, path: str, registry: MetricsRegistry = REGISTRY,
+                 interval: float = _WRITE_INTERVAL) -> None:
+        self.path = path
+        self._registry = registry
+        self._interval = interval
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_error: Optional[OSError] = None
+
+    def start(self) -> "TextfileExporter":
+        self._thread = threading.Thread(target=self._run, daemon=True, name="metrics-textfile")
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Arrête le thread après une dernière écriture."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(self._interval)
+        self.write()
+
+    def write(self) -> bool:
+        try:
+            self._registry.write_textfile(self.path)
+        except OSError as e:
+            self.last_error = e
+            return False
+        self.last_error = None
+        return True
+
+    def _run(self) -> None:
+        self.write()
+        while not self._stop_event.wait(self._interval):
+            self.write()
+
+
+def start_textfile_exporter() -> Optional[TextfileExporter]:
+    """
+    Démarre l'export vers le fichier configuré (`metrics_textfile_path`).
+    None si l'export est désactivé ou si le répertoire du collecteur
+    n'existe pas (node_exporter absent).
+    """
+    path = config_manager.get_metrics_textfile_path()
+    if not path or not os.path.isdir(os.path.dirname(path)):
+        return None
+    return TextfileExporter(path).start()
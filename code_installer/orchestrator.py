@@ -0,0 +1,294 @@
+"""
+orchestrator.py – API asyncio : clonage, vérification, événements disques.
+
+Une seule boucle d'événements, dans un thread d'arrière-plan (AsyncBridge),
+suit tous les processus de clonage (clone_worker.ProcessCloneJob.execute,
+une coroutine par job) et sert l'API de contrôle (control_server). Le code
+synchrone (Tk, JobManager) y soumet des coroutines et récupère un
+concurrent.futures.Future, au lieu d'un thread par poste.
+
+Pour le code asynchrone, le module expose aussi :
+
+  * clone() / verify() / clone_many() : CloneJob.run et verify_clone
+    attendus comme des coroutines. Le moteur reste unique (clone.py), il
+    tourne dans un thread dédié ; annuler la tâche arrête dd ou cmp et
+    n'aboutit qu'une fois le sous-processus terminé, avant de propager
+    CancelledError (annulation structurée) ;
+  * DeviceEvents / wait_for_device() : les uevents du moniteur udev
+    (device_monitor, netlink) reçus comme des événements asyncio, sans
+    boucle de sondage.
+"""
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, Awaitable, Callable, Iterable, List, Optional, Tuple, TypeVar
+
+from clone import CloneJob, JobMetrics, verify_clone
+from device_monitor import DeviceMonitor, get_device_monitor
+from utils import DiskInfo
+
+T = TypeVar("T")
+
+
+def _in_thread(func: Callable[..., T], *args: Any, **kwargs: Any) -> "asyncio.Future[T]":
+    """Exécute `func` dans un thread dédié ; son résultat est livré à la boucle courante."""
+    loop = asyncio.get_running_loop()
+    future: "asyncio.Future[T]" = loop.create_future()
+
+    def deliver(result: Any, error: Optional[BaseException]) -> None:
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def run() -> None:
+        result, error = None, None
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            error = e
+        try:
+            loop.call_soon_threadsafe(deliver, result, error)
+        except RuntimeError:
+            pass  # boucle fermée entre-temps : plus personne n'attend le résultat
+
+    threading.Thread(target=run, daemon=True, name=f"async-{func.__name__}").start()
+    return future
+
+
+async def _run_job(job: CloneJob, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Attend `func` (opération bloquante pilotée par `job`). Si la tâche est
+    annulée, le job l'est aussi et l'on attend la fin du thread : dd ou cmp
+    est arrêté quand CancelledError se propage.
+    """
+    future = _in_thread(func, *args, **kwargs)
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        job.cancel()
+        try:
+            await future
+        except Exception:
+            pass  # CloneError « annulé » attendue
+        raise
+
+
+# ── Clonage et vérification ─────────────────────────────────────────────────
+async def clone(source_dev: str, dest_dev: str, job: Optional[CloneJob] = None,
+                **options: Any) -> JobMetrics:
+    """
+    Équivalent asynchrone de CloneJob.run() (mêmes options). `job` permet
+    la pause et le plafond de débit en cours de route. Retourne les
+    JobMetrics du clonage ; lève CloneError, SizeMismatchError ou
+    PreflightError.
+    """
+    job = job if job is not None else CloneJob()
+    await _run_job(job, job.run, source_dev, dest_dev, **options)
+    return job.metrics
+
+
+async def verify(source_dev: str, dest_dev: str, job: Optional[CloneJob] = None,
+                 **options: Any) -> bool:
+    """
+    Équivalent asynchrone de verify_clone() (mêmes options) ; True si les
+    disques sont identiques. Les métriques vont dans celles de `job`.
+    """
+    job = job if job is not None else CloneJob()
+    options.setdefault("metrics", job.metrics)
+    return await _run_job(job, verify_clone, source_dev, dest_dev, cancel_job=job, **options)
+
+
+async def clone_many(
+    pairs: Iterable[Tuple[str, str]],
+    verify_after: bool = False,
+    **options: Any,
+) -> List[object]:
+    """
+    Clone chaque paire (source, destination) en parallèle. Retourne, dans
+    l'ordre, le résultat de chaque job : True/False (vérification), None
+    (clonage sans vérification) ou l'exception levée. Un échec n'arrête
+    pas les autres jobs ; annuler clone_many() les annule tous.
+    """
+    verify_options = {k: options[k] for k in ("progress_callback", "log_func", "cache_mode",
+                                              "io_priority") if k in options}
+
+    async def one(source_dev: str, dest_dev: str) -> Optional[bool]:
+        job = CloneJob()
+        await clone(source_dev, dest_dev, job, **options)
+        if not verify_after:
+            return None
+        return await verify(source_dev, dest_dev, job, **verify_options)
+
+    return await asyncio.gather(*(one(s, d) for s, d in pairs), return_exceptions=True)
+
+
+# ── Événements disques ──────────────────────────────────────────────────────
+class DeviceEvents:
+    """
+    Flux asynchrone des événements du moniteur udev : (action, DiskInfo),
+    action parmi "add", "change", "remove".
+
+        async with DeviceEvents() as events:
+            async for action, disk in events:
+                ...
+
+    L'écoute commence à l'entrée du bloc : un inventaire fait ensuite
+    (snapshot()) ne peut pas manquer de branchement. Lève OSError si
+    netlink est indisponible.
+    """
+
+    def __init__(self, monitor: Optional[DeviceMonitor] = None) -> None:
+        self._monitor = monitor
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional["asyncio.Queue[Tuple[str, DiskInfo]]"] = None
+
+    async def __aenter__(self) -> "DeviceEvents":
+        monitor = self._monitor if self._monitor is not None else get_device_monitor()
+        if monitor is None or not monitor.running:
+            raise OSError("Moniteur udev indisponible (netlink).")
+        self._monitor = monitor
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        monitor.add_listener(self._on_event)
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        if self._monitor is not None:
+            self._monitor.remove_listener(self._on_event)
+
+    def snapshot(self) -> List[DiskInfo]:
+        """Disques présents selon le moniteur."""
+        assert self._monitor is not None
+        return list(self._monitor.snapshot().values())
+
+    def _on_event(self, action: str, disk: DiskInfo) -> None:
+        # Thread du moniteur : l'événement est remis à la boucle
+        assert self._loop is not None and self._queue is not None
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, (action, disk))
+
+    async def get(self) -> Tuple[str, DiskInfo]:
+        """Prochain événement."""
+        assert self._queue is not None
+        return await self._queue.get()
+
+    def __aiter__(self) -> "DeviceEvents":
+        return self
+
+    async def __anext__(self) -> Tuple[str, DiskInfo]:
+        return await self.get()
+
+
+async def wait_for_device(
+    id_path: Optional[str] = None,
+    predicate: Optional[Callable[[DiskInfo], bool]] = None,
+    timeout: Optional[float] = None,
+    monitor: Optional[DeviceMonitor] = None,
+) -> DiskInfo:
+    """
+    Attend qu'un disque soit branché sur le port `id_path` et/ou vérifie
+    `predicate`. Retourne aussitôt un disque déjà présent. Lève
+    asyncio.TimeoutError après `timeout` secondes, OSError sans netlink.
+    """
+    def matches(disk: DiskInfo) -> bool:
+        if id_path is not None and disk.id_path != id_path:
+            return False
+        return predicate is None or predicate(disk)
+
+    async with DeviceEvents(monitor) as events:
+        present = next((d for d in events.snapshot() if matches(d)), None)
+        if present is not None:
+            return present
+
+        async def arrival() -> DiskInfo:
+            while True:
+                action, disk = await events.get()
+                if action != "remove" and matches(disk):
+                    return disk
+
+        return await asyncio.wait_for(arrival(), timeout)
+
+
+# ── Pont avec le code synchrone (Tk) ────────────────────────────────────────
+class AsyncBridge:
+    """
+    Boucle asyncio tournant dans un thread d'arrière-plan unique. Depuis
+    n'importe quel thread : submit(coroutine) -> concurrent.futures.Future.
+    Les callbacks des coroutines s'exécutent dans le thread de la boucle :
+    côté Tk, ils repassent par root.after comme ceux des autres workers.
+    """
+
+    def __init__(self) -> None:
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> "AsyncBridge":
+        with self._lock:
+            if self._thread is None:
+                ready = threading.Event()
+                self._thread = threading.Thread(target=self._run, args=(ready,),
+                                                daemon=True, name="asyncio-bridge")
+                self._thread.start()
+                ready.wait()
+        return self
+
+    def _run(self, ready: threading.Event) -> None:
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._loop.close()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def submit(self, coro: Awaitable[T]) -> "concurrent.futures.Future[T]":
+        """Planifie `coro` sur la boucle ; Future.cancel() annule la tâche."""
+        self.start()
+        assert self._loop is not None
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def call_soon(self, func: Callable[..., None], *args) -> None:
+        self.start()
+        assert self._loop is not None
+        self._loop.call_soon_threadsafe(func, *args)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Annule les tâches en cours puis arrête la boucle."""
+        loop, thread = self._loop, self._thread
+        if loop is None or thread is None:
+            return
+
+        async def shutdown() -> None:
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            loop.stop()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), loop)
+        thread.join(timeout)
+        with self._lock:
+            self._loop = None
+            self._thread = None
+
+
+_shared_bridge: Optional[AsyncBridge] = None
+_shared_lock = threading.Lock()
+
+
+def get_bridge() -> AsyncBridge:
+    """Pont partagé par toute l'application, démarré à la première demande."""
+    global _shared_bridge
+    with _shared_lock:
+        if _shared_bridge is None:
+            _shared_bridge = AsyncBridge().start()
+        return _shared_bridge
@@ -0,0 +1,221 @@
+"""
+preflight.py – Test préalable rapide du disque de destination.
+
+Une clé contrefaite annonce une capacité qu'elle n'a pas : au-delà de sa
+taille réelle, les écritures « rebouclent » sur le début de la mémoire
+(ou sont perdues). Une clé usée, elle, peut écrire à quelques centaines
+de Ko/s. Dans les deux cas, on ne s'en rend compte qu'après un clonage
+complet — au mieux à la vérification.
+
+Le test écrit donc, en accès direct (O_DIRECT, sans cache), de petits
+blocs signés (leur position et un jeton propre au test) à des positions
+réparties sur toute la taille annoncée, ainsi qu'en 0 et à chaque
+puissance de deux (1 Mio, 2 Mio... 1 Gio, 2 Gio...). Les blocs sont tous
+écrits, par positions croissantes, avant d'être relus. Une clé contrefaite
+reboucle modulo sa capacité réelle, une puissance de deux : l'écriture en
+2^k, 2^k au moins égal à la capacité réelle, retombe sur un bloc bas déjà
+écrit (0 au moins) et l'écrase ; la relecture trouve à cette place le bloc
+signé d'une autre position, dont l'écart donne la capacité réelle. Un bloc
+perdu ou illisible est lui aussi détecté. Le test mesure ensuite le débit
+d'écriture soutenu pendant quelques secondes.
+
+ATTENTION : le test est destructif pour la destination (comme le clonage
+qui le suit) ; il ne doit être lancé qu'après confirmation.
+"""
+from __future__ import annotations
+
+import hashlib
+import math
+import mmap
+import os
+import secrets
+import struct
+import time
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+from utils import drop_cached_range, human_size
+
+_PROBE_BLOCK = 4096
+_PROBE_MAGIC = b"SHADOWCLONE-PROBE"
+_SPEED_CHUNK = 4 * 1024 * 1024
+_DEFAULT_SAMPLES = 64
+_FIRST_POWER_OFFSET = 1024 * 1024   # plus petite position en puissance de deux
+
+
+@dataclass
+class PreflightResult:
+    size_bytes: int
+    checked_offsets: int = 0
+    bad_offsets: List[int] = field(default_factory=list)
+    write_mb_s: float = 0.0
+    min_write_mb_s: float = 0.0
+    cancelled: bool = False
+    wrap_size: Optional[int] = None     # période de rebouclage observée (capacité réelle)
+
+    @property
+    def fake_capacity(self) -> bool:
+        return bool(self.bad_offsets)
+
+    @property
+    def suspected_real_size(self) -> Optional[int]:
+        """
+        Capacité réelle : période du rebouclage s'il a été observé, sinon
+        première position défaillante non nulle (borne haute).
+        """
+        if self.wrap_size is not None:
+            return self.wrap_size
+        return min((o for o in self.bad_offsets if o), default=None)
+
+    @property
+    def too_slow(self) -> bool:
+        return self.min_write_mb_s > 0 and self.write_mb_s < self.min_write_mb_s
+
+    @property
+    def ok(self) -> bool:
+        return not self.cancelled and not self.fake_capacity and not self.too_slow
+
+    def reason(self) -> str:
+        if self.fake_capacity:
+            real = (f"de {human_size(self.wrap_size)} (rebouclage)" if self.wrap_size
+                    else f"inférieure à {human_size(self.suspected_real_size or 0)}")
+            return (
+                f"Capacité suspecte : {len(self.bad_offsets)}/{self.checked_offsets} blocs "
+                f"de test relus incorrects. Capacité réelle probablement {real} "
+                f"(annoncée : {human_size(self.size_bytes)})."
+            )
+        if self.too_slow:
+            return (
+                f"Disque de destination trop lent : {self.write_mb_s:.1f} Mo/s en écriture "
+                f"(minimum requis : {self.min_write_mb_s:g} Mo/s)."
+            )
+        return ""
+
+
+def _probe_offsets(size_bytes: int, samples: int) -> List[int]:
+    """Positions réparties uniformément, plus 0 et les puissances de deux (rebouclage)."""
+    last = (size_bytes - _PROBE_BLOCK) // _PROBE_BLOCK * _PROBE_BLOCK
+    if last <= 0:
+        return [0]
+    step = last / max(samples - 1, 1)
+    offsets = {int(i * step) // _PROBE_BLOCK * _PROBE_BLOCK for i in range(samples)}
+    power = _FIRST_POWER_OFFSET
+    while power <= last:
+        offsets.add(power)
+        power *= 2
+    offsets.add(0)
+    return sorted(offsets)
+
+
+def _probe_block(token: bytes, offset: int) -> bytes:
+    header = _PROBE_MAGIC + token + struct.pack("<Q", offset)
+    signature = hashlib.sha256(header).digest()
+    filler = hashlib.sha256(signature).digest()
+    block = header + signature
+    return (block + filler * (_PROBE_BLOCK // len(filler)))[:_PROBE_BLOCK]
+
+
+def _probe_origin(token: bytes, block: bytes) -> Optional[int]:
+    """Position pour laquelle un bloc de ce test a été signé ; None si ce n'en est pas un."""
+    header_size = len(_PROBE_MAGIC) + len(token) + 8
+    header = block[:header_size]
+    if not header.startswith(_PROBE_MAGIC + token):
+        return None
+    offset = struct.unpack("<Q", header[-8:])[0]
+    return offset if block == _probe_block(token, offset) else None
+
+
+def _open_device(path: str) -> tuple:
+    """Ouvre le périphérique en O_DIRECT si possible ; retourne (fd, direct)."""
+    try:
+        return os.open(path, os.O_RDWR | os.O_DIRECT | os.O_SYNC), True
+    except OSError:
+        return os.open(path, os.O_RDWR | os.O_SYNC), False
+
+
+def probe_destination(
+    dest_dev: str,
+    size_bytes: int,
+    min_write_mb_s: float = 0.0,
+    speed_test_seconds: float = 3.0,
+    samples: int = _DEFAULT_SAMPLES,
+    log_func: Optional[Callable[[str], None]] = None,
+    cancel_check: Optional[Callable[[], bool]] = None,
+) -> PreflightResult:
+    """
+    Teste la destination (fausse capacité + débit d'écriture soutenu).
+    Bloquant (quelques secondes) : à appeler depuis un thread de travail.
+    """
+    dest_path = f"/dev/{dest_dev.split('/')[-1]}"
+
+    def log(msg: str) -> None:
+        if log_func:
+            log_func(msg)
+
+    def cancelled() -> bool:
+        return bool(cancel_check and cancel_check())
+
+    result = PreflightResult(size_bytes=size_bytes, min_write_mb_s=min_write_mb_s)
+    token = secrets.token_bytes(16)
+    offsets = _probe_offsets(size_bytes, samples)
+
+    fd, direct = _open_device(dest_path)
+    # Tampon aligné sur une page (exigé par O_DIRECT) : une zone mmap anonyme
+    buf = mmap.mmap(-1, _SPEED_CHUNK)
+    try:
+        log(f"Test de capacité de {dest_path} ({len(offsets)} positions)...")
+        write_failed = set()
+        for offset in offsets:
+            if cancelled():
+                result.cancelled = True
+                return result
+            buf[:_PROBE_BLOCK] = _probe_block(token, offset)
+            try:
+                os.pwritev(fd, [memoryview(buf)[:_PROBE_BLOCK]], offset)
+            except OSError:
+                write_failed.add(offset)
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass  # les blocs non écrits ressortiront à la relecture
+        if not direct:
+            drop_cached_range(dest_path)
+
+        for offset in offsets:
+            if cancelled():
+                result.cancelled = True
+                return result
+            origin = None
+            if offset not in write_failed:
+                try:
+                    os.preadv(fd, [memoryview(buf)[:_PROBE_BLOCK]], offset)
+                    origin = _probe_origin(token, bytes(buf[:_PROBE_BLOCK]))
+                except OSError:
+                    pass
+            result.checked_offsets += 1
+            if origin != offset:
+                result.bad_offsets.append(offset)
+            if origin is not None and origin != offset:
+                # Bloc d'une autre position : l'écart est un multiple de la période de rebouclage
+                result.wrap_size = math.gcd(result.wrap_size or 0, abs(origin - offset))
+
+        if result.fake_capacity:
+            return result
+
+        log(f"Mesure du débit d'écriture de {dest_path} ({speed_test_seconds:g} s)...")
+        buf[:] = os.urandom(_SPEED_CHUNK)
+        written = 0
+        start = time.monotonic()
+        while time.monotonic() - start < speed_test_seconds and written + _SPEED_CHUNK <= size_bytes:
+            if cancelled():
+                result.cancelled = True
+                return result
+            written += os.pwritev(fd, [buf], written)
+        os.fsync(fd)
+        elapsed = max(time.monotonic() - start, 0.001)
+        result.write_mb_s = written / (1024 * 1024) / elapsed
+        log(f"Débit d'écriture mesuré : {result.write_mb_s:.1f} Mo/s.")
+    finally:
+        buf.close()
+        os.close(fd)
+    return result